@@ -18,6 +18,33 @@ class Settings(BaseSettings):
     llm_fallback_model: str = "deepseek-ai/deepseek-coder-7b-base"
     llm_max_length: int = 150
     llm_temperature: float = 0.7
+    llm_preload: bool = True  # False defers loading the model (and importing torch) until the first LLM request
+    llm_not_ready_policy: str = "queue"  # "queue" waits up to llm_ready_timeout, "reject" returns 503
+    llm_ready_timeout: float = 30.0
+    llm_warmup_enabled: bool = True
+    llm_warmup_prompt: str = "Hello"
+    llm_backend: str = "auto"  # auto, vllm, transformers, quantized, gguf, fake (CPU test engine)
+    llm_max_batch_size: int = 8  # concurrent sequences per decode step (vLLM max_num_seqs)
+    llm_inference_mode: str = "inprocess"  # inprocess, or process to run the model in a supervised worker
+    llm_worker_socket: str = ""  # Unix socket for the worker; defaults to a per-process path in the temp dir
+    llm_worker_start_timeout: float = 600.0
+    llm_worker_restart_delay: float = 1.0  # doubles while the worker keeps crashing, up to 30s
+    llm_gguf_model_path: str = ""
+    llm_context_length: int = 2048
+    llm_cpu_threads: int = 0  # 0 lets torch/llama.cpp decide
+    llm_prompt_budget_logs: int = 768  # prompt token budget for /llm/analyze/logs
+    llm_prompt_budget_campaign: int = 512  # prompt token budget for /llm/analyze/campaign
+    llm_result_cache_ttl: float = 5.0  # seconds identical prompts reuse a finished generation
+    llm_result_cache_size: int = 256
+    llm_idle_unload_minutes: int = 0  # 0 keeps the model loaded forever
+    llm_cpu_fp32_headroom: float = 1.3  # auto loads float32 on CPU only if RAM >= estimate * headroom, else 16-bit weights
+    llm_model_cache_dir: str = ""  # model snapshots and the pin manifest; defaults to the Hugging Face hub cache
+    llm_offline: bool = False  # never contact the hub; models must already be in the cache
+    llm_mmap_weights: bool = True  # map safetensors weights on CPU so restarts and workers share pages
+    llm_cpu_dtype: str = "auto"  # auto keeps the checkpoint dtype so weights stay mmapped; float32 or bfloat16 force a copy unless they match
+    
+    campaign_insight_section_timeout: float = 45.0
+    campaign_flush_interval: float = 10.0  # seconds between write-behind flushes of campaign state
     
     max_follows: int = 102
     max_dms: int = 8
@@ -48,8 +75,27 @@ class Settings(BaseSettings):
     
     headless_browser: bool = True
     
+    trace_sample_rate: float = 0.0  # share of requests traced; 0 disables tracing
+    trace_exporters: str = "memory"  # comma-separated: memory, otlp_file
+    trace_buffer_size: int = 200  # traces kept by the memory exporter
+    trace_file_path: str = "/tmp/social_commander_traces.jsonl"
+    debug_routes_enabled: bool = False  # mounts /debug/* (traces, profiler and other diagnostics)
+    profile_max_seconds: int = 60  # longest /debug/profile run
+    loop_lag_threshold_ms: int = 500  # log event-loop stalls longer than this; 0 disables the monitor
+    
     log_level: str = "INFO"
-    log_file: str = "/tmp/social_commander.log"
+    log_file: str = "/tmp/social_commander.log"  # JSON lines; empty disables the file
+    log_max_bytes: int = 50 * 1024 * 1024  # rotate when the file reaches this size (0 = no size limit)
+    log_rotate_hours: int = 24  # also rotate on this interval (0 = size only)
+    log_backup_count: int = 10  # gzip-compressed backups kept
+    log_queue_size: int = 10000  # records buffered for the writer thread before new ones are dropped
+    log_console: bool = True
+    
+    analytics_engine: str = "auto"  # auto, duckdb or pandas; every engine also needs pyarrow
+    analytics_archive_dir: str = ""  # Parquet log archive; defaults to log_archive/ next to the database
+    analytics_archive_interval_minutes: int = 60  # copy new log rows into the archive this often (0 = only on demand)
+    analytics_cache_ttl: int = 300  # seconds a report result is reused
+    analytics_workers: int = 2  # threads running archive and report queries
     
     runpod_pod_id: str = ""
     runpod_api_key: str = ""
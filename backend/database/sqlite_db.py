@@ -1,12 +1,134 @@
 import sqlite3
 import json
-from typing import List, Optional
-from datetime import datetime
-from backend.models import LogEntry, Campaign, Target, Command
+import re
+import statistics
+import time
+from typing import Iterator, List, Optional, Dict, Any, Tuple
+from datetime import datetime, timedelta
+from backend.models import LogEntry, LogSearchHit, Campaign, Target, Command
+from backend.metrics import registry, timed
+from backend.tracing import traced
+
+DB_QUERY_SECONDS = registry.histogram(
+    "db_query_seconds", "Time spent in each DatabaseManager statement", ["statement"]
+)
+
+SCHEMA_VERSION = 2
+
+# STRICT tables (type-checked columns) need SQLite 3.37+; older libraries get plain tables
+STRICT_SUPPORTED = sqlite3.sqlite_version_info >= (3, 37, 0)
+
+# LogEntry field -> lookup table mapping its names to small integer codes
+LOG_LOOKUPS = {"type": "log_types", "action": "log_actions", "outcome": "log_outcomes"}
+
+MIGRATION_CHUNK_ROWS = 50_000
+
+LOGS_COLUMNS = "ts_ms, type, action, outcome, target, details, probability, followback_chance"
+
+# '_' is a token character so usernames like "jane_doe" index as one term; prefix indexes make "jan*" cheap
+LOGS_FTS_OPTIONS = "tokenize = \"unicode61 tokenchars '_'\", prefix = '2 3'"
+
+HOUR_MS = 3_600_000
+
+EXPORT_CHUNK_ROWS = 1000
+
+# dataset -> (columns, query, JSON-encoded columns, time column for since/until filters)
+EXPORTS: Dict[str, Tuple[Tuple[str, ...], str, Tuple[str, ...], Optional[str]]] = {
+    "logs": (
+        ("id", "ts", "ts_ms", "type", "action", "outcome", "target", "details", "probability", "followback_chance"),
+        """
+            SELECT l.id, strftime('%Y-%m-%dT%H:%M:%fZ', l.ts_ms / 1000.0, 'unixepoch'), l.ts_ms,
+                   t.name, a.name, o.name, l.target, l.details, l.probability, l.followback_chance
+            FROM logs l
+            JOIN log_types t ON t.code = l.type
+            JOIN log_actions a ON a.code = l.action
+            JOIN log_outcomes o ON o.code = l.outcome
+        """,
+        (),
+        "l.ts_ms"
+    ),
+    "commands": (
+        ("id", "input", "output", "timestamp", "success", "created_at"),
+        "SELECT id, input, output, timestamp, success, created_at FROM commands",
+        (),
+        None
+    ),
+    "campaigns": (
+        ("id", "name", "persona", "status", "phase", "created_at", "targets_count", "followback_rate",
+         "target_hashtags", "settings", "metrics", "updated_at"),
+        """
+            SELECT id, name, persona, status, phase, created_at, targets_count, followback_rate,
+                   target_hashtags, settings, metrics, updated_at
+            FROM campaign_state
+        """,
+        ("target_hashtags", "settings", "metrics"),
+        None
+    )
+}
+
+SEARCH_MODES = ("all", "phrase", "prefix")
+SNIPPET_OPEN = "<mark>"
+SNIPPET_CLOSE = "</mark>"
+
+def _table_options(*options: str) -> str:
+    options = [o for o in options if o != "STRICT" or STRICT_SUPPORTED]
+    return " " + ", ".join(options) if options else ""
+
+def _fts_query(text: str, mode: str) -> str:
+    """Turn user input into an FTS5 query whose terms are quoted, so operators in the input are literal"""
+    terms = [term.replace('"', '""') for term in re.split(r"\s+", text.strip()) if term]
+    if not terms:
+        raise ValueError("Search query is empty")
+    if mode == "phrase":
+        return '"' + " ".join(terms) + '"'
+    if mode == "prefix":
+        return " ".join(f'"{term}"*' for term in terms)
+    return " ".join(f'"{term}"' for term in terms)
+
+def _clock(ts_ms: int) -> str:
+    """Local wall-clock time of an epoch-ms timestamp, as LogEntry.timestamp has always been"""
+    return datetime.fromtimestamp(ts_ms / 1000).strftime("%H:%M:%S")
+
+def _entry_ts_ms(timestamp: Optional[str]) -> int:
+    """Epoch ms of a LogEntry.timestamp: epoch seconds or ms, ISO 8601, or a bare "%H:%M:%S" from today.
+
+    A bare clock time in the current second keeps now's milliseconds, so entries
+    logged as they happen stay ordered within a second; one later than now
+    belongs to yesterday (logged just before midnight, written just after).
+    Anything unparseable falls back to now.
+    """
+    now = datetime.now()
+    text = (timestamp or "").strip()
+    try:
+        if re.fullmatch(r"\d+(\.\d+)?", text):
+            value = float(text)
+            return int(value if value >= 1e11 else value * 1000)  # 1e11 s is year 5138; 1e11 ms is 1973
+        if re.fullmatch(r"\d{1,2}:\d{2}:\d{2}", text):
+            at = datetime.combine(now.date(), datetime.strptime(text, "%H:%M:%S").time())
+            if timedelta(0) <= now - at < timedelta(seconds=1):
+                at = now
+            elif at > now:
+                at -= timedelta(days=1)
+            return int(at.timestamp() * 1000)
+        if text:
+            return int(datetime.fromisoformat(text.replace("Z", "+00:00")).timestamp() * 1000)
+    except ValueError:
+        pass
+    return int(now.timestamp() * 1000)
+
+def _statement(name: str):
+    """Time a DatabaseManager method and trace it as a child of the active span"""
+    def decorator(func):
+        return traced(f"db.{name}", child_only=True)(timed(DB_QUERY_SECONDS, name)(func))
+    return decorator
 
 class DatabaseManager:
     def __init__(self, db_path: str = "social_commander.db"):
         self.db_path = db_path
+        self._codes: Dict[str, Dict[str, int]] = {lookup: {} for lookup in LOG_LOOKUPS.values()}
+        self._names: Dict[str, Dict[int, str]] = {lookup: {} for lookup in LOG_LOOKUPS.values()}
+        self.migration_report: Optional[Dict[str, Any]] = None
+        self.fts_enabled = False
         self.init_database()
     
     def init_database(self):
@@ -15,20 +137,15 @@ class DatabaseManager:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT NOT NULL,
-                    action TEXT NOT NULL,
-                    target TEXT,
-                    details TEXT NOT NULL,
-                    type TEXT NOT NULL,
-                    outcome TEXT NOT NULL,
-                    probability REAL,
-                    followback_chance REAL,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
+                # WAL lets long readers (exports, dashboards) run alongside the writer without blocking it
+                cursor.execute("PRAGMA journal_mode=WAL")
+                
+                version = cursor.execute("PRAGMA user_version").fetchone()[0]
+                columns = [row[1] for row in cursor.execute("PRAGMA table_info(logs)")]
+                legacy_logs = version < SCHEMA_VERSION and "created_at" in columns
+                if not legacy_logs:
+                    self._create_logs_schema(cursor, "logs")
+                    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
                 
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS campaigns (
@@ -68,6 +185,38 @@ class DatabaseManager:
                     )
                 """)
                 
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS campaign_state (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    persona TEXT NOT NULL,
+                    target_hashtags TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    phase TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    settings TEXT NOT NULL,
+                    metrics TEXT NOT NULL,
+                    targets_count INTEGER NOT NULL DEFAULT 0,
+                    followback_rate REAL NOT NULL DEFAULT 0,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS campaign_targets (
+                    campaign_id TEXT NOT NULL,
+                    username TEXT NOT NULL,
+                    followed_at TEXT,
+                    followed_back INTEGER,
+                    dm_sent INTEGER,
+                    dm_sent_at TEXT,
+                    engagement_score REAL NOT NULL DEFAULT 0,
+                    tags_matched TEXT NOT NULL,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (campaign_id, username)
+                    )
+                """)
+                
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS commands (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -91,60 +240,489 @@ class DatabaseManager:
                 """)
                 
                 conn.commit()
+            
+            if legacy_logs:
+                self.migration_report = self.migrate_logs_v2()
+            
+            with sqlite3.connect(self.db_path) as conn:
+                self.fts_enabled = self._create_logs_fts(conn)
+                self._create_log_counters(conn)
         except sqlite3.Error as e:
             print(f"Database initialization error: {e}")
             raise
     
+    def _create_logs_schema(self, cursor: sqlite3.Cursor, table: str):
+        """Create the v2 logs table, its indexes and the code lookup tables"""
+        for lookup in LOG_LOOKUPS.values():
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {lookup} (
+                name TEXT PRIMARY KEY,
+                code INTEGER NOT NULL UNIQUE
+                ){_table_options("WITHOUT ROWID", "STRICT")}
+            """)
+        
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY,
+            ts_ms INTEGER NOT NULL,
+            type INTEGER NOT NULL,
+            action INTEGER NOT NULL,
+            outcome INTEGER NOT NULL,
+            target TEXT,
+            details TEXT NOT NULL,
+            probability REAL,
+            followback_chance REAL
+            ){_table_options("STRICT")}
+        """)
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_logs_ts ON {table} (ts_ms)")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_logs_type_ts ON {table} (type, ts_ms)")
+    
+    def _create_logs_fts(self, conn: sqlite3.Connection) -> bool:
+        """Create the external-content FTS5 index over logs.details/target and its sync triggers.
+
+        Returns False when SQLite was built without FTS5; search then falls back to LIKE.
+        """
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'logs_fts'").fetchone()
+        try:
+            conn.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5(
+                details, target, content = 'logs', content_rowid = 'id', {LOGS_FTS_OPTIONS}
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            if "fts5" not in str(e):
+                raise
+            return False
+        
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS logs_fts_insert AFTER INSERT ON logs BEGIN
+                INSERT INTO logs_fts (rowid, details, target) VALUES (new.id, new.details, new.target);
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS logs_fts_delete AFTER DELETE ON logs BEGIN
+                INSERT INTO logs_fts (logs_fts, rowid, details, target) VALUES ('delete', old.id, old.details, old.target);
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS logs_fts_update AFTER UPDATE OF details, target ON logs BEGIN
+                INSERT INTO logs_fts (logs_fts, rowid, details, target) VALUES ('delete', old.id, old.details, old.target);
+                INSERT INTO logs_fts (rowid, details, target) VALUES (new.id, new.details, new.target);
+            END
+        """)
+        if not exists:
+            # Index rows written before the table existed (fresh migrations, older v2 databases)
+            conn.execute("INSERT INTO logs_fts (logs_fts) VALUES ('rebuild')")
+        conn.commit()
+        return True
+    
+    def _create_log_counters(self, conn: sqlite3.Connection):
+        """Create log_hourly, per-hour entry counts by type and outcome kept in step with logs by triggers.
+
+        The triggers run inside the inserting or deleting statement's transaction,
+        so the counts never disagree with the rows they summarise.
+        """
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'log_hourly'").fetchone()
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS log_hourly (
+            hour INTEGER NOT NULL,
+            type INTEGER NOT NULL,
+            outcome INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (hour, type, outcome)
+            ){_table_options("WITHOUT ROWID", "STRICT")}
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS log_hourly_insert AFTER INSERT ON logs BEGIN
+                INSERT INTO log_hourly (hour, type, outcome, count) VALUES (new.ts_ms / {HOUR_MS}, new.type, new.outcome, 1)
+                ON CONFLICT (hour, type, outcome) DO UPDATE SET count = count + 1;
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS log_hourly_delete AFTER DELETE ON logs BEGIN
+                UPDATE log_hourly SET count = count - 1
+                WHERE hour = old.ts_ms / {HOUR_MS} AND type = old.type AND outcome = old.outcome;
+            END
+        """)
+        if not exists:
+            self._backfill_log_counters(conn)
+        conn.commit()
+    
+    def _backfill_log_counters(self, conn: sqlite3.Connection):
+        conn.execute("DELETE FROM log_hourly")
+        conn.execute(f"""
+            INSERT INTO log_hourly (hour, type, outcome, count)
+            SELECT ts_ms / {HOUR_MS}, type, outcome, COUNT(*) FROM logs GROUP BY 1, 2, 3
+        """)
+    
+    def rebuild_log_counters(self):
+        """Recount log_hourly from the logs table"""
+        with sqlite3.connect(self.db_path) as conn:
+            self._backfill_log_counters(conn)
+    
+    def rebuild_log_search(self):
+        """Rebuild the full-text index from the logs table"""
+        if not self.fts_enabled:
+            return
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("INSERT INTO logs_fts (logs_fts) VALUES ('rebuild')")
+            conn.execute("INSERT INTO logs_fts (logs_fts) VALUES ('optimize')")
+    
+    def _load_lookups(self, conn: sqlite3.Connection):
+        for lookup in LOG_LOOKUPS.values():
+            rows = conn.execute(f"SELECT name, code FROM {lookup}").fetchall()
+            self._codes[lookup] = dict(rows)
+            self._names[lookup] = {code: name for name, code in rows}
+    
+    def _code(self, conn: sqlite3.Connection, lookup: str, name: str) -> int:
+        """Code for a type/action/outcome name, adding it to the lookup table on first use"""
+        code = self._codes[lookup].get(name)
+        if code is not None:
+            return code
+        
+        while True:
+            row = conn.execute(f"SELECT code FROM {lookup} WHERE name = ?", (name,)).fetchone()
+            if row is not None:
+                break
+            # A concurrent writer may take the same code first; OR IGNORE then skips and we retry
+            conn.execute(f"""
+                INSERT OR IGNORE INTO {lookup} (name, code)
+                SELECT ?, COALESCE(MAX(code), 0) + 1 FROM {lookup}
+            """, (name,))
+        # Commit now so a later rollback of the caller's insert cannot orphan a cached code
+        conn.commit()
+        self._codes[lookup][name] = row[0]
+        self._names[lookup][row[0]] = name
+        return row[0]
+    
+    def _name(self, conn: sqlite3.Connection, lookup: str, code: int) -> str:
+        name = self._names[lookup].get(code)
+        if name is None:
+            self._load_lookups(conn)
+            name = self._names[lookup].get(code, "unknown")
+        return name
+    
+    def _storage_bytes(self, conn: sqlite3.Connection, tables: List[str]) -> Dict[str, Optional[int]]:
+        """Bytes used by the given tables and, separately, by their indexes, and by the whole file"""
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        try:
+            placeholders = ",".join("?" * len(tables))
+            by_type = dict(conn.execute(f"""
+                SELECT m.type, SUM(d.pgsize) FROM dbstat d JOIN sqlite_master m ON m.name = d.name
+                WHERE m.tbl_name IN ({placeholders}) GROUP BY m.type
+            """, tables).fetchall())
+            table_bytes = by_type.get("table", 0)
+            index_bytes = by_type.get("index", 0)
+        except sqlite3.Error:
+            table_bytes = index_bytes = None  # SQLite built without the dbstat virtual table
+        return {
+            "tables": table_bytes,
+            "indexes": index_bytes,
+            "file_used": (pages - free) * page_size,
+            "file_free": free * page_size
+        }
+    
+    def _time_queries(self, conn: sqlite3.Connection, queries: Dict[str, tuple], repeat: int = 5) -> Dict[str, float]:
+        timings = {}
+        for name, (sql, params) in queries.items():
+            samples = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                conn.execute(sql, params).fetchall()
+                samples.append(time.perf_counter() - started)
+            timings[name] = round(statistics.median(samples) * 1000, 3)
+        return timings
+    
+    def migrate_logs_v2(self, chunk_rows: int = MIGRATION_CHUNK_ROWS) -> Dict[str, Any]:
+        """Copy the legacy logs table into schema v2 in chunks, then swap it in.
+
+        Each chunk commits on its own, so other connections keep reading and
+        writing the old table while the copy runs; only the final tail copy
+        and the table swap hold the write lock. Returns size and query-time
+        measurements taken before and after.
+        """
+        started = time.perf_counter()
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            latest_type = conn.execute("SELECT type FROM logs ORDER BY id DESC LIMIT 1").fetchone()
+            latest_type = latest_type[0] if latest_type else ""
+            before_size = self._storage_bytes(conn, ["logs"])
+            before_ms = self._time_queries(conn, {
+                "latest_100": ("SELECT timestamp, action, target, details, type, outcome, probability, followback_chance "
+                               "FROM logs ORDER BY created_at DESC LIMIT 100", ()),
+                "latest_100_by_type": ("SELECT timestamp, action, target, details, type, outcome, probability, followback_chance "
+                                       "FROM logs WHERE type = ? ORDER BY created_at DESC LIMIT 100", (latest_type,))
+            })
+            
+            conn.execute("DROP TABLE IF EXISTS logs_v2")
+            self._create_logs_schema(conn.cursor(), "logs_v2")
+            self._load_lookups(conn)
+            
+            copy_sql = f"""
+                INSERT INTO logs_v2 (id, {LOGS_COLUMNS})
+                SELECT l.id,
+                       CAST(ROUND((julianday(COALESCE(l.created_at, 'now')) - 2440587.5) * 86400000) AS INTEGER),
+                       t.code, a.code, o.code, l.target, l.details, l.probability, l.followback_chance
+                FROM logs l
+                JOIN log_types t ON t.name = l.type
+                JOIN log_actions a ON a.name = l.action
+                JOIN log_outcomes o ON o.name = l.outcome
+                WHERE l.id > ? AND l.id <= ?
+            """
+            
+            def assign_codes(low: int, high: int):
+                for column, lookup in LOG_LOOKUPS.items():
+                    for (name,) in conn.execute(f"SELECT DISTINCT {column} FROM logs WHERE id > ? AND id <= ?", (low, high)):
+                        self._code(conn, lookup, name)
+            
+            last_id = 0
+            chunks = 0
+            while True:
+                high = conn.execute(
+                    "SELECT MAX(id) FROM (SELECT id FROM logs WHERE id > ? ORDER BY id LIMIT ?)", (last_id, chunk_rows)
+                ).fetchone()[0]
+                if high is None:
+                    break
+                assign_codes(last_id, high)
+                conn.execute(copy_sql, (last_id, high))
+                last_id = high
+                chunks += 1
+            
+            while True:
+                # Rows written since the last chunk; names they introduce get codes before the lock is taken
+                assign_codes(last_id, 2 ** 62)
+                conn.execute("BEGIN IMMEDIATE")
+                unknown = conn.execute("""
+                    SELECT 1 FROM logs l WHERE l.id > ? AND (
+                        NOT EXISTS (SELECT 1 FROM log_types WHERE name = l.type)
+                        OR NOT EXISTS (SELECT 1 FROM log_actions WHERE name = l.action)
+                        OR NOT EXISTS (SELECT 1 FROM log_outcomes WHERE name = l.outcome)
+                    ) LIMIT 1
+                """, (last_id,)).fetchone()
+                if unknown is None:
+                    break
+                conn.execute("ROLLBACK")
+            conn.execute(copy_sql, (last_id, 2 ** 62))
+            conn.execute("DROP TABLE logs")
+            conn.execute("ALTER TABLE logs_v2 RENAME TO logs")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+            
+            rows = conn.execute("SELECT COUNT(*) FROM logs").fetchone()[0]
+            type_code = self._codes["log_types"].get(latest_type, 0)
+            after_size = self._storage_bytes(conn, ["logs"] + list(LOG_LOOKUPS.values()))
+            after_ms = self._time_queries(conn, {
+                "latest_100": (f"SELECT {LOGS_COLUMNS} FROM logs ORDER BY ts_ms DESC, id DESC LIMIT 100", ()),
+                "latest_100_by_type": (f"SELECT {LOGS_COLUMNS} FROM logs WHERE type = ? "
+                                       "ORDER BY ts_ms DESC, id DESC LIMIT 100", (type_code,))
+            })
+        finally:
+            conn.close()
+        
+        return {
+            "rows": rows,
+            "chunks": chunks,
+            "seconds": round(time.perf_counter() - started, 3),
+            "strict": STRICT_SUPPORTED,
+            "size_bytes": {"before": before_size, "after": after_size},
+            "query_ms": {name: {"before": before_ms[name], "after": after_ms[name]} for name in before_ms}
+        }
+    
+    @_statement("add_log_entry")
     def add_log_entry(self, log_entry: LogEntry) -> int:
         """Add a new log entry"""
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO logs (timestamp, action, target, details, type, outcome, probability, followback_chance)
+            cursor.execute(f"""
+                INSERT INTO logs ({LOGS_COLUMNS})
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             """, (
-                log_entry.timestamp,
-                log_entry.action,
+                _entry_ts_ms(log_entry.timestamp),
+                self._code(conn, "log_types", log_entry.type),
+                self._code(conn, "log_actions", log_entry.action),
+                self._code(conn, "log_outcomes", log_entry.outcome),
                 log_entry.target,
                 log_entry.details,
-                log_entry.type,
-                log_entry.outcome,
                 log_entry.probability,
                 log_entry.followbackChance
             ))
             return cursor.lastrowid
     
+    @_statement("get_logs")
     def get_logs(self, limit: int = 100, log_type: Optional[str] = None) -> List[LogEntry]:
         """Get recent log entries"""
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
             
             if log_type:
-                cursor.execute("""
-                    SELECT timestamp, action, target, details, type, outcome, probability, followback_chance
-                    FROM logs WHERE type = ? ORDER BY created_at DESC LIMIT ?
-                """, (log_type, limit))
+                type_code = self._codes["log_types"].get(log_type)
+                if type_code is None:
+                    self._load_lookups(conn)
+                    type_code = self._codes["log_types"].get(log_type)
+                    if type_code is None:
+                        return []
+                cursor.execute(f"""
+                    SELECT {LOGS_COLUMNS}
+                    FROM logs WHERE type = ? ORDER BY ts_ms DESC, id DESC LIMIT ?
+                """, (type_code, limit))
             else:
-                cursor.execute("""
-                    SELECT timestamp, action, target, details, type, outcome, probability, followback_chance
-                    FROM logs ORDER BY created_at DESC LIMIT ?
+                cursor.execute(f"""
+                    SELECT {LOGS_COLUMNS}
+                    FROM logs ORDER BY ts_ms DESC, id DESC LIMIT ?
                 """, (limit,))
             
             rows = cursor.fetchall()
             return [
                 LogEntry(
-                    timestamp=row[0],
-                    action=row[1],
-                    target=row[2],
-                    details=row[3],
-                    type=row[4],
-                    outcome=row[5],
+                    timestamp=_clock(row[0]),
+                    action=self._name(conn, "log_actions", row[2]),
+                    target=row[4],
+                    details=row[5],
+                    type=self._name(conn, "log_types", row[1]),
+                    outcome=self._name(conn, "log_outcomes", row[3]),
                     probability=row[6],
                     followbackChance=row[7]
                 )
                 for row in rows
             ]
     
+    @_statement("get_log_totals")
+    def get_log_totals(self, since: Optional[datetime] = None) -> Dict[str, Dict[str, int]]:
+        """Entry counts by type and outcome, from the hourly counters"""
+        params: List[Any] = []
+        where = ""
+        if since is not None:
+            where = "WHERE hour >= ?"
+            params.append(int(since.timestamp() * 1000) // HOUR_MS)
+        
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(f"""
+                SELECT type, outcome, SUM(count) FROM log_hourly {where}
+                GROUP BY type, outcome HAVING SUM(count) > 0
+            """, params).fetchall()
+            totals: Dict[str, Dict[str, int]] = {}
+            for type_code, outcome_code, count in rows:
+                by_outcome = totals.setdefault(self._name(conn, "log_types", type_code), {})
+                by_outcome[self._name(conn, "log_outcomes", outcome_code)] = count
+            return totals
+    
+    @_statement("get_log_series")
+    def get_log_series(self, since: datetime, until: Optional[datetime] = None, bucket_hours: int = 1,
+                       log_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Entry counts per time bucket, by type and by outcome, from the hourly counters.
+
+        Buckets are aligned to multiples of bucket_hours since the epoch (UTC)
+        and only buckets with entries are returned, oldest first.
+        """
+        if bucket_hours < 1:
+            raise ValueError("bucket_hours must be at least 1")
+        
+        filters = ["hour >= ?"]
+        params: List[Any] = [int(since.timestamp() * 1000) // HOUR_MS]
+        if until is not None:
+            filters.append("hour < ?")
+            params.append(-(-int(until.timestamp() * 1000) // HOUR_MS))
+        
+        with sqlite3.connect(self.db_path) as conn:
+            if log_type:
+                type_code = self._codes["log_types"].get(log_type)
+                if type_code is None:
+                    self._load_lookups(conn)
+                    type_code = self._codes["log_types"].get(log_type)
+                    if type_code is None:
+                        return []
+                filters.append("type = ?")
+                params.append(type_code)
+            
+            rows = conn.execute(f"""
+                SELECT hour / ? * ? AS bucket, type, outcome, SUM(count)
+                FROM log_hourly WHERE {" AND ".join(filters)}
+                GROUP BY bucket, type, outcome HAVING SUM(count) > 0
+                ORDER BY bucket
+            """, [bucket_hours, bucket_hours, *params]).fetchall()
+            
+            series: List[Dict[str, Any]] = []
+            for bucket, type_code, outcome_code, count in rows:
+                if not series or series[-1]["hour"] != bucket:
+                    series.append({"hour": bucket, "total": 0, "by_type": {}, "by_outcome": {}})
+                point = series[-1]
+                log_type_name = self._name(conn, "log_types", type_code)
+                outcome = self._name(conn, "log_outcomes", outcome_code)
+                point["total"] += count
+                point["by_type"][log_type_name] = point["by_type"].get(log_type_name, 0) + count
+                point["by_outcome"][outcome] = point["by_outcome"].get(outcome, 0) + count
+        
+        return [
+            {"start": datetime.fromtimestamp(point.pop("hour") * 3600).astimezone().isoformat(), **point}
+            for point in series
+        ]
+    
+    @_statement("search_logs")
+    def search_logs(self, query: str, mode: str = "all", log_type: Optional[str] = None,
+                    since: Optional[datetime] = None, until: Optional[datetime] = None,
+                    limit: int = 100) -> List[LogSearchHit]:
+        """Full-text search over log details and targets, newest first, with highlighted snippets"""
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"mode must be one of {', '.join(SEARCH_MODES)}")
+        
+        with sqlite3.connect(self.db_path) as conn:
+            filters = []
+            params: List[Any] = []
+            if log_type:
+                type_code = self._codes["log_types"].get(log_type)
+                if type_code is None:
+                    self._load_lookups(conn)
+                    type_code = self._codes["log_types"].get(log_type)
+                    if type_code is None:
+                        return []
+                filters.append("l.type = ?")
+                params.append(type_code)
+            if since is not None:
+                filters.append("l.ts_ms >= ?")
+                params.append(int(since.timestamp() * 1000))
+            if until is not None:
+                filters.append("l.ts_ms < ?")
+                params.append(int(until.timestamp() * 1000))
+            where = "".join(f" AND {f}" for f in filters)
+            
+            if self.fts_enabled:
+                # Entries keep their own timestamps, so ids do not follow ts_ms; filter and order on ts_ms itself
+                rows = conn.execute(f"""
+                    SELECT l.id, l.ts_ms, l.type, l.action, l.outcome, l.target, l.details, l.probability, l.followback_chance,
+                           snippet(logs_fts, -1, ?, ?, '…', 16)
+                    FROM logs_fts JOIN logs l ON l.id = logs_fts.rowid
+                    WHERE logs_fts MATCH ?{where}
+                    ORDER BY l.ts_ms DESC, l.id DESC LIMIT ?
+                """, [SNIPPET_OPEN, SNIPPET_CLOSE, _fts_query(query, mode), *params, limit]).fetchall()
+            else:
+                pattern = "%" + query.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                rows = conn.execute(f"""
+                    SELECT l.id, l.ts_ms, l.type, l.action, l.outcome, l.target, l.details, l.probability, l.followback_chance, l.details
+                    FROM logs l
+                    WHERE (l.details LIKE ? ESCAPE '\\' OR l.target LIKE ? ESCAPE '\\'){where}
+                    ORDER BY l.ts_ms DESC, l.id DESC LIMIT ?
+                """, [pattern, pattern, *params, limit]).fetchall()
+            
+            return [
+                LogSearchHit(
+                    id=row[0],
+                    ts=datetime.fromtimestamp(row[1] / 1000).isoformat(timespec="milliseconds"),
+                    timestamp=_clock(row[1]),
+                    action=self._name(conn, "log_actions", row[3]),
+                    target=row[5],
+                    details=row[6],
+                    type=self._name(conn, "log_types", row[2]),
+                    outcome=self._name(conn, "log_outcomes", row[4]),
+                    probability=row[7],
+                    followbackChance=row[8],
+                    snippet=row[9]
+                )
+                for row in rows
+            ]
+    
+    @_statement("add_campaign")
     def add_campaign(self, campaign: Campaign) -> str:
         """Add a new campaign"""
         with sqlite3.connect(self.db_path) as conn:
@@ -168,6 +746,7 @@ class DatabaseManager:
             ))
             return campaign.id
     
+    @_statement("get_campaigns")
     def get_campaigns(self) -> List[Campaign]:
         """Get all campaigns"""
         with sqlite3.connect(self.db_path) as conn:
@@ -195,6 +774,122 @@ class DatabaseManager:
                 for row in rows
             ]
     
+    @_statement("save_campaign_state")
+    def save_campaign_state(self, campaigns: List[Dict[str, Any]], targets: List[Dict[str, Any]]):
+        """Upsert a batch of campaign service rows and their targets in one transaction"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                INSERT INTO campaign_state
+                (id, name, persona, target_hashtags, status, phase, created_at, settings, metrics, targets_count, followback_rate, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(id) DO UPDATE SET
+                    name = excluded.name,
+                    persona = excluded.persona,
+                    target_hashtags = excluded.target_hashtags,
+                    status = excluded.status,
+                    phase = excluded.phase,
+                    settings = excluded.settings,
+                    metrics = excluded.metrics,
+                    targets_count = excluded.targets_count,
+                    followback_rate = excluded.followback_rate,
+                    updated_at = CURRENT_TIMESTAMP
+            """, [
+                (
+                    c["id"],
+                    c["name"],
+                    c["persona"],
+                    json.dumps(c["target_hashtags"]),
+                    c["status"],
+                    c["phase"],
+                    c["created_at"],
+                    json.dumps(c["settings"]),
+                    json.dumps(c["metrics"]),
+                    c["targets_count"],
+                    c["followback_rate"]
+                )
+                for c in campaigns
+            ])
+            
+            cursor.executemany("""
+                INSERT INTO campaign_targets
+                (campaign_id, username, followed_at, followed_back, dm_sent, dm_sent_at, engagement_score, tags_matched, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(campaign_id, username) DO UPDATE SET
+                    followed_at = excluded.followed_at,
+                    followed_back = excluded.followed_back,
+                    dm_sent = excluded.dm_sent,
+                    dm_sent_at = excluded.dm_sent_at,
+                    engagement_score = excluded.engagement_score,
+                    tags_matched = excluded.tags_matched,
+                    updated_at = CURRENT_TIMESTAMP
+            """, [
+                (
+                    t["campaign_id"],
+                    t["username"],
+                    t["followed_at"],
+                    t["followed_back"],
+                    t["dm_sent"],
+                    t["dm_sent_at"],
+                    t["engagement_score"],
+                    json.dumps(t["tags_matched"])
+                )
+                for t in targets
+            ])
+    
+    @_statement("get_campaign_states")
+    def get_campaign_states(self) -> List[Dict[str, Any]]:
+        """Get persisted campaign service rows without their targets"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, name, persona, target_hashtags, status, phase, created_at, settings, metrics, targets_count, followback_rate
+                FROM campaign_state ORDER BY created_at
+            """)
+            
+            rows = cursor.fetchall()
+            return [
+                {
+                    "id": row[0],
+                    "name": row[1],
+                    "persona": row[2],
+                    "target_hashtags": json.loads(row[3]),
+                    "status": row[4],
+                    "phase": row[5],
+                    "created_at": row[6],
+                    "settings": json.loads(row[7]),
+                    "metrics": json.loads(row[8]),
+                    "targets_count": row[9],
+                    "followback_rate": row[10]
+                }
+                for row in rows
+            ]
+    
+    @_statement("get_campaign_targets")
+    def get_campaign_targets(self, campaign_id: str) -> List[Dict[str, Any]]:
+        """Get persisted targets for one campaign"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT username, followed_at, followed_back, dm_sent, dm_sent_at, engagement_score, tags_matched
+                FROM campaign_targets WHERE campaign_id = ? ORDER BY rowid
+            """, (campaign_id,))
+            
+            rows = cursor.fetchall()
+            return [
+                {
+                    "username": row[0],
+                    "followed_at": row[1],
+                    "followed_back": None if row[2] is None else bool(row[2]),
+                    "dm_sent": None if row[3] is None else bool(row[3]),
+                    "dm_sent_at": row[4],
+                    "engagement_score": row[5],
+                    "tags_matched": json.loads(row[6])
+                }
+                for row in rows
+            ]
+    
+    @_statement("add_target")
     def add_target(self, target: Target) -> int:
         """Add a new target"""
         with sqlite3.connect(self.db_path) as conn:
@@ -219,6 +914,7 @@ class DatabaseManager:
             ))
             return cursor.lastrowid
     
+    @_statement("get_targets")
     def get_targets(self) -> List[Target]:
         """Get all targets"""
         with sqlite3.connect(self.db_path) as conn:
@@ -247,6 +943,42 @@ class DatabaseManager:
                 for row in rows
             ]
     
+    def export_rows(self, dataset: str, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                    log_type: Optional[str] = None, chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[List[tuple]]:
+        """Yield a dataset's rows in chunks from one cursor, oldest first.
+
+        The cursor reads a single WAL snapshot, so writers carry on while the
+        export runs and memory stays at one chunk. The connection is not tied
+        to its creating thread because streaming responses advance the
+        generator from a thread pool.
+        """
+        columns, query, _, time_column = EXPORTS[dataset]
+        filters = []
+        params: List[Any] = []
+        if time_column is not None:
+            if since is not None:
+                filters.append(f"{time_column} >= ?")
+                params.append(int(since.timestamp() * 1000))
+            if until is not None:
+                filters.append(f"{time_column} < ?")
+                params.append(int(until.timestamp() * 1000))
+        if dataset == "logs" and log_type:
+            filters.append("t.name = ?")
+            params.append(log_type)
+        where = f" WHERE {' AND '.join(filters)}" if filters else ""
+        
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        try:
+            cursor = conn.execute(f"{query}{where} ORDER BY 1", params)
+            while True:
+                rows = cursor.fetchmany(chunk_rows)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            conn.close()
+    
+    @_statement("add_command")
     def add_command(self, command: Command) -> int:
         """Add a new command"""
         with sqlite3.connect(self.db_path) as conn:
@@ -262,6 +994,7 @@ class DatabaseManager:
             ))
             return cursor.lastrowid
     
+    @_statement("get_commands")
     def get_commands(self, limit: int = 50) -> List[Command]:
         """Get recent commands"""
         with sqlite3.connect(self.db_path) as conn:
@@ -1,12 +1,19 @@
 import logging
-import traceback
 from typing import Any, Dict, Optional
 from fastapi import HTTPException, Request
 from fastapi.responses import JSONResponse
 from datetime import datetime
+from backend.logging_config import request_id_var
 
 logger = logging.getLogger(__name__)
 
+def _request_id(request: Request) -> Optional[str]:
+    """The id assigned by the request middleware (request.state also reaches the 500 handler)"""
+    return getattr(request.state, "request_id", None) or request_id_var.get()
+
+def _request_id_headers(request_id: Optional[str]) -> Optional[Dict[str, str]]:
+    return {"X-Request-ID": request_id} if request_id else None
+
 class SocialCommanderException(Exception):
     """Base exception for Social Commander application"""
     def __init__(self, message: str, error_code: str = "GENERAL_ERROR", details: Optional[Dict[str, Any]] = None):
@@ -30,6 +37,12 @@ class LLMException(SocialCommanderException):
     def __init__(self, message: str = "LLM service error", details: Optional[Dict[str, Any]] = None):
         super().__init__(message, "LLM_ERROR", details)
 
+class LLMNotReadyException(LLMException):
+    """Raised when a request arrives before the LLM model is ready"""
+    def __init__(self, message: str = "LLM model not ready", details: Optional[Dict[str, Any]] = None):
+        super().__init__(message, details)
+        self.error_code = "LLM_NOT_READY"
+
 class QueueException(SocialCommanderException):
     """Queue service related errors"""
     def __init__(self, message: str = "Queue service error", details: Optional[Dict[str, Any]] = None):
@@ -37,7 +50,11 @@ class QueueException(SocialCommanderException):
 
 async def social_commander_exception_handler(request: Request, exc: SocialCommanderException):
     """Handle custom Social Commander exceptions"""
-    logger.error(f"Social Commander Error: {exc.error_code} - {exc.message}", extra={"details": exc.details})
+    request_id = _request_id(request)
+    logger.error(f"Social Commander Error: {exc.error_code} - {exc.message}", extra={
+        "details": exc.details,
+        "request_id": request_id
+    })
     
     return JSONResponse(
         status_code=400,
@@ -46,18 +63,21 @@ async def social_commander_exception_handler(request: Request, exc: SocialComman
             "error_code": exc.error_code,
             "message": exc.message,
             "details": exc.details,
+            "request_id": request_id,
             "timestamp": datetime.now().isoformat()
-        }
+        },
+        headers=_request_id_headers(request_id)
     )
 
 async def general_exception_handler(request: Request, exc: Exception):
     """Handle general exceptions"""
     error_id = f"error_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    request_id = _request_id(request)
     
-    logger.error(f"Unhandled exception [{error_id}]: {str(exc)}", extra={
-        "traceback": traceback.format_exc(),
+    logger.error(f"Unhandled exception [{error_id}]: {str(exc)}", exc_info=exc, extra={
         "request_url": str(request.url),
-        "request_method": request.method
+        "request_method": request.method,
+        "request_id": request_id
     })
     
     return JSONResponse(
@@ -67,8 +87,10 @@ async def general_exception_handler(request: Request, exc: Exception):
             "error_code": "INTERNAL_SERVER_ERROR",
             "message": "An internal server error occurred",
             "error_id": error_id,
+            "request_id": request_id,
             "timestamp": datetime.now().isoformat()
-        }
+        },
+        headers=_request_id_headers(request_id)
     )
 
 def setup_error_handling(app):
@@ -0,0 +1,169 @@
+import copy
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+import traceback
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+from backend.config.settings import settings
+from backend.metrics import registry
+from backend.tracing import current_context
+
+LOG_RECORDS_DROPPED = registry.counter(
+    "log_records_dropped", "Log records discarded because the log queue was full"
+)
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else on a record came from `extra=`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id", "trace_id", "span_id"}
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the request id and trace ids of the emitting context.
+
+    Runs on the QueueHandler, in the thread that logged, because context
+    variables do not follow a record to the listener thread.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = request_id_var.get()
+        context = current_context()
+        record.trace_id = context.trace_id if context else None
+        record.span_id = context.span_id if context else None
+        return True
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line with the message, context ids and any `extra=` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "trace_id": getattr(record, "trace_id", None),
+            "span_id": getattr(record, "span_id", None),
+            "thread": record.threadName
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = "".join(traceback.format_exception(*record.exc_info))
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks the caller: when the queue is full the record is dropped and counted"""
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Merge args and render the traceback now, keeping them apart so formatters can place them"""
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info))
+            record.exc_info = None
+        return record
+
+def _gzip_rotator(source: str, dest: str):
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+class CompressingRotatingFileHandler(RotatingFileHandler):
+    """Rotates on size or on a fixed interval, gzip-compressing each backup (app.log.1.gz, ...)"""
+
+    def __init__(self, filename: str, max_bytes: int, backup_count: int, interval_seconds: int = 0):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.interval_seconds = interval_seconds
+        self.namer = lambda name: name + ".gz"
+        self.rotator = _gzip_rotator
+        self.rollover_at = self._next_rollover(time.time())
+
+    def _next_rollover(self, now: float) -> float:
+        if not self.interval_seconds:
+            return float("inf")
+        return (int(now) // self.interval_seconds + 1) * self.interval_seconds
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        now = time.time()
+        if now >= self.rollover_at:
+            self.rollover_at = self._next_rollover(now)
+            if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+                return True
+        return bool(super().shouldRollover(record))
+
+class LoggingRuntime:
+    """Owns the queue listener so shutdown can flush it"""
+
+    def __init__(self, listener: QueueListener, queue_handler: QueueHandler):
+        self.listener = listener
+        self.queue_handler = queue_handler
+        self._lock = threading.Lock()
+        self._stopped = False
+
+    def stop(self):
+        """Flush queued records and close the file handlers"""
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+        logging.getLogger().removeHandler(self.queue_handler)
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+
+def configure_logging() -> LoggingRuntime:
+    """Route application logging through a queue to a rotated JSON file written by a listener thread.
+
+    Uvicorn's loggers do not propagate to the root logger, so its access and
+    error output keeps its own console handlers and never reaches the app log.
+    """
+    handlers = []
+    if settings.log_file:
+        os.makedirs(os.path.dirname(os.path.abspath(settings.log_file)), exist_ok=True)
+        file_handler = CompressingRotatingFileHandler(
+            settings.log_file,
+            max_bytes=settings.log_max_bytes,
+            backup_count=settings.log_backup_count,
+            interval_seconds=settings.log_rotate_hours * 3600
+        )
+        file_handler.setFormatter(JSONFormatter())
+        handlers.append(file_handler)
+    if settings.log_console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+        ))
+        handlers.append(console_handler)
+
+    queue_handler = DroppingQueueHandler(queue.Queue(settings.log_queue_size))
+    queue_handler.addFilter(RequestContextFilter())
+    listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(settings.log_level.upper())
+
+    listener.start()
+    return LoggingRuntime(listener, queue_handler)
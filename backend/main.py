@@ -1,11 +1,10 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
-import uvicorn
 import asyncio
 import os
-import logging
+import uuid
 
 from backend.database.sqlite_db import DatabaseManager, init_database
 from backend.services.logging_service import LoggingService
@@ -14,20 +13,18 @@ from backend.services.queue_service import QueueService, TaskType
 from backend.services.llm_service import LLMService, StanleyAI
 from backend.services.campaign_service import CampaignService
 from backend.services.profile_mirror_service import ProfileMirrorService
+from backend.services.analytics_service import AnalyticsService
 from backend.config.settings import settings
 from backend.routes import auth_router, instagram_router, logs_router, llm_router, status_router
 from backend.routes.campaigns import router as campaigns_router
 from backend.routes.captcha import router as captcha_router
+from backend.routes.export import router as export_router
+from backend.routes.analytics import router as analytics_router
+from backend.routes.debug import router as debug_router
 from backend.error_handling import setup_error_handling
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('/tmp/social_commander.log'),
-        logging.StreamHandler()
-    ]
-)
+from backend.tracing import SpanContext, SPAN_KIND_SERVER, configure_tracing, tracer
+from backend.profiling import LoopLagMonitor
+from backend.logging_config import configure_logging, request_id_var
 
 db_manager = None
 logging_service = None
@@ -37,10 +34,15 @@ llm_service = None
 stanley_ai = None
 campaign_service = None
 profile_mirror_service = None
+analytics_service = None
+loop_lag_monitor = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global db_manager, logging_service, instagram_service, queue_service, llm_service, stanley_ai, campaign_service, profile_mirror_service
+    global db_manager, logging_service, instagram_service, queue_service, llm_service, stanley_ai, campaign_service, profile_mirror_service, analytics_service, loop_lag_monitor
+    
+    log_runtime = configure_logging()
+    configure_tracing()
     
     db_manager = init_database(settings.database_url)
     
@@ -58,7 +60,7 @@ async def lifespan(app: FastAPI):
     set_stanley_ai(stanley_ai)
     
     profile_mirror_service = ProfileMirrorService(logging_service, instagram_service)
-    campaign_service = CampaignService(logging_service, llm_service, instagram_service, queue_service)
+    campaign_service = CampaignService(logging_service, llm_service, instagram_service, queue_service, db_manager)
     
     queue_service.register_handler(TaskType.SCAN, instagram_service.scan_hashtag)
     queue_service.register_handler(TaskType.FOLLOW, instagram_service.follow_user)
@@ -67,7 +69,33 @@ async def lifespan(app: FastAPI):
     
     await logging_service.log_system_message("Social Commander Backend starting up...")
     
-    asyncio.create_task(llm_service.initialize())
+    if db_manager.migration_report:
+        report = db_manager.migration_report
+        size = report["size_bytes"]
+        query = report["query_ms"]["latest_100"]
+        if size["after"]["tables"] is None:
+            storage = f"file {size['before']['file_used']:,} -> {size['after']['file_used']:,} bytes"
+        else:
+            storage = (
+                f"log tables {size['before']['tables']:,} -> {size['after']['tables']:,} bytes, "
+                f"indexes {size['before']['indexes']:,} -> {size['after']['indexes']:,} bytes"
+            )
+        await logging_service.log_system_message(
+            f"Migrated {report['rows']:,} log rows to schema v2 in {report['seconds']:.1f}s: "
+            f"{storage}, latest-100 query {query['before']:.2f} -> {query['after']:.2f} ms"
+        )
+    
+    if settings.loop_lag_threshold_ms > 0:
+        loop_lag_monitor = LoopLagMonitor(logging_service, settings.loop_lag_threshold_ms / 1000)
+        loop_lag_monitor.start()
+    
+    if settings.llm_preload:
+        llm_service.start_loading()
+    
+    await campaign_service.start()
+    
+    analytics_service = AnalyticsService(logging_service, settings.database_url)
+    await analytics_service.start()
     
     asyncio.create_task(queue_service.start_processing())
     
@@ -76,8 +104,15 @@ async def lifespan(app: FastAPI):
     yield
     
     await logging_service.log_system_message("Social Commander Backend shutting down...")
+    if loop_lag_monitor:
+        await loop_lag_monitor.stop()
     await queue_service.stop_processing()
+    await campaign_service.stop()
+    await analytics_service.stop()
+    await llm_service.shutdown()
     await instagram_service.close()
+    tracer.shutdown()
+    log_runtime.stop()
 
 app = FastAPI(
     title="Social Commander Backend", 
@@ -96,6 +131,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Tag the request with an id for logs and open a server span, continuing an incoming W3C traceparent"""
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex[:16]
+    request.state.request_id = request_id
+    token = request_id_var.set(request_id)
+    try:
+        with tracer.start_span(
+            f"{request.method} {request.url.path}",
+            {"http.method": request.method, "http.target": request.url.path, "http.request_id": request_id},
+            parent=SpanContext.from_traceparent(request.headers.get("traceparent")),
+            kind=SPAN_KIND_SERVER
+        ) as span:
+            response = await call_next(request)
+            span.set_attribute("http.status_code", response.status_code)
+            if span.context is not None:
+                response.headers["traceparent"] = span.context.to_traceparent()
+            response.headers["X-Request-ID"] = request_id
+            return response
+    finally:
+        request_id_var.reset(token)
+
 app.mount("/static", StaticFiles(directory="/tmp/static"), name="static")
 
 def get_db_manager():
@@ -122,6 +179,9 @@ def get_campaign_service():
 def get_profile_mirror_service():
     return profile_mirror_service
 
+def get_analytics_service():
+    return analytics_service
+
 from fastapi import Depends
 
 def get_dependencies():
@@ -133,7 +193,8 @@ def get_dependencies():
         "llm_service": llm_service,
         "stanley_ai": stanley_ai,
         "campaign_service": campaign_service,
-        "profile_mirror_service": profile_mirror_service
+        "profile_mirror_service": profile_mirror_service,
+        "analytics_service": analytics_service
     }
 
 
@@ -144,6 +205,11 @@ app.include_router(llm_router)
 app.include_router(status_router)
 app.include_router(campaigns_router)
 app.include_router(captcha_router)
+app.include_router(export_router)
+app.include_router(analytics_router)
+
+if settings.debug_routes_enabled:
+    app.include_router(debug_router)
 
 @app.get("/")
 async def root():
@@ -167,4 +233,6 @@ async def health_check():
     return {"status": "healthy", "service": "social-commander-backend"}
 
 if __name__ == "__main__":
+    import uvicorn
+    
     uvicorn.run(app, host=settings.api_host, port=settings.api_port, reload=settings.debug)
@@ -1,4 +1,4 @@
-from .log_entry import LogEntry
+from .log_entry import LogEntry, LogSearchHit
 from .command import Command
 from .campaign import Campaign
 from .target import Target
@@ -11,6 +11,7 @@ from .performance import PerformanceMetric
 
 __all__ = [
     "LogEntry",
+    "LogSearchHit",
     "Command", 
     "Campaign",
     "Target",
@@ -16,3 +16,8 @@ class LogEntry(BaseModel):
         json_encoders = {
             datetime: lambda v: v.isoformat()
         }
+
+class LogSearchHit(LogEntry):
+    id: int
+    ts: str
+    snippet: str
@@ -0,0 +1,243 @@
+import asyncio
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+from backend.metrics import registry
+
+LOOP_LAG_SECONDS = registry.histogram(
+    "event_loop_lag_seconds", "How late the event loop heartbeat ran",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+LOOP_STALLS = registry.counter("event_loop_stalls", "Heartbeats delayed beyond the loop lag threshold")
+
+_COROUTINE_FLAGS = inspect.CO_COROUTINE | inspect.CO_ASYNC_GENERATOR
+
+FrameKey = Tuple[str, str, int]
+
+def _frame_key(frame) -> FrameKey:
+    code = frame.f_code
+    return (code.co_name, code.co_filename, code.co_firstlineno)
+
+def _short_path(filename: str) -> str:
+    """Trim site-packages and working-directory prefixes from a source path"""
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    cwd = os.getcwd() + os.sep
+    return filename[len(cwd):] if filename.startswith(cwd) else filename
+
+def _frame_label(key: FrameKey) -> str:
+    name, filename, line = key
+    return f"{name} ({_short_path(filename)}:{line})"
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile is requested while another one is running"""
+
+class SamplingProfiler:
+    """Samples every thread's Python stack at a fixed interval using sys._current_frames"""
+
+    _lock = threading.Lock()
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 128):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Dict[str, Counter] = {}
+        self.samples = 0
+        self.duration = 0.0
+
+    def run(self, seconds: float) -> "SamplingProfiler":
+        """Sample for the given number of seconds; blocks the calling thread"""
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already running")
+        try:
+            own_thread = threading.get_ident()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            started = time.perf_counter()
+            deadline = started + seconds
+            next_sample = started
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                if now < next_sample:
+                    time.sleep(next_sample - now)
+                next_sample += self.interval
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_thread:
+                        continue
+                    name = names.get(thread_id)
+                    if name is None:
+                        names = {thread.ident: thread.name for thread in threading.enumerate()}
+                        name = names.get(thread_id, f"thread-{thread_id}")
+                    self.stacks.setdefault(name, Counter())[self._stack(frame)] += 1
+                self.samples += 1
+            self.duration = time.perf_counter() - started
+            return self
+        finally:
+            self._lock.release()
+
+    def _stack(self, frame) -> Tuple[FrameKey, ...]:
+        """Root-first tuple of frame keys"""
+        keys = []
+        while frame is not None and len(keys) < self.max_depth:
+            keys.append(_frame_key(frame))
+            frame = frame.f_back
+        keys.reverse()
+        return tuple(keys)
+
+    def collapsed(self) -> str:
+        """Brendan Gregg collapsed-stack format, one 'thread;frame;frame count' line per stack"""
+        lines = []
+        for thread_name, stacks in sorted(self.stacks.items()):
+            for stack, count in stacks.most_common():
+                frames = ";".join(_frame_label(key).replace(";", ":") for key in stack)
+                lines.append(f"{thread_name};{frames} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str = "social-commander-backend") -> Dict[str, Any]:
+        """Speedscope sampled-profile JSON with one profile per thread"""
+        frames: List[Dict[str, Any]] = []
+        frame_index: Dict[FrameKey, int] = {}
+        profiles = []
+        for thread_name, stacks in sorted(self.stacks.items()):
+            samples = []
+            weights = []
+            for stack, count in stacks.most_common():
+                indexes = []
+                for key in stack:
+                    index = frame_index.get(key)
+                    if index is None:
+                        index = frame_index[key] = len(frames)
+                        frames.append({"name": key[0], "file": _short_path(key[1]), "line": key[2]})
+                    indexes.append(index)
+                samples.append(indexes)
+                weights.append(count * self.interval)
+            profiles.append({
+                "type": "sampled",
+                "name": thread_name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 6),
+                "samples": samples,
+                "weights": weights
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": name,
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles
+        }
+
+def describe_blocking_frame(frame) -> Dict[str, Any]:
+    """Name the coroutine running in a stalled loop thread and where it is"""
+    stack = []
+    innermost_coroutine = None
+    task_coroutine = None
+    while frame is not None:
+        key = _frame_key(frame)
+        stack.append(f"{_frame_label(key)} line {frame.f_lineno}")
+        if frame.f_code.co_flags & _COROUTINE_FLAGS:
+            if innermost_coroutine is None:
+                name = getattr(frame.f_code, "co_qualname", key[0])
+                innermost_coroutine = f"{name} ({_short_path(key[1])}:{frame.f_lineno})"
+            task_coroutine = frame.f_code.co_name
+        frame = frame.f_back
+    return {
+        "coroutine": innermost_coroutine or "<no coroutine: loop callback or I/O>",
+        "task": task_coroutine,
+        "stack": stack[:12]
+    }
+
+class LoopLagMonitor:
+    """Detects event-loop stalls with a heartbeat coroutine and a watchdog thread"""
+
+    def __init__(self, logging_service, threshold: float, interval: float = 0.1):
+        self.logging_service = logging_service
+        self.threshold = threshold
+        self.interval = interval
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread_id: Optional[int] = None
+        self.last_beat = time.monotonic()
+        self.blocked: Optional[Dict[str, Any]] = None
+        self.stall_count = 0
+        self.max_lag = 0.0
+        self.last_stall: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the heartbeat on the running loop and the watchdog thread"""
+        if self._task is not None:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.last_beat = now
+            lag = now - expected
+            LOOP_LAG_SECONDS.observe(max(0.0, lag))
+            if lag >= self.threshold:
+                await self._report(lag)
+            else:
+                self.blocked = None
+
+    async def _report(self, lag: float):
+        """Log a stall using what the watchdog saw while the loop was blocked"""
+        blocked, self.blocked = self.blocked, None
+        blocked = blocked or {"coroutine": "<unknown: stall ended before the watchdog sampled it>", "task": None, "stack": []}
+        self.stall_count += 1
+        self.max_lag = max(self.max_lag, lag)
+        self.last_stall = {"lag_ms": round(lag * 1000), "at": time.time(), **blocked}
+        LOOP_STALLS.inc()
+        where = blocked["coroutine"]
+        if blocked["task"] and not where.startswith(blocked["task"]):
+            where += f" in task {blocked['task']}"
+        await self.logging_service.log_system_message(
+            f"Event loop blocked for {lag * 1000:.0f}ms by {where}", "warning"
+        )
+
+    def _watch(self):
+        """Capture the loop thread's stack once per stall while it is still blocked"""
+        captured_beat = None
+        while not self._stop.wait(self.interval):
+            beat = self.last_beat
+            if time.monotonic() - beat < self.threshold or captured_beat == beat:
+                continue
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is not None:
+                self.blocked = describe_blocking_frame(frame)
+                captured_beat = beat
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "threshold_ms": round(self.threshold * 1000),
+            "stall_count": self.stall_count,
+            "max_lag_ms": round(self.max_lag * 1000),
+            "last_stall": self.last_stall
+        }
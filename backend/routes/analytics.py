@@ -0,0 +1,52 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Any, Dict, Optional
+from backend.services.analytics_service import AnalyticsUnavailableError
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+async def _report(name: str, **params) -> Dict[str, Any]:
+    from backend.main import analytics_service
+    
+    if analytics_service is None:
+        raise HTTPException(status_code=503, detail="Analytics service not initialized")
+    try:
+        return await analytics_service.report(name, **params)
+    except AnalyticsUnavailableError as e:
+        raise HTTPException(status_code=503, detail=e.message)
+
+@router.get("/status")
+async def get_analytics_status() -> Dict[str, Any]:
+    """Archive freshness, engine and cache state"""
+    from backend.main import analytics_service
+    
+    if analytics_service is None:
+        return {"available": False}
+    return analytics_service.get_status()
+
+@router.post("/archive")
+async def run_archive() -> Dict[str, Any]:
+    """Copy log rows written since the last archive run into the Parquet archive now"""
+    from backend.main import analytics_service
+    
+    if analytics_service is None:
+        raise HTTPException(status_code=503, detail="Analytics service not initialized")
+    try:
+        rows = await analytics_service.archive()
+    except AnalyticsUnavailableError as e:
+        raise HTTPException(status_code=503, detail=e.message)
+    return {"success": True, "archived_rows": rows, **analytics_service.get_status()}
+
+@router.get("/reports/weekly-outcomes")
+async def weekly_outcomes(weeks: int = Query(8, ge=1, le=104), log_type: Optional[str] = None) -> Dict[str, Any]:
+    """Outcome counts and success rate per week and log type, with the week-over-week change"""
+    return await _report("weekly_outcomes", weeks=weeks, log_type=log_type)
+
+@router.get("/reports/error-trends")
+async def error_trends(days: int = Query(30, ge=1, le=730), top: int = Query(10, ge=1, le=100)) -> Dict[str, Any]:
+    """Daily error counts and the most frequent error messages over time"""
+    return await _report("error_trends", days=days, top=top)
+
+@router.get("/reports/activity-heatmap")
+async def activity_heatmap(days: int = Query(28, ge=1, le=365)) -> Dict[str, Any]:
+    """Entry and error counts by weekday and hour of day (UTC)"""
+    return await _report("activity_heatmap", days=days)
@@ -1,8 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse, JSONResponse, Response
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from backend.services.campaign_service import CampaignService
+from backend.services.target_store import TARGET_STATUSES
+from backend.error_handling import LLMNotReadyException
 from datetime import datetime
+import json
 
 router = APIRouter(prefix="/campaigns", tags=["campaigns"])
 
@@ -15,10 +19,23 @@ class CreateCampaignRequest(BaseModel):
 class CampaignActionRequest(BaseModel):
     campaign_id: str
 
+def get_campaign_service() -> CampaignService:
+    from backend.main import campaign_service
+    if campaign_service is None:
+        raise HTTPException(status_code=503, detail="Campaign service not initialized")
+    return campaign_service
+
+def _not_modified(request: Request, etag: str) -> bool:
+    """Whether the client's If-None-Match already matches the current ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+
 @router.post("/create")
 async def create_campaign(
     request: CreateCampaignRequest,
-    campaign_service = Depends()
+    campaign_service: CampaignService = Depends(get_campaign_service)
 ):
     """Create a new campaign"""
     try:
@@ -39,27 +56,65 @@ async def create_campaign(
         raise HTTPException(status_code=500, detail=f"Campaign creation error: {str(e)}")
 
 @router.get("/list")
-async def list_campaigns(campaign_service = Depends()):
+async def list_campaigns(request: Request, campaign_service: CampaignService = Depends(get_campaign_service)):
     """Get all campaigns"""
     try:
+        etag = campaign_service.get_campaigns_etag()
+        if _not_modified(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
         campaigns = campaign_service.get_all_campaigns()
-        return {"campaigns": campaigns}
+        return JSONResponse({"campaigns": campaigns}, headers={"ETag": etag})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Campaign list error: {str(e)}")
 
 @router.get("/{campaign_id}")
-async def get_campaign(campaign_id: str, campaign_service = Depends()):
+async def get_campaign(campaign_id: str, request: Request, campaign_service: CampaignService = Depends(get_campaign_service)):
     """Get specific campaign details"""
+    etag = campaign_service.get_campaign_etag(campaign_id)
+    if etag is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    
     try:
+        if _not_modified(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
         campaign = campaign_service.get_campaign(campaign_id)
-        if not campaign:
-            raise HTTPException(status_code=404, detail="Campaign not found")
-        return campaign
+        return JSONResponse(campaign, headers={"ETag": etag})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Campaign get error: {str(e)}")
 
+@router.get("/{campaign_id}/targets")
+async def get_campaign_targets(
+    campaign_id: str,
+    request: Request,
+    offset: int = 0,
+    limit: int = 50,
+    status: Optional[str] = None,
+    campaign_service: CampaignService = Depends(get_campaign_service)
+):
+    """Get one page of a campaign's targets"""
+    if status is not None and status not in TARGET_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Unknown target status: {status}")
+    limit = max(1, min(limit, 500))
+    offset = max(0, offset)
+    
+    etag = campaign_service.get_campaign_etag(campaign_id)
+    if etag is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    etag = f'{etag[:-1]}-{offset}-{limit}-{status}"'
+    
+    try:
+        if _not_modified(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        page = await campaign_service.get_campaign_targets(campaign_id, offset, limit, status)
+        return JSONResponse(page, headers={"ETag": etag})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Campaign targets error: {str(e)}")
+
 @router.post("/{campaign_id}/pause")
-async def pause_campaign(campaign_id: str, campaign_service = Depends()):
+async def pause_campaign(campaign_id: str, campaign_service: CampaignService = Depends(get_campaign_service)):
     """Pause a campaign"""
     try:
         success = await campaign_service.pause_campaign(campaign_id)
@@ -75,7 +130,7 @@ async def pause_campaign(campaign_id: str, campaign_service = Depends()):
         raise HTTPException(status_code=500, detail=f"Campaign pause error: {str(e)}")
 
 @router.post("/{campaign_id}/resume")
-async def resume_campaign(campaign_id: str, campaign_service = Depends()):
+async def resume_campaign(campaign_id: str, campaign_service: CampaignService = Depends(get_campaign_service)):
     """Resume a paused campaign"""
     try:
         success = await campaign_service.resume_campaign(campaign_id)
@@ -91,7 +146,7 @@ async def resume_campaign(campaign_id: str, campaign_service = Depends()):
         raise HTTPException(status_code=500, detail=f"Campaign resume error: {str(e)}")
 
 @router.post("/{campaign_id}/archive")
-async def archive_campaign(campaign_id: str, campaign_service = Depends()):
+async def archive_campaign(campaign_id: str, campaign_service: CampaignService = Depends(get_campaign_service)):
     """Archive a campaign"""
     try:
         success = await campaign_service.archive_campaign(campaign_id)
@@ -107,16 +162,30 @@ async def archive_campaign(campaign_id: str, campaign_service = Depends()):
         raise HTTPException(status_code=500, detail=f"Campaign archive error: {str(e)}")
 
 @router.get("/{campaign_id}/insights")
-async def get_campaign_insights(campaign_id: str, campaign_service = Depends()):
+async def get_campaign_insights(campaign_id: str, campaign_service: CampaignService = Depends(get_campaign_service)):
     """Get LLM-powered insights for a campaign"""
     try:
         insights = await campaign_service.get_campaign_insights(campaign_id)
         return insights
+    except LLMNotReadyException as e:
+        raise HTTPException(status_code=503, detail=e.message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Campaign insights error: {str(e)}")
 
+@router.get("/{campaign_id}/insights/stream")
+async def stream_campaign_insights(campaign_id: str, campaign_service: CampaignService = Depends(get_campaign_service)):
+    """Stream insight sections as NDJSON lines as soon as each one completes"""
+    if campaign_id not in campaign_service.campaigns:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    
+    async def section_lines():
+        async for section in campaign_service.iter_campaign_insights(campaign_id):
+            yield json.dumps(section, default=str) + "\n"
+    
+    return StreamingResponse(section_lines(), media_type="application/x-ndjson")
+
 @router.get("/{campaign_id}/metrics")
-async def get_campaign_metrics(campaign_id: str, campaign_service = Depends()):
+async def get_campaign_metrics(campaign_id: str, campaign_service: CampaignService = Depends(get_campaign_service)):
     """Get campaign performance metrics"""
     try:
         campaign = campaign_service.get_campaign(campaign_id)
@@ -0,0 +1,104 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel
+from typing import Dict, Any, Optional
+from backend.tracing import tracer, InMemoryExporter
+from backend.profiling import SamplingProfiler, ProfilerBusyError
+from backend.config.settings import settings
+from backend.models import LogEntry
+from datetime import datetime
+import asyncio
+import random
+import time
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+class SimulateLogsRequest(BaseModel):
+    count: int = 100
+    log_type: Optional[str] = None
+    tag: str = "bench"
+
+def _trace_buffer() -> InMemoryExporter:
+    exporter = tracer.get_exporter(InMemoryExporter)
+    if exporter is None:
+        raise HTTPException(status_code=404, detail="In-memory trace exporter is not enabled")
+    return exporter
+
+@router.get("/traces")
+async def get_recent_traces(limit: int = 50) -> Dict[str, Any]:
+    """Summaries of the most recent sampled traces"""
+    exporter = _trace_buffer()
+    return {
+        "sample_rate": settings.trace_sample_rate,
+        "traces": exporter.recent(max(1, min(limit, exporter.max_traces)))
+    }
+
+@router.get("/traces/{trace_id}")
+async def get_trace(trace_id: str) -> Dict[str, Any]:
+    """All spans of one trace"""
+    spans = _trace_buffer().get(trace_id)
+    if spans is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return {"trace_id": trace_id, "spans": spans}
+
+@router.get("/profile")
+async def profile(seconds: float = 10.0, format: str = "collapsed", interval_ms: float = 5.0):
+    """Sample every thread's stack for a few seconds and return a collapsed-stack or speedscope file"""
+    if format not in ("collapsed", "speedscope"):
+        raise HTTPException(status_code=400, detail="format must be 'collapsed' or 'speedscope'")
+    seconds = max(0.1, min(seconds, settings.profile_max_seconds))
+    profiler = SamplingProfiler(interval=max(1.0, interval_ms) / 1000)
+    
+    try:
+        await asyncio.get_event_loop().run_in_executor(None, profiler.run, seconds)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    filename = f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    headers = {"X-Profile-Samples": str(profiler.samples)}
+    if format == "speedscope":
+        headers["Content-Disposition"] = f'attachment; filename="{filename}.speedscope.json"'
+        return JSONResponse(profiler.speedscope(), headers=headers)
+    headers["Content-Disposition"] = f'attachment; filename="{filename}.collapsed.txt"'
+    return PlainTextResponse(profiler.collapsed(), headers=headers)
+
+@router.get("/loop-lag")
+async def get_loop_lag() -> Dict[str, Any]:
+    """Event-loop stall statistics from the lag monitor"""
+    from backend.main import loop_lag_monitor
+    
+    if loop_lag_monitor is None:
+        return {"enabled": False}
+    return {"enabled": True, **loop_lag_monitor.get_status()}
+
+_SIMULATED_ACTIONS = [
+    ("follow", "follow"), ("dm", "send_dm"), ("scan", "scan_hashtag"),
+    ("engage", "like_post"), ("story", "view_story"), ("system", "system")
+]
+
+@router.post("/simulate/logs")
+async def simulate_logs(request: SimulateLogsRequest) -> Dict[str, Any]:
+    """Write a burst of synthetic log entries through LoggingService (simulate mode only)"""
+    from backend.main import logging_service
+    
+    if not settings.simulate:
+        raise HTTPException(status_code=403, detail="Synthetic logs are only available in simulate mode")
+    if logging_service is None:
+        raise HTTPException(status_code=503, detail="Logging service not initialized")
+    
+    count = max(1, min(request.count, 10000))
+    actions = [pair for pair in _SIMULATED_ACTIONS if pair[0] == request.log_type] or _SIMULATED_ACTIONS
+    started = time.perf_counter()
+    for seq in range(count):
+        log_type, action = random.choice(actions)
+        await logging_service.log_action(LogEntry(
+            timestamp=datetime.now().strftime("%H:%M:%S"),
+            action=action,
+            target=f"sim_user_{random.randint(1, 100000)}",
+            details=f"{request.tag} {seq} {time.time():.6f}",
+            type=log_type,
+            outcome="success" if random.random() < 0.9 else "error"
+        ))
+    elapsed = time.perf_counter() - started
+    
+    return {"count": count, "elapsed_ms": round(elapsed * 1000, 3)}
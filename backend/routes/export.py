@@ -0,0 +1,100 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import Iterable, Iterator, List, Optional
+from datetime import datetime
+import csv
+import io
+import json
+import zlib
+from backend.database.sqlite_db import EXPORTS
+from backend.metrics import registry
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+EXPORT_ROWS = registry.counter("export_rows", "Rows streamed by the export endpoints", ["dataset", "format"])
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# json.dumps builds a new encoder per call when given options; reuse one across rows
+_encode_json = json.JSONEncoder(ensure_ascii=False, default=str).encode
+
+def _ndjson_lines(dataset: str, chunks: Iterable[List[tuple]]) -> Iterator[str]:
+    columns, _, json_columns, _ = EXPORTS[dataset]
+    json_indexes = [columns.index(name) for name in json_columns]
+    for rows in chunks:
+        lines = []
+        for row in rows:
+            record = dict(zip(columns, row))
+            for index in json_indexes:
+                if row[index] is not None:
+                    record[columns[index]] = json.loads(row[index])
+            lines.append(_encode_json(record))
+        EXPORT_ROWS.labels(dataset, "ndjson").inc(len(rows))
+        yield "\n".join(lines) + "\n"
+
+def _csv_lines(dataset: str, chunks: Iterable[List[tuple]]) -> Iterator[str]:
+    columns = EXPORTS[dataset][0]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in chunks:
+        writer.writerows(rows)
+        EXPORT_ROWS.labels(dataset, "csv").inc(len(rows))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def _encode(text_chunks: Iterable[str], compress: bool) -> Iterator[bytes]:
+    """UTF-8 encode each chunk, gzip-compressing on the fly when asked"""
+    if not compress:
+        for text in text_chunks:
+            yield text.encode("utf-8")
+        return
+    # Level 1: about 15% larger than the default level but keeps compression from dominating export time
+    compressor = zlib.compressobj(1, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for text in text_chunks:
+        data = compressor.compress(text.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+def _export_response(dataset: str, format: str, compress: bool, **filters) -> StreamingResponse:
+    from backend.main import db_manager
+
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+    if db_manager is None:
+        raise HTTPException(status_code=503, detail="Database not initialized")
+
+    chunks = db_manager.export_rows(dataset, **filters)
+    lines = _csv_lines(dataset, chunks) if format == "csv" else _ndjson_lines(dataset, chunks)
+    filename = f"{dataset}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{format}" + (".gz" if compress else "")
+    # A plain generator, so Starlette advances it (and the SQLite cursor) in its thread pool, off the event loop
+    return StreamingResponse(
+        _encode(lines, compress),
+        media_type="application/gzip" if compress else FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/logs")
+async def export_logs(
+    format: str = "ndjson",
+    gzip: bool = True,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    log_type: Optional[str] = None
+):
+    """Stream all log entries, oldest first, optionally limited to a time range and type"""
+    return _export_response("logs", format, gzip, since=since, until=until, log_type=log_type)
+
+@router.get("/commands")
+async def export_commands(format: str = "ndjson", gzip: bool = True):
+    """Stream the command history"""
+    return _export_response("commands", format, gzip)
+
+@router.get("/campaigns")
+async def export_campaigns(format: str = "ndjson", gzip: bool = True):
+    """Stream persisted campaign state with metrics; JSON fields stay JSON text in CSV"""
+    return _export_response("campaigns", format, gzip)
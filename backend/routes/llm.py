@@ -3,6 +3,7 @@ from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
 from backend.services.llm_service import LLMService, StanleyAI
 from backend.models import StanleyMessage
+from backend.error_handling import LLMNotReadyException
 from datetime import datetime
 
 _llm_service = None
@@ -63,6 +64,8 @@ async def generate_text(request: GenerateRequest):
             temperature=request.temperature
         )
         return {"response": response}
+    except LLMNotReadyException as e:
+        raise HTTPException(status_code=503, detail=e.message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Generation error: {str(e)}")
 
@@ -73,8 +76,9 @@ async def analyze_logs(
 ):
     """Analyze logs and provide insights"""
     try:
-        analysis = await llm_service.analyze_logs(request.logs)
-        return {"analysis": analysis}
+        return await llm_service.analyze_logs(request.logs)
+    except LLMNotReadyException as e:
+        raise HTTPException(status_code=503, detail=e.message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis error: {str(e)}")
 
@@ -90,6 +94,8 @@ async def suggest_targets(
             request.current_targets
         )
         return {"suggestion": suggestion}
+    except LLMNotReadyException as e:
+        raise HTTPException(status_code=503, detail=e.message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Suggestion error: {str(e)}")
 
@@ -106,6 +112,8 @@ async def generate_dm(
             request.context
         )
         return {"message": message}
+    except LLMNotReadyException as e:
+        raise HTTPException(status_code=503, detail=e.message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"DM generation error: {str(e)}")
 
@@ -116,8 +124,9 @@ async def analyze_campaign(
 ):
     """Analyze campaign performance"""
     try:
-        analysis = await llm_service.analyze_campaign_performance(request.campaign_data)
-        return {"analysis": analysis}
+        return await llm_service.analyze_campaign_performance(request.campaign_data)
+    except LLMNotReadyException as e:
+        raise HTTPException(status_code=503, detail=e.message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Campaign analysis error: {str(e)}")
 
@@ -133,6 +142,8 @@ async def suggest_command(
             request.context
         )
         return {"suggestion": suggestion}
+    except LLMNotReadyException as e:
+        raise HTTPException(status_code=503, detail=e.message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Command suggestion error: {str(e)}")
 
@@ -180,6 +191,8 @@ async def stanley_recommendation(
             priority="high",
             data=data
         )
+    except LLMNotReadyException as e:
+        raise HTTPException(status_code=503, detail=e.message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Stanley recommendation error: {str(e)}")
 
@@ -198,5 +211,7 @@ async def stanley_alert(
             priority="high",
             data={"issue": issue}
         )
+    except LLMNotReadyException as e:
+        raise HTTPException(status_code=503, detail=e.message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Stanley alert error: {str(e)}")
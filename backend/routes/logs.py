@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+import sqlite3
 from backend.services.logging_service import LoggingService
-from backend.models import LogEntry
+from backend.models import LogEntry, LogSearchHit
 
 router = APIRouter(prefix="/logs", tags=["logs"])
 
@@ -17,20 +19,69 @@ async def get_logs(
         return []
     
     try:
-        logs = await logging_service.get_recent_logs(limit=limit, log_type=log_type)
+        logs = logging_service.get_logs(limit=limit, log_type=log_type)
         return logs
     except Exception as e:
         return []
 
+@router.get("/search", response_model=List[LogSearchHit])
+async def search_logs(
+    q: str = Query(..., min_length=1, max_length=200),
+    mode: str = "all",
+    log_type: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=500)
+):
+    """Search log details and targets.
+
+    mode "all" matches entries containing every word, "phrase" the words in
+    order, "prefix" words starting with each term. Matches are wrapped in
+    <mark> tags in the snippet.
+    """
+    from backend.main import logging_service
+    
+    if logging_service is None:
+        return []
+    
+    try:
+        return logging_service.search_logs(q, mode=mode, log_type=log_type, since=since, until=until, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except sqlite3.OperationalError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid search query: {e}")
+
+@router.get("/series")
+async def get_log_series(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    bucket_hours: int = Query(1, ge=1, le=24 * 31),
+    log_type: Optional[str] = None
+) -> Dict[str, Any]:
+    """Log counts per time bucket by type and outcome, for charts (defaults to the last 24 hours)"""
+    from backend.main import logging_service
+    
+    since = since or datetime.now() - timedelta(hours=24)
+    series = logging_service.get_log_series(since, until=until, bucket_hours=bucket_hours, log_type=log_type) if logging_service else []
+    return {"since": since.isoformat(), "until": until.isoformat() if until else None, "bucket_hours": bucket_hours, "series": series}
+
 @router.websocket("/stream")
 async def log_stream(websocket: WebSocket):
     """WebSocket endpoint for real-time log streaming"""
-    await websocket.accept()
+    from backend.main import logging_service
+    
+    if logging_service is None:
+        await websocket.close(code=1013)
+        return
+    
+    await logging_service.connect(websocket)
     try:
         while True:
             await websocket.receive_text()
     except WebSocketDisconnect:
         pass
+    finally:
+        logging_service.disconnect(websocket)
 
 @router.delete("/clear")
 async def clear_logs():
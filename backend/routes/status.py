@@ -1,40 +1,89 @@
 from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
 from typing import Dict, Any
 from backend.services.instagram_service import InstagramService
 from backend.services.queue_service import QueueService
 from backend.services.llm_service import LLMService
 from backend.database.sqlite_db import DatabaseManager
-from datetime import datetime
+from backend.metrics import registry
+from backend.config.settings import settings
+from datetime import datetime, timedelta
+import time
 
 router = APIRouter(prefix="/status", tags=["status"])
 
+_started_at = time.monotonic()
+
+def _action_totals() -> Dict[str, Any]:
+    """Success and failure counts by log type, from the persisted hourly log counters"""
+    from backend.main import db_manager
+
+    counts = db_manager.get_log_totals() if db_manager else {}
+    by_type: Dict[str, Dict[str, Any]] = {}
+    for log_type, outcomes in counts.items():
+        if log_type == "system":
+            continue
+        by_type[log_type] = {
+            "total": sum(outcomes.values()),
+            "successful": outcomes.get("success", 0),
+            "failed": outcomes.get("error", 0)
+        }
+
+    for totals in by_type.values():
+        totals["success_rate"] = round(totals["successful"] / totals["total"] * 100, 1) if totals["total"] else 100.0
+
+    total = sum(t["total"] for t in by_type.values())
+    successful = sum(t["successful"] for t in by_type.values())
+    return {
+        "overall": {
+            "total_actions": total,
+            "success_rate": round(successful / total * 100, 1) if total else 100.0,
+            "successful_actions": successful,
+            "failed_actions": sum(t["failed"] for t in by_type.values())
+        },
+        "by_action_type": by_type
+    }
+
 @router.get("/")
 async def get_system_status() -> Dict[str, Any]:
     """Get overall system status"""
+    from backend.main import instagram_service, queue_service, llm_service, db_manager
+
+    queue_status = queue_service.get_queue_status() if queue_service else {}
+    db_queries = registry.get("db_query_seconds")
+    uptime = int(time.monotonic() - _started_at)
+
     return {
         "timestamp": datetime.now().isoformat(),
         "instagram": {
-            "is_logged_in": False,
-            "username": None,
-            "browser_active": False
+            "is_logged_in": bool(instagram_service and instagram_service.is_logged_in),
+            "username": instagram_service.username if instagram_service else None,
+            "browser_active": bool(instagram_service and (instagram_service.browser or instagram_service.simulate_mode))
         },
         "queue": {
-            "pending": 0,
-            "running": 0,
-            "completed": 0
+            "pending": queue_status.get("queue_size", 0),
+            "running": len(queue_service.running_tasks) if queue_service else 0,
+            "completed": queue_status["completed_count"],
+            "is_processing": queue_status.get("is_processing", False),
+            "failure_count": queue_status.get("failure_count", 0)
         },
         "llm": {
-            "status": "ready",
-            "model": "microsoft/DialoGPT-medium"
+            "status": llm_service.state.value if llm_service else "unavailable",
+            "model": llm_service.model_name if llm_service else settings.llm_model_name,
+            "backend": llm_service.backend if llm_service else None,
+            "fallback_mode": bool(llm_service and llm_service.fallback_mode)
         },
         "database": {
-            "connected": True,
-            "recent_activity": {}
+            "connected": db_manager is not None,
+            "recent_activity": {
+                statement: child.count for (statement,), child in db_queries.children()
+            } if db_queries else {}
         },
         "system": {
-            "uptime": "Running",
+            "uptime": f"{uptime // 3600}h {uptime % 3600 // 60}m {uptime % 60}s",
+            "uptime_seconds": uptime,
             "version": "1.0.0",
-            "environment": "development"
+            "environment": "simulate" if settings.simulate else ("development" if settings.debug else "production")
         }
     }
 
@@ -49,14 +98,17 @@ async def health_check():
 
 @router.get("/metrics")
 async def get_metrics():
-    """Get system metrics"""
+    """Get action totals plus every registered metric as JSON"""
+    from backend.main import db_manager
+
     return {
-        "overall": {
-            "total_actions": 0,
-            "success_rate": 100.0,
-            "successful_actions": 0,
-            "failed_actions": 0
-        },
-        "by_action_type": {},
+        **_action_totals(),
+        "activity_24h": db_manager.get_log_series(since=datetime.now() - timedelta(hours=24)) if db_manager else [],
+        "metrics": registry.to_dict(),
         "timestamp": datetime.now().isoformat()
     }
+
+@router.get("/metrics/prometheus", response_class=PlainTextResponse)
+async def get_prometheus_metrics():
+    """Get every registered metric in the Prometheus text format"""
+    return PlainTextResponse(registry.render_prometheus(), media_type="text/plain; version=0.0.4")
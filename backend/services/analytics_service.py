@@ -0,0 +1,454 @@
+import asyncio
+import glob
+import importlib.util
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from backend.config.settings import settings
+from backend.error_handling import SocialCommanderException
+from backend.metrics import registry
+from backend.services.logging_service import LoggingService
+
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+DUCKDB_AVAILABLE = importlib.util.find_spec("duckdb") is not None
+PANDAS_AVAILABLE = importlib.util.find_spec("pandas") is not None
+
+ARCHIVE_ROWS = registry.counter("analytics_archive_rows", "Log rows copied into the Parquet archive")
+REPORT_SECONDS = registry.histogram(
+    "analytics_report_seconds", "Time to compute an analytics report on a cache miss", ["report"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+REPORT_CACHE = registry.counter("analytics_report_cache", "Analytics report cache lookups", ["result"])
+
+ARCHIVE_FLUSH_ROWS = 100_000
+STATE_FILE = "archive_state.json"
+
+class AnalyticsUnavailableError(SocialCommanderException):
+    """Raised when the optional Parquet dependencies are missing or nothing has been archived yet"""
+    def __init__(self, message: str = "Analytics unavailable", details: Optional[Dict[str, Any]] = None):
+        super().__init__(message, "ANALYTICS_UNAVAILABLE", details)
+
+def _logs_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.int64()),
+        ("ts", pa.timestamp("ms")),  # UTC
+        ("type", pa.dictionary(pa.int8(), pa.string())),
+        ("action", pa.dictionary(pa.int16(), pa.string())),
+        ("outcome", pa.dictionary(pa.int8(), pa.string())),
+        ("target", pa.string()),
+        ("details", pa.string()),
+        ("probability", pa.float64()),
+        ("followback_chance", pa.float64())
+    ])
+
+class LogArchiver:
+    """Copies new log rows from SQLite into day-partitioned Parquet files.
+
+    Reads go through a read-only connection, so archiving never takes a write
+    lock on the live database. archive_state.json records the last id
+    archived; part files are named by their first id so a run interrupted
+    between writing parts and saving state can discard its partial output.
+    """
+
+    def __init__(self, db_path: str, archive_dir: str):
+        self.db_path = db_path
+        self.logs_dir = os.path.join(archive_dir, "logs")
+        self.state_path = os.path.join(archive_dir, STATE_FILE)
+
+    def read_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"last_id": 0, "rows": 0, "archived_at": None, "through_ts": None}
+
+    def _write_state(self, state: Dict[str, Any]):
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def files(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.logs_dir, "day=*", "part-*.parquet")))
+
+    @staticmethod
+    def _id_range(path: str) -> Tuple[int, int]:
+        _, first_id, last_id = os.path.basename(path)[:-len(".parquet")].split("-")
+        return int(first_id), int(last_id)
+
+    def _discard_partial(self, last_id: int):
+        for path in self.files():
+            if self._id_range(path)[0] > last_id:
+                os.remove(path)
+
+    def compact(self, before_day: str) -> int:
+        """Merge each finished day's part files into one so scans do not open a file per archive run"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        merged = 0
+        for day_dir in sorted(glob.glob(os.path.join(self.logs_dir, "day=*"))):
+            if os.path.basename(day_dir)[len("day="):] >= before_day:
+                continue
+            parts = sorted(glob.glob(os.path.join(day_dir, "part-*.parquet")))
+            if len(parts) < 2:
+                continue
+            ranges = [self._id_range(path) for path in parts]
+            first_id = min(r[0] for r in ranges)
+            last_id = max(r[1] for r in ranges)
+            path = os.path.join(day_dir, f"part-{first_id:012d}-{last_id:012d}.parquet")
+            if path not in parts:
+                table = pa.concat_tables([pq.read_table(part) for part in parts])
+                pq.write_table(table, f"{path}.tmp", compression="zstd")
+                os.replace(f"{path}.tmp", path)
+            # Also finishes a compaction interrupted after the merged file was written
+            for part in parts:
+                if part != path:
+                    os.remove(part)
+            merged += 1
+        return merged
+
+    def archive(self, flush_rows: int = ARCHIVE_FLUSH_ROWS) -> int:
+        """Archive rows added since the last run; blocking, returns the number of rows written"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        os.makedirs(self.logs_dir, exist_ok=True)
+        state = self.read_state()
+        self._discard_partial(state["last_id"])
+        schema = _logs_schema()
+        written = 0
+
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        try:
+            cursor = conn.execute("""
+                SELECT l.id, l.ts_ms, t.name, a.name, o.name, l.target, l.details, l.probability, l.followback_chance
+                FROM logs l
+                JOIN log_types t ON t.code = l.type
+                JOIN log_actions a ON a.code = l.action
+                JOIN log_outcomes o ON o.code = l.outcome
+                WHERE l.id > ? ORDER BY l.id
+            """, (state["last_id"],))
+
+            by_day: Dict[str, List[tuple]] = {}
+            buffered = 0
+            while True:
+                rows = cursor.fetchmany(10_000)
+                for row in rows:
+                    day = datetime.fromtimestamp(row[1] / 1000, timezone.utc).strftime("%Y-%m-%d")
+                    by_day.setdefault(day, []).append(row)
+                buffered += len(rows)
+                if buffered < flush_rows and rows:
+                    continue
+                if not by_day:
+                    break
+
+                for day, day_rows in by_day.items():
+                    columns = list(zip(*day_rows))
+                    table = pa.table([
+                        pa.array(columns[0], pa.int64()),
+                        pa.array(columns[1], pa.int64()).cast(pa.timestamp("ms")),
+                        pa.array(columns[2], pa.string()).dictionary_encode().cast(schema.field("type").type),
+                        pa.array(columns[3], pa.string()).dictionary_encode().cast(schema.field("action").type),
+                        pa.array(columns[4], pa.string()).dictionary_encode().cast(schema.field("outcome").type),
+                        pa.array(columns[5], pa.string()),
+                        pa.array(columns[6], pa.string()),
+                        pa.array(columns[7], pa.float64()),
+                        pa.array(columns[8], pa.float64())
+                    ], schema=schema)
+                    day_dir = os.path.join(self.logs_dir, f"day={day}")
+                    os.makedirs(day_dir, exist_ok=True)
+                    path = os.path.join(day_dir, f"part-{columns[0][0]:012d}-{columns[0][-1]:012d}.parquet")
+                    pq.write_table(table, f"{path}.tmp", compression="zstd")
+                    os.replace(f"{path}.tmp", path)
+
+                flushed = [row for day_rows in by_day.values() for row in day_rows]
+                state["last_id"] = max(row[0] for row in flushed)
+                state["rows"] += len(flushed)
+                state["through_ts"] = max(
+                    filter(None, [state["through_ts"], datetime.fromtimestamp(
+                        max(row[1] for row in flushed) / 1000, timezone.utc
+                    ).isoformat()])
+                )
+                state["archived_at"] = datetime.now(timezone.utc).isoformat()
+                self._write_state(state)
+                written += len(flushed)
+                ARCHIVE_ROWS.inc(len(flushed))
+                by_day = {}
+                buffered = 0
+                if not rows:
+                    break
+        finally:
+            conn.close()
+
+        self.compact(datetime.now(timezone.utc).strftime("%Y-%m-%d"))
+        return written
+
+class DuckDBEngine:
+    """Runs reports as DuckDB SQL straight over the Parquet files"""
+
+    name = "duckdb"
+
+    def __init__(self, logs_dir: str):
+        self.source = f"read_parquet('{os.path.join(logs_dir, 'day=*', '*.parquet')}', hive_partitioning = true)"
+
+    def _query(self, sql: str, params: List[Any]) -> List[tuple]:
+        import duckdb
+
+        with duckdb.connect() as conn:
+            return conn.execute(sql.replace("{logs}", self.source), params).fetchall()
+
+    def weekly_outcomes(self, since: datetime, log_type: Optional[str]) -> List[tuple]:
+        return self._query(f"""
+            SELECT CAST(date_trunc('week', ts) AS DATE) AS week, type, outcome, count(*)
+            FROM {{logs}} WHERE ts >= ? {"AND type = ?" if log_type else ""}
+            GROUP BY ALL ORDER BY ALL
+        """, [since] + ([log_type] if log_type else []))
+
+    def error_messages(self, since: datetime) -> List[tuple]:
+        return self._query("""
+            SELECT CAST(ts AS DATE) AS day, regexp_replace(details, '[0-9]+', '#', 'g') AS message, count(*)
+            FROM {logs} WHERE ts >= ? AND outcome = 'error'
+            GROUP BY ALL ORDER BY ALL
+        """, [since])
+
+    def activity(self, since: datetime) -> List[tuple]:
+        return self._query("""
+            SELECT isodow(ts) AS weekday, hour(ts) AS hour, count(*), count(*) FILTER (WHERE outcome = 'error')
+            FROM {logs} WHERE ts >= ?
+            GROUP BY ALL ORDER BY ALL
+        """, [since])
+
+class PandasEngine:
+    """Runs reports as vectorised pandas operations over a pyarrow dataset scan"""
+
+    name = "pandas"
+
+    def __init__(self, logs_dir: str):
+        self.logs_dir = logs_dir
+
+    def _frame(self, since: datetime, columns: List[str], filters: Optional[List[tuple]] = None):
+        import pandas as pd
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(self.logs_dir, format="parquet", partitioning="hive")
+        expression = ds.field("ts") >= pd.Timestamp(since)
+        for column, value in filters or []:
+            expression = expression & (ds.field(column) == value)
+        return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+    def weekly_outcomes(self, since: datetime, log_type: Optional[str]) -> List[tuple]:
+        import pandas as pd
+
+        df = self._frame(since, ["ts", "type", "outcome"], [("type", log_type)] if log_type else None)
+        if df.empty:
+            return []
+        df["week"] = (df["ts"].dt.normalize() - pd.to_timedelta(df["ts"].dt.weekday, unit="D")).dt.date
+        counts = df.groupby(["week", df["type"].astype(str), df["outcome"].astype(str)]).size()
+        return sorted((week, log_type, outcome, int(count)) for (week, log_type, outcome), count in counts.items())
+
+    def error_messages(self, since: datetime) -> List[tuple]:
+        df = self._frame(since, ["ts", "details"], [("outcome", "error")])
+        if df.empty:
+            return []
+        df["day"] = df["ts"].dt.date
+        df["message"] = df["details"].str.replace(r"[0-9]+", "#", regex=True)
+        counts = df.groupby(["day", "message"]).size()
+        return sorted((day, message, int(count)) for (day, message), count in counts.items())
+
+    def activity(self, since: datetime) -> List[tuple]:
+        df = self._frame(since, ["ts", "outcome"])
+        if df.empty:
+            return []
+        df["weekday"] = df["ts"].dt.weekday + 1
+        df["hour"] = df["ts"].dt.hour
+        df["error"] = df["outcome"].astype(str) == "error"
+        grouped = df.groupby(["weekday", "hour"])["error"].agg(["size", "sum"])
+        return [(int(weekday), int(hour), int(row["size"]), int(row["sum"])) for (weekday, hour), row in grouped.iterrows()]
+
+class AnalyticsService:
+    """Historical log reports over a Parquet archive, kept apart from the live SQLite database.
+
+    A background loop archives new log rows on an interval; reports only ever
+    read the archive, run in a dedicated thread pool and are cached per
+    parameters until the TTL passes or the archive grows.
+    """
+
+    REPORTS = ("weekly_outcomes", "error_trends", "activity_heatmap")
+
+    def __init__(self, logging_service: LoggingService, db_path: str, archive_dir: Optional[str] = None):
+        self.logging_service = logging_service
+        self.archive_dir = (archive_dir or settings.analytics_archive_dir
+                            or os.path.join(os.path.dirname(os.path.abspath(db_path)), "log_archive"))
+        self.archiver = LogArchiver(db_path, self.archive_dir)
+        self.engine = self._select_engine()
+        self.executor = ThreadPoolExecutor(max_workers=settings.analytics_workers, thread_name_prefix="analytics")
+        self.cache: "OrderedDict[Tuple, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self.cache_max_entries = 128
+        self.generation = 0
+        self.archive_task: Optional[asyncio.Task] = None
+        self._archive_lock = asyncio.Lock()
+
+    def _select_engine(self):
+        if not PYARROW_AVAILABLE:
+            return None
+        preferred = settings.analytics_engine
+        if preferred in ("auto", "duckdb") and DUCKDB_AVAILABLE:
+            return DuckDBEngine(self.archiver.logs_dir)
+        if preferred in ("auto", "pandas") and PANDAS_AVAILABLE:
+            return PandasEngine(self.archiver.logs_dir)
+        return None
+
+    @property
+    def available(self) -> bool:
+        return self.engine is not None
+
+    async def start(self):
+        """Start the periodic archive loop"""
+        if not self.available:
+            await self.logging_service.log_system_message(
+                "Analytics disabled: install pyarrow plus duckdb or pandas to archive logs", "warning"
+            )
+            return
+        if settings.analytics_archive_interval_minutes > 0:
+            self.archive_task = asyncio.create_task(self._archive_loop())
+
+    async def stop(self):
+        if self.archive_task:
+            self.archive_task.cancel()
+            try:
+                await self.archive_task
+            except asyncio.CancelledError:
+                pass
+            self.archive_task = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _archive_loop(self):
+        while True:
+            try:
+                await self.archive()
+            except Exception as e:
+                await self.logging_service.log_system_message(f"Log archive error: {str(e)}", "error")
+            await asyncio.sleep(settings.analytics_archive_interval_minutes * 60)
+
+    async def archive(self) -> int:
+        """Archive new log rows now; returns the number of rows written"""
+        if not self.available:
+            raise AnalyticsUnavailableError("Analytics requires pyarrow plus duckdb or pandas")
+        async with self._archive_lock:
+            loop = asyncio.get_running_loop()
+            written = await loop.run_in_executor(self.executor, self.archiver.archive)
+        if written:
+            self.generation += 1
+            self.cache.clear()
+        return written
+
+    def get_status(self) -> Dict[str, Any]:
+        state = self.archiver.read_state()
+        return {
+            "available": self.available,
+            "engine": self.engine.name if self.engine else None,
+            "archive_dir": self.archive_dir,
+            "archived_rows": state["rows"],
+            "archived_through": state["through_ts"],
+            "last_archive_at": state["archived_at"],
+            "files": len(self.archiver.files()),
+            "cached_reports": len(self.cache)
+        }
+
+    async def report(self, name: str, **params) -> Dict[str, Any]:
+        """Compute (or serve from cache) a named report"""
+        if name not in self.REPORTS:
+            raise ValueError(f"Unknown report: {name}")
+        if not self.available:
+            raise AnalyticsUnavailableError("Analytics requires pyarrow plus duckdb or pandas")
+        if not self.archiver.files():
+            raise AnalyticsUnavailableError("No logs archived yet")
+
+        key = (name, tuple(sorted(params.items())))
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] > time.monotonic() and cached[1] == self.generation:
+            self.cache.move_to_end(key)
+            REPORT_CACHE.labels("hit").inc()
+            return cached[2]
+        REPORT_CACHE.labels("miss").inc()
+
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        generation = self.generation
+        result = await loop.run_in_executor(self.executor, lambda: getattr(self, f"_{name}")(**params))
+        elapsed = time.perf_counter() - started
+        REPORT_SECONDS.labels(name).observe(elapsed)
+
+        result = {
+            "report": name,
+            "params": params,
+            "engine": self.engine.name,
+            "archived_through": self.archiver.read_state()["through_ts"],
+            "generated_at": datetime.now().isoformat(),
+            "query_ms": round(elapsed * 1000, 1),
+            **result
+        }
+        self.cache[key] = (time.monotonic() + settings.analytics_cache_ttl, generation, result)
+        while len(self.cache) > self.cache_max_entries:
+            self.cache.popitem(last=False)
+        return result
+
+    def _since(self, days: int) -> datetime:
+        return datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+
+    def _weekly_outcomes(self, weeks: int = 8, log_type: Optional[str] = None) -> Dict[str, Any]:
+        """Outcome counts and success rate per ISO week and log type, with the week-over-week change"""
+        since = self._since(weeks * 7)
+        since = since - timedelta(days=since.weekday())
+        since = since.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        rows: Dict[Tuple[date, str], Dict[str, Any]] = {}
+        for week, row_type, outcome, count in self.engine.weekly_outcomes(since, log_type):
+            entry = rows.setdefault((week, row_type), {"week": week.isoformat(), "type": row_type, "total": 0, "outcomes": {}})
+            entry["outcomes"][outcome] = count
+            entry["total"] += count
+
+        previous: Dict[str, float] = {}
+        weeks_out = []
+        for (_, row_type), entry in sorted(rows.items()):
+            rate = round(entry["outcomes"].get("success", 0) / entry["total"] * 100, 1)
+            entry["success_rate"] = rate
+            entry["success_rate_change"] = round(rate - previous[row_type], 1) if row_type in previous else None
+            previous[row_type] = rate
+            weeks_out.append(entry)
+        return {"rows": weeks_out}
+
+    def _error_trends(self, days: int = 30, top: int = 10) -> Dict[str, Any]:
+        """Daily error counts and the most frequent error messages (digits masked) with their daily series"""
+        by_day: Dict[str, int] = {}
+        by_message: Dict[str, Dict[str, int]] = {}
+        for day, message, count in self.engine.error_messages(self._since(days)):
+            day = day.isoformat()
+            by_day[day] = by_day.get(day, 0) + count
+            by_message.setdefault(message, {})[day] = count
+
+        ranked = sorted(by_message.items(), key=lambda item: sum(item[1].values()), reverse=True)[:top]
+        return {
+            "daily_errors": [{"day": day, "errors": count} for day, count in sorted(by_day.items())],
+            "top_errors": [
+                {"message": message, "total": sum(series.values()), "by_day": series}
+                for message, series in ranked
+            ]
+        }
+
+    def _activity_heatmap(self, days: int = 28) -> Dict[str, Any]:
+        """Entry and error counts by ISO weekday (1 = Monday) and UTC hour"""
+        return {
+            "cells": [
+                {"weekday": weekday, "hour": hour, "total": total, "errors": errors}
+                for weekday, hour, total, errors in self.engine.activity(self._since(days))
+            ]
+        }
@@ -1,14 +1,19 @@
 import asyncio
+import hashlib
 import json
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from enum import Enum
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from .logging_service import LoggingService
 from .llm_service import LLMService, StanleyAI
 from .instagram_service import InstagramService
 from .queue_service import QueueService, QueuedTask, TaskType
 from backend.models import Target
+from backend.database.sqlite_db import DatabaseManager
+from .target_store import CampaignTarget, CampaignTargetStore
+from backend.config.settings import settings as app_settings
+from backend.error_handling import LLMNotReadyException
 
 class CampaignStatus(Enum):
     ACTIVE = "active"
@@ -23,22 +28,24 @@ class CampaignPhase(Enum):
     MESSAGING = "messaging"
     COMPLETED = "completed"
 
-@dataclass
-class CampaignTarget:
-    username: str
-    followed_at: Optional[datetime] = None
-    followed_back: Optional[bool] = None
-    dm_sent: Optional[bool] = None
-    dm_sent_at: Optional[datetime] = None
-    engagement_score: float = 0.0
-    tags_matched: List[str] = None
+class DirtyTracked:
+    """Mixin that flags an object as dirty whenever one of its attributes is assigned"""
     
-    def __post_init__(self):
-        if self.tags_matched is None:
-            self.tags_matched = []
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+        if name not in ("dirty", "revision"):
+            self.mark_dirty()
+    
+    def mark_dirty(self):
+        """Flag in-place mutations (e.g. metrics dict updates) for the next flush"""
+        object.__setattr__(self, "dirty", True)
+        object.__setattr__(self, "revision", getattr(self, "revision", 0) + 1)
+    
+    def mark_clean(self):
+        object.__setattr__(self, "dirty", False)
 
 @dataclass
-class Campaign:
+class Campaign(DirtyTracked):
     id: str
     name: str
     persona: str
@@ -46,13 +53,13 @@ class Campaign:
     status: CampaignStatus
     phase: CampaignPhase
     created_at: datetime
-    targets: List[CampaignTarget]
+    targets: CampaignTargetStore
     settings: Dict[str, Any]
     metrics: Dict[str, Any]
     
     def __post_init__(self):
-        if not self.targets:
-            self.targets = []
+        if not isinstance(self.targets, CampaignTargetStore):
+            self.targets = CampaignTargetStore(self.targets)
         if not self.settings:
             self.settings = {
                 "max_targets": 50,
@@ -68,11 +75,53 @@ class Campaign:
                 "dms_sent": 0,
                 "engagement_rate": 0.0
             }
+        self.targets_loaded = True
+        self.stored_targets_count = 0
+        self.stored_followback_rate = 0.0
+    
+    def to_row(self, targets_count: int, followback_rate: float) -> Dict[str, Any]:
+        """Serialise for DatabaseManager.save_campaign_state"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "persona": self.persona,
+            "target_hashtags": self.target_hashtags,
+            "status": self.status.value,
+            "phase": self.phase.value,
+            "created_at": self.created_at.isoformat(),
+            "settings": self.settings,
+            "metrics": self.metrics,
+            "targets_count": targets_count,
+            "followback_rate": followback_rate
+        }
+    
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "Campaign":
+        """Build a campaign whose targets are hydrated lazily on first use"""
+        campaign = cls(
+            id=row["id"],
+            name=row["name"],
+            persona=row["persona"],
+            target_hashtags=row["target_hashtags"],
+            status=CampaignStatus(row["status"]),
+            phase=CampaignPhase(row["phase"]),
+            created_at=datetime.fromisoformat(row["created_at"]),
+            targets=[],
+            settings=row["settings"],
+            metrics=row["metrics"]
+        )
+        campaign.targets_loaded = False
+        campaign.stored_targets_count = row["targets_count"]
+        campaign.stored_followback_rate = row["followback_rate"]
+        campaign.mark_clean()
+        return campaign
 
 class CampaignService:
     def __init__(self, logging_service: LoggingService, llm_service: LLMService, 
-                 instagram_service: InstagramService, queue_service: QueueService):
+                 instagram_service: InstagramService, queue_service: QueueService,
+                 db_manager: Optional[DatabaseManager] = None):
         self.logging_service = logging_service
+        self.db_manager = db_manager
         self.llm_service = llm_service
         self.stanley_ai = StanleyAI(llm_service)
         self.instagram_service = instagram_service
@@ -80,11 +129,118 @@ class CampaignService:
         
         self.campaigns: Dict[str, Campaign] = {}
         self.campaign_tasks: Dict[str, asyncio.Task] = {}
+        self.persist_task: Optional[asyncio.Task] = None
+        self.summary_cache: Dict[str, tuple] = {}
         
         self.queue_service.register_handler(TaskType.FOLLOW, self._handle_follow_task)
         self.queue_service.register_handler(TaskType.DM, self._handle_dm_task)
         self.queue_service.register_handler(TaskType.SCAN, self._handle_scan_task)
     
+    async def start(self):
+        """Restore persisted campaigns, resume active ones and start the write-behind loop"""
+        if self.db_manager is None:
+            return
+        
+        loop = asyncio.get_event_loop()
+        rows = await loop.run_in_executor(None, self.db_manager.get_campaign_states)
+        for row in rows:
+            campaign = Campaign.from_row(row)
+            self.campaigns[campaign.id] = campaign
+            if campaign.status == CampaignStatus.ACTIVE:
+                self.campaign_tasks[campaign.id] = asyncio.create_task(self._run_campaign(campaign.id))
+        
+        if rows:
+            await self.logging_service.log_system_message(f"Restored {len(rows)} campaigns from database")
+        
+        self.persist_task = asyncio.create_task(self._persist_loop())
+    
+    async def stop(self):
+        """Stop campaign loops and flush pending state"""
+        for task in self.campaign_tasks.values():
+            task.cancel()
+        if self.persist_task:
+            self.persist_task.cancel()
+        await self.flush()
+    
+    async def _persist_loop(self):
+        """Periodically write dirty campaigns and targets to the database"""
+        while True:
+            await asyncio.sleep(app_settings.campaign_flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                await self.logging_service.log_system_message(f"Campaign persistence error: {str(e)}", "error")
+    
+    async def flush(self) -> int:
+        """Upsert dirty campaigns and targets in one batch; returns the number of rows written"""
+        if self.db_manager is None:
+            return 0
+        
+        campaign_rows = []
+        target_rows = []
+        flushed = []
+        for campaign in self.campaigns.values():
+            dirty_targets = campaign.targets.pop_dirty() if campaign.targets_loaded else []
+            if not campaign.dirty and not dirty_targets:
+                continue
+            
+            campaign_rows.append(campaign.to_row(
+                self._targets_count(campaign), self._calculate_followback_rate(campaign)
+            ))
+            target_rows.extend(t.to_row(campaign.id) for t in dirty_targets)
+            flushed.append((campaign, [t.username for t in dirty_targets]))
+            campaign.mark_clean()
+        
+        if campaign_rows:
+            loop = asyncio.get_event_loop()
+            try:
+                await loop.run_in_executor(None, self.db_manager.save_campaign_state, campaign_rows, target_rows)
+            except Exception:
+                for campaign, usernames in flushed:
+                    campaign.mark_dirty()
+                    campaign.targets.mark_dirty(usernames)
+                raise
+        
+        self._evict_inactive_targets()
+        return len(campaign_rows) + len(target_rows)
+    
+    def _evict_inactive_targets(self):
+        """Drop in-memory targets of finished campaigns; they are re-read on demand"""
+        if self.db_manager is None:
+            return
+        
+        for campaign in self.campaigns.values():
+            if (campaign.targets_loaded and not campaign.dirty
+                    and campaign.status in (CampaignStatus.ARCHIVED, CampaignStatus.COMPLETED)
+                    and campaign.id not in self.campaign_tasks):
+                # Bypass dirty tracking: the campaign was just flushed and nothing a client sees changes
+                object.__setattr__(campaign, "stored_targets_count", len(campaign.targets))
+                object.__setattr__(campaign, "stored_followback_rate", self._calculate_followback_rate(campaign))
+                self._swap_targets(campaign, CampaignTargetStore(), loaded=False)
+    
+    async def _ensure_targets(self, campaign: Campaign):
+        """Hydrate a campaign's targets from the database if they are not in memory"""
+        if campaign.targets_loaded:
+            return
+        
+        loop = asyncio.get_event_loop()
+        rows = await loop.run_in_executor(None, self.db_manager.get_campaign_targets, campaign.id)
+        if campaign.targets_loaded:
+            return  # a concurrent caller hydrated (and may already have mutated) the targets
+        self._swap_targets(campaign, CampaignTargetStore(CampaignTarget.from_row(row) for row in rows), loaded=True)
+    
+    def _swap_targets(self, campaign: Campaign, store: CampaignTargetStore, loaded: bool):
+        """Replace a campaign's target store without marking it dirty or changing its version"""
+        store.version = campaign.targets.version
+        object.__setattr__(campaign, "targets", store)
+        object.__setattr__(campaign, "targets_loaded", loaded)
+    
+    def _targets_count(self, campaign: Campaign) -> int:
+        """Number of targets, without hydrating evicted campaigns"""
+        if campaign.targets_loaded:
+            return len(campaign.targets)
+        return campaign.stored_targets_count
+    
     async def create_campaign(self, name: str, persona: str, hashtags: List[str], 
                             settings: Optional[Dict[str, Any]] = None) -> str:
         """Create a new campaign"""
@@ -173,7 +329,25 @@ class CampaignService:
         if campaign_id not in self.campaigns:
             return {"error": "Campaign not found"}
         
+        await self._ensure_targets(self.campaigns[campaign_id])
+        insights: Dict[str, Any] = {}
+        section_errors: Dict[str, str] = {}
+        async for section in self.iter_campaign_insights(campaign_id):
+            insights[section["section"]] = section["value"]
+            if section["error"]:
+                section_errors[section["section"]] = section["error"]
+        
+        insights["partial"] = bool(section_errors)
+        insights["section_errors"] = section_errors
+        return insights
+    
+    async def iter_campaign_insights(self, campaign_id: str):
+        """Yield insight sections as they complete, running the LLM calls concurrently"""
         campaign = self.campaigns[campaign_id]
+        await self._ensure_targets(campaign)
+        
+        engagement_analysis = await self._analyze_engagement_patterns(campaign)
+        yield {"section": "engagement_analysis", "value": engagement_analysis, "error": None}
         
         campaign_data = {
             "name": campaign.name,
@@ -185,16 +359,35 @@ class CampaignService:
             "followback_rate": self._calculate_followback_rate(campaign)
         }
         
-        insight = await self.stanley_ai.get_insight(campaign_data)
-        recommendation = await self.stanley_ai.get_recommendation(campaign_data)
-        
-        return {
-            "insight": insight,
-            "recommendation": recommendation,
-            "suggested_hashtags": await self._get_suggested_hashtags(campaign),
-            "optimal_timing": await self._get_optimal_timing(campaign),
-            "engagement_analysis": await self._analyze_engagement_patterns(campaign)
+        sections = {
+            "insight": self.stanley_ai.get_insight(campaign_data),
+            "recommendation": self.stanley_ai.get_recommendation(campaign_data),
+            "suggested_hashtags": self._get_suggested_hashtags(campaign),
+            "optimal_timing": self._get_optimal_timing(campaign)
         }
+        tasks = [
+            asyncio.create_task(self._run_insight_section(name, coro))
+            for name, coro in sections.items()
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def _run_insight_section(self, name: str, coro) -> Dict[str, Any]:
+        """Run one insight section with a timeout, converting failures into a partial result"""
+        try:
+            value = await asyncio.wait_for(coro, timeout=app_settings.campaign_insight_section_timeout)
+            return {"section": name, "value": value, "error": None}
+        except asyncio.TimeoutError:
+            error = f"timed out after {app_settings.campaign_insight_section_timeout:g}s"
+        except Exception as e:
+            error = str(e)
+        
+        await self.logging_service.log_system_message(f"Campaign insight section '{name}' failed: {error}", "warning")
+        return {"section": name, "value": None, "error": error}
     
     async def _run_campaign(self, campaign_id: str):
         """Main campaign execution loop"""
@@ -205,6 +398,8 @@ class CampaignService:
                 if campaign.status != CampaignStatus.ACTIVE:
                     break
                 
+                await self._ensure_targets(campaign)
+                
                 if campaign.phase == CampaignPhase.SCANNING:
                     await self._execute_scanning_phase(campaign)
                 elif campaign.phase == CampaignPhase.FOLLOWING:
@@ -225,6 +420,9 @@ class CampaignService:
             await self.logging_service.log_system_message(
                 f"Campaign {campaign_id} error: {str(e)}", "error"
             )
+        finally:
+            if self.campaign_tasks.get(campaign_id) is asyncio.current_task():
+                del self.campaign_tasks[campaign_id]
     
     async def _execute_scanning_phase(self, campaign: Campaign):
         """Execute hashtag scanning phase"""
@@ -246,13 +444,13 @@ class CampaignService:
     
     async def _execute_following_phase(self, campaign: Campaign):
         """Execute following phase"""
-        unfollowed_targets = [t for t in campaign.targets if t.followed_at is None]
+        unfollowed_targets = campaign.targets.with_status("unfollowed", limit=5)
         
         if not unfollowed_targets:
             campaign.phase = CampaignPhase.WAITING_FOLLOWBACK
             return
         
-        for target in unfollowed_targets[:5]:  # Follow 5 at a time
+        for target in unfollowed_targets:  # Follow 5 at a time
             follow_task = QueuedTask(
                 id=f"follow_{campaign.id}_{target.username}_{datetime.now().timestamp()}",
                 task_type=TaskType.FOLLOW,
@@ -268,33 +466,31 @@ class CampaignService:
         delay_hours = campaign.settings["follow_delay_hours"]
         
         targets_to_check = [
-            t for t in campaign.targets 
-            if t.followed_at and t.followed_back is None and 
-            now - t.followed_at >= timedelta(hours=delay_hours)
+            t for t in campaign.targets.with_status("awaiting_followback")
+            if now - t.followed_at >= timedelta(hours=delay_hours)
         ]
         
         for target in targets_to_check:
             import random
-            target.followed_back = random.random() > 0.3  # 70% followback rate
+            followed_back = random.random() > 0.3  # 70% followback rate
+            campaign.targets.update(target.username, followed_back=followed_back)
             
-            if target.followed_back:
+            if followed_back:
                 campaign.metrics["followbacks_received"] += 1
+                campaign.mark_dirty()
         
         if targets_to_check:
             campaign.phase = CampaignPhase.MESSAGING
     
     async def _execute_messaging_phase(self, campaign: Campaign):
         """Execute DM messaging phase"""
-        followers_to_message = [
-            t for t in campaign.targets 
-            if t.followed_back and not t.dm_sent
-        ]
+        followers_to_message = campaign.targets.with_status("followed_back", limit=3)
         
         if not followers_to_message:
             campaign.phase = CampaignPhase.COMPLETED
             return
         
-        for target in followers_to_message[:3]:  # Message 3 at a time
+        for target in followers_to_message:  # Message 3 at a time
             dm_message = await self._generate_personalized_dm(campaign, target)
             
             dm_task = QueuedTask(
@@ -317,7 +513,10 @@ class CampaignService:
             "engagement_score": target.engagement_score
         }
         
-        dm_strategy = await self.stanley_ai.generate_dm_strategy(target_profile)
+        try:
+            dm_strategy = await self.stanley_ai.generate_dm_strategy(target_profile)
+        except LLMNotReadyException:
+            dm_strategy = ""
         
         prompt = f"""
         Campaign: {campaign.name}
@@ -328,7 +527,10 @@ class CampaignService:
         Generate a personalized, friendly DM message (max 100 characters):
         """
         
-        dm_message = await self.llm_service.generate_text(prompt, max_length=50)
+        try:
+            dm_message = await self.llm_service.generate_text(prompt, max_length=50)
+        except LLMNotReadyException:
+            dm_message = ""
         
         if not dm_message or len(dm_message) < 10:
             return f"Hey {target.username}! Love your content, would love to connect!"
@@ -359,14 +561,7 @@ class CampaignService:
     
     async def _get_optimal_timing(self, campaign: Campaign) -> Dict[str, Any]:
         """Analyze optimal timing for campaign actions"""
-        engagement_data = []
-        for target in campaign.targets:
-            if target.followed_at:
-                engagement_data.append({
-                    "hour": target.followed_at.hour,
-                    "day": target.followed_at.weekday(),
-                    "followed_back": target.followed_back
-                })
+        engagement_data = campaign.targets.follow_time_buckets()
         
         analysis = await self.stanley_ai.analyze_engagement_patterns(engagement_data)
         
@@ -378,25 +573,22 @@ class CampaignService:
     
     async def _analyze_engagement_patterns(self, campaign: Campaign) -> Dict[str, Any]:
         """Analyze engagement patterns for campaign optimization"""
-        total_targets = len(campaign.targets)
-        followed = len([t for t in campaign.targets if t.followed_at])
-        followed_back = len([t for t in campaign.targets if t.followed_back])
+        targets = campaign.targets
+        total_targets = len(targets)
         
         return {
             "total_targets": total_targets,
-            "follow_rate": followed / max(total_targets, 1),
-            "followback_rate": followed_back / max(followed, 1),
-            "engagement_score": sum(t.engagement_score for t in campaign.targets) / max(total_targets, 1)
+            "follow_rate": targets.followed_count / max(total_targets, 1),
+            "followback_rate": targets.followed_back_count / max(targets.followed_count, 1),
+            "engagement_score": targets.engagement_total / max(total_targets, 1)
         }
     
     def _calculate_followback_rate(self, campaign: Campaign) -> float:
         """Calculate followback rate for campaign"""
-        followed = [t for t in campaign.targets if t.followed_at]
-        if not followed:
-            return 0.0
+        if not campaign.targets_loaded:
+            return campaign.stored_followback_rate
         
-        followed_back = [t for t in followed if t.followed_back]
-        return len(followed_back) / len(followed)
+        return campaign.targets.followback_rate()
     
     async def _handle_follow_task(self, username: str, data: Dict[str, Any]) -> bool:
         """Handle follow task from queue"""
@@ -408,11 +600,10 @@ class CampaignService:
         
         if success:
             campaign = self.campaigns[campaign_id]
-            for target in campaign.targets:
-                if target.username == username:
-                    target.followed_at = datetime.now()
-                    campaign.metrics["follows_sent"] += 1
-                    break
+            await self._ensure_targets(campaign)
+            if campaign.targets.update(username, followed_at=datetime.now()):
+                campaign.metrics["follows_sent"] += 1
+                campaign.mark_dirty()
         
         return success
     
@@ -428,12 +619,10 @@ class CampaignService:
         
         if success:
             campaign = self.campaigns[campaign_id]
-            for target in campaign.targets:
-                if target.username == username:
-                    target.dm_sent = True
-                    target.dm_sent_at = datetime.now()
-                    campaign.metrics["dms_sent"] += 1
-                    break
+            await self._ensure_targets(campaign)
+            if campaign.targets.update(username, dm_sent=True, dm_sent_at=datetime.now()):
+                campaign.metrics["dms_sent"] += 1
+                campaign.mark_dirty()
         
         return success
     
@@ -449,50 +638,102 @@ class CampaignService:
         
         if targets:
             campaign = self.campaigns[campaign_id]
+            await self._ensure_targets(campaign)
+            campaign.mark_dirty()
             for target in targets:
                 campaign_target = CampaignTarget(
                     username=target.username,
                     engagement_score=target.followBackChance / 100,
                     tags_matched=[hashtag]
                 )
-                campaign.targets.append(campaign_target)
-                campaign.metrics["targets_scanned"] += 1
+                if campaign.targets.add(campaign_target):
+                    campaign.metrics["targets_scanned"] += 1
         
         return len(targets) > 0
     
     def get_all_campaigns(self) -> List[Dict[str, Any]]:
         """Get all campaigns with their current status"""
-        campaigns_data = []
+        return [self._campaign_summary(campaign) for campaign in self.campaigns.values()]
+    
+    def get_campaigns_etag(self) -> str:
+        """ETag covering the id and version of every campaign"""
+        digest = hashlib.blake2b(digest_size=12)
         for campaign in self.campaigns.values():
-            campaigns_data.append({
-                "id": campaign.id,
-                "name": campaign.name,
-                "persona": campaign.persona,
-                "status": campaign.status.value,
-                "phase": campaign.phase.value,
-                "created_at": campaign.created_at.isoformat(),
-                "metrics": campaign.metrics,
-                "targets_count": len(campaign.targets),
-                "followback_rate": self._calculate_followback_rate(campaign)
-            })
-        return campaigns_data
+            digest.update(f"{campaign.id}:{self._campaign_version(campaign)};".encode())
+        return f'W/"{digest.hexdigest()}"'
     
-    def get_campaign(self, campaign_id: str) -> Optional[Dict[str, Any]]:
-        """Get specific campaign details"""
-        if campaign_id not in self.campaigns:
+    def get_campaign_etag(self, campaign_id: str) -> Optional[str]:
+        """ETag for a single campaign, or None if it does not exist"""
+        campaign = self.campaigns.get(campaign_id)
+        if campaign is None:
             return None
-        
-        campaign = self.campaigns[campaign_id]
-        return {
+        revision, targets_version = self._campaign_version(campaign)
+        return f'W/"{campaign.id}-{revision}-{targets_version}"'
+    
+    def _campaign_version(self, campaign: Campaign) -> tuple:
+        """Changes whenever the campaign or any of its targets is mutated"""
+        return (campaign.revision, campaign.targets.version)
+    
+    def _campaign_summary(self, campaign: Campaign) -> Dict[str, Any]:
+        """Summary dict for list responses, rebuilt only when the campaign version changes"""
+        version = self._campaign_version(campaign)
+        cached = self.summary_cache.get(campaign.id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        summary = {
             "id": campaign.id,
             "name": campaign.name,
             "persona": campaign.persona,
-            "target_hashtags": campaign.target_hashtags,
             "status": campaign.status.value,
             "phase": campaign.phase.value,
             "created_at": campaign.created_at.isoformat(),
-            "settings": campaign.settings,
-            "metrics": campaign.metrics,
-            "targets": [asdict(t) for t in campaign.targets],
+            "metrics": dict(campaign.metrics),
+            "targets_count": self._targets_count(campaign),
             "followback_rate": self._calculate_followback_rate(campaign)
         }
+        self.summary_cache[campaign.id] = (version, summary)
+        return summary
+    
+    def get_campaign(self, campaign_id: str) -> Optional[Dict[str, Any]]:
+        """Get specific campaign details; targets are served by get_campaign_targets"""
+        if campaign_id not in self.campaigns:
+            return None
+        
+        campaign = self.campaigns[campaign_id]
+        return {
+            **self._campaign_summary(campaign),
+            "target_hashtags": campaign.target_hashtags,
+            "settings": campaign.settings
+        }
+    
+    async def get_campaign_targets(self, campaign_id: str, offset: int = 0, limit: int = 50,
+                                   status: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Get one page of a campaign's targets, optionally filtered by status"""
+        if campaign_id not in self.campaigns:
+            return None
+        
+        campaign = self.campaigns[campaign_id]
+        await self._ensure_targets(campaign)
+        total = len(campaign.targets) if status is None else campaign.targets.count(status)
+        return {
+            "campaign_id": campaign_id,
+            "offset": offset,
+            "limit": limit,
+            "status": status,
+            "total": total,
+            "targets": [
+                self._target_dict(t) for t in campaign.targets.page(offset, limit, status)
+            ]
+        }
+    
+    def _target_dict(self, target: CampaignTarget) -> Dict[str, Any]:
+        return {
+            "username": target.username,
+            "followed_at": target.followed_at.isoformat() if target.followed_at else None,
+            "followed_back": target.followed_back,
+            "dm_sent": target.dm_sent,
+            "dm_sent_at": target.dm_sent_at.isoformat() if target.dm_sent_at else None,
+            "engagement_score": target.engagement_score,
+            "tags_matched": target.tags_matched
+        }
@@ -1,12 +1,13 @@
 import asyncio
-import aiohttp
 import json
 import time
-from typing import Optional, Dict, Any
-from playwright.async_api import Page
+from typing import Optional, Dict, Any, TYPE_CHECKING
 from backend.services.logging_service import LoggingService
 from backend.config.settings import settings
 
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
 class CaptchaService:
     def __init__(self, logging_service: LoggingService):
         self.logging_service = logging_service
@@ -17,7 +18,7 @@ class CaptchaService:
         self.poll_interval = 5
         self.max_wait_time = 300
         
-    async def detect_captcha(self, page: Page) -> bool:
+    async def detect_captcha(self, page: "Page") -> bool:
         """Detect if a captcha is present on the page"""
         try:
             current_url = page.url
@@ -42,7 +43,7 @@ class CaptchaService:
             await self.logging_service.log_system_message(f"Error detecting captcha: {str(e)}", "error")
             return False
     
-    async def solve_captcha(self, page: Page) -> bool:
+    async def solve_captcha(self, page: "Page") -> bool:
         """Solve captcha using 2Captcha service"""
         if not self.api_key:
             await self.logging_service.log_system_message("No captcha API key configured", "warning")
@@ -78,7 +79,7 @@ class CaptchaService:
             await self.logging_service.log_system_message(f"Captcha solving error: {str(e)}", "error")
             return False
     
-    async def _take_captcha_screenshot(self, page: Page) -> str:
+    async def _take_captcha_screenshot(self, page: "Page") -> str:
         """Take screenshot of captcha page"""
         try:
             screenshot_path = "/tmp/captcha.jpg"
@@ -89,7 +90,7 @@ class CaptchaService:
             await self.logging_service.log_system_message(f"Screenshot error: {str(e)}", "error")
             return ""
     
-    async def _extract_site_key(self, page: Page) -> Optional[str]:
+    async def _extract_site_key(self, page: "Page") -> Optional[str]:
         """Extract reCAPTCHA site key from page"""
         try:
             site_key = await page.evaluate("""
@@ -126,6 +127,7 @@ class CaptchaService:
     async def _submit_captcha_task(self, website_url: str, site_key: str) -> Optional[str]:
         """Submit captcha task to 2Captcha"""
         try:
+            import aiohttp
             async with aiohttp.ClientSession() as session:
                 payload = {
                     "clientKey": self.api_key,
@@ -157,6 +159,8 @@ class CaptchaService:
         try:
             start_time = time.time()
             
+            import aiohttp
+            
             async with aiohttp.ClientSession() as session:
                 while time.time() - start_time < self.max_wait_time:
                     payload = {
@@ -193,7 +197,7 @@ class CaptchaService:
             await self.logging_service.log_system_message(f"Solution polling error: {str(e)}", "error")
             return None
     
-    async def _inject_captcha_solution(self, page: Page, solution: str) -> bool:
+    async def _inject_captcha_solution(self, page: "Page", solution: str) -> bool:
         """Inject captcha solution into page"""
         try:
             await page.evaluate(f"""
@@ -241,6 +245,7 @@ class CaptchaService:
             }
         
         try:
+            import aiohttp
             async with aiohttp.ClientSession() as session:
                 payload = {
                     "clientKey": self.api_key,
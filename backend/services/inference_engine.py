@@ -0,0 +1,251 @@
+import asyncio
+import hashlib
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+from backend.error_handling import LLMException
+
+@dataclass
+class GenerationResult:
+    request_id: str
+    text: str
+    prompt_tokens: int
+    completion_tokens: int
+    finish_reason: str  # "stop", "length" or "aborted"
+
+class InferenceEngine:
+    """Async generation interface shared by the vLLM engine and the CPU fake"""
+
+    name = "engine"
+
+    async def generate(self, request_id: str, prompt: str, max_tokens: int,
+                       temperature: float, top_p: float = 0.9) -> GenerationResult:
+        """Generate a completion; cancelling the awaiting task aborts the request"""
+        try:
+            return await self._generate(request_id, prompt, max_tokens, temperature, top_p)
+        except asyncio.CancelledError:
+            await self.abort(request_id)
+            raise
+
+    async def _generate(self, request_id: str, prompt: str, max_tokens: int,
+                        temperature: float, top_p: float) -> GenerationResult:
+        raise NotImplementedError
+
+    async def abort(self, request_id: str):
+        """Stop a request and free its batch slot"""
+        raise NotImplementedError
+
+    async def shutdown(self):
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"engine": self.name}
+
+class VLLMAsyncEngine(InferenceEngine):
+    """vLLM's AsyncLLMEngine, which batches concurrent requests on the GPU without blocking the loop"""
+
+    name = "vllm"
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.active: Dict[str, float] = {}
+        self.completed = 0
+        self.aborted = 0
+
+    @classmethod
+    def create(
+        cls, model_name: str, max_model_len: Optional[int] = None, max_num_seqs: int = 256
+    ) -> "VLLMAsyncEngine":
+        """Build the engine; blocking, so call it from an executor"""
+        from vllm import AsyncEngineArgs, AsyncLLMEngine
+
+        engine_args = AsyncEngineArgs(
+            model=model_name,
+            tensor_parallel_size=1,
+            gpu_memory_utilization=0.8,
+            quantization="awq" if "awq" in model_name.lower() else None,
+            max_model_len=max_model_len,
+            max_num_seqs=max_num_seqs
+        )
+        return cls(AsyncLLMEngine.from_engine_args(engine_args))
+
+    async def _generate(self, request_id, prompt, max_tokens, temperature, top_p):
+        from vllm import SamplingParams
+
+        sampling_params = SamplingParams(temperature=temperature, max_tokens=max_tokens, top_p=top_p)
+        self.active[request_id] = time.monotonic()
+        final = None
+        try:
+            async for output in self.engine.generate(prompt, sampling_params, request_id):
+                final = output
+        except asyncio.CancelledError:
+            # Counted here because the finally below empties active before generate() calls abort()
+            self.aborted += 1
+            raise
+        finally:
+            self.active.pop(request_id, None)
+
+        if final is None:
+            raise LLMException(f"vLLM returned no output for request {request_id}")
+        self.completed += 1
+        completion = final.outputs[0]
+        return GenerationResult(
+            request_id=request_id,
+            text=completion.text,
+            prompt_tokens=len(final.prompt_token_ids or ()),
+            completion_tokens=len(completion.token_ids),
+            finish_reason=completion.finish_reason or "stop"
+        )
+
+    async def abort(self, request_id: str):
+        if self.active.pop(request_id, None) is not None:
+            self.aborted += 1
+        await self.engine.abort(request_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "engine": self.name,
+            "running": len(self.active),
+            "completed": self.completed,
+            "aborted": self.aborted
+        }
+
+@dataclass
+class _Sequence:
+    request_id: str
+    prompt_tokens: List[str]
+    max_tokens: int
+    future: asyncio.Future
+    output: List[str] = field(default_factory=list)
+    seed: int = 0
+
+class FakeAsyncEngine(InferenceEngine):
+    """CPU stand-in with vLLM-style continuous batching, for exercising scheduling without a GPU.
+
+    Every step emits one token for each running sequence. Waiting requests join
+    between steps as slots free up, and finished or aborted sequences leave
+    immediately. Step time grows with batch size to mimic a real decoder.
+    """
+
+    name = "fake"
+
+    _VOCAB = ("the", "campaign", "followers", "engagement", "post", "story", "growth", "target",
+              "hashtag", "reach", "audience", "content", "timing", "insight", "strategy", "trend")
+
+    def __init__(self, max_batch_size: int = 8, step_seconds: float = 0.01,
+                 per_sequence_seconds: float = 0.001, stop_probability: float = 0.0):
+        self.max_batch_size = max_batch_size
+        self.step_seconds = step_seconds
+        self.per_sequence_seconds = per_sequence_seconds
+        self.stop_probability = stop_probability
+        self.waiting: Deque[_Sequence] = deque()
+        self.running: Dict[str, _Sequence] = {}
+        self.steps = 0
+        self.tokens_generated = 0
+        self.max_observed_batch = 0
+        self.completed = 0
+        self.aborted = 0
+        self._wakeup = asyncio.Event()
+        self._loop_task: Optional[asyncio.Task] = None
+
+    async def _generate(self, request_id, prompt, max_tokens, temperature, top_p):
+        self._ensure_loop()
+        sequence = _Sequence(
+            request_id=request_id,
+            prompt_tokens=prompt.split(),
+            max_tokens=max(1, max_tokens),
+            future=asyncio.get_running_loop().create_future(),
+            seed=int(hashlib.blake2b(prompt.encode("utf-8"), digest_size=4).hexdigest(), 16)
+        )
+        self.waiting.append(sequence)
+        self._wakeup.set()
+        return await sequence.future
+
+    async def abort(self, request_id: str):
+        sequence = self.running.pop(request_id, None)
+        if sequence is None:
+            sequence = next((s for s in self.waiting if s.request_id == request_id), None)
+            if sequence is not None:
+                self.waiting.remove(sequence)
+        if sequence is None:
+            return
+        self.aborted += 1
+        if not sequence.future.done():
+            sequence.future.set_result(self._result(sequence, "aborted"))
+
+    async def shutdown(self):
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+            self._loop_task = None
+        for sequence in list(self.waiting) + list(self.running.values()):
+            if not sequence.future.done():
+                sequence.future.cancel()
+        self.waiting.clear()
+        self.running.clear()
+
+    def _ensure_loop(self):
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._step_loop())
+
+    async def _step_loop(self):
+        while True:
+            if not self.waiting and not self.running:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            while self.waiting and len(self.running) < self.max_batch_size:
+                sequence = self.waiting.popleft()
+                self.running[sequence.request_id] = sequence
+            self.max_observed_batch = max(self.max_observed_batch, len(self.running))
+
+            await asyncio.sleep(self.step_seconds + self.per_sequence_seconds * len(self.running))
+            self.steps += 1
+
+            for request_id, sequence in list(self.running.items()):
+                token = self._next_token(sequence)
+                sequence.output.append(token)
+                self.tokens_generated += 1
+                finish_reason = None
+                if len(sequence.output) >= sequence.max_tokens:
+                    finish_reason = "length"
+                elif self.stop_probability and (sequence.seed + len(sequence.output)) % 1000 < self.stop_probability * 1000:
+                    finish_reason = "stop"
+                if finish_reason:
+                    del self.running[request_id]
+                    self.completed += 1
+                    if not sequence.future.done():
+                        sequence.future.set_result(self._result(sequence, finish_reason))
+
+    def _next_token(self, sequence: _Sequence) -> str:
+        """Deterministic pseudo-token so identical prompts give identical completions"""
+        position = len(sequence.output)
+        if sequence.prompt_tokens and position % 5 == 4:
+            return sequence.prompt_tokens[(sequence.seed + position) % len(sequence.prompt_tokens)]
+        return self._VOCAB[(sequence.seed // (position + 1) + position) % len(self._VOCAB)]
+
+    def _result(self, sequence: _Sequence, finish_reason: str) -> GenerationResult:
+        return GenerationResult(
+            request_id=sequence.request_id,
+            text=" ".join(sequence.output),
+            prompt_tokens=len(sequence.prompt_tokens),
+            completion_tokens=len(sequence.output),
+            finish_reason=finish_reason
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "engine": self.name,
+            "waiting": len(self.waiting),
+            "running": len(self.running),
+            "max_batch_size": self.max_batch_size,
+            "max_observed_batch": self.max_observed_batch,
+            "steps": self.steps,
+            "tokens_generated": self.tokens_generated,
+            "completed": self.completed,
+            "aborted": self.aborted
+        }
@@ -1,20 +1,22 @@
 import asyncio
 import random
-from typing import Optional, List, Dict, Any
-from playwright.async_api import async_playwright, Browser, Page, BrowserContext
+from typing import Optional, List, Dict, Any, TYPE_CHECKING
 from datetime import datetime, timedelta
 from backend.models import LogEntry, Target
 from backend.services.logging_service import LoggingService
 from backend.services.captcha_service import CaptchaService
 from backend.config.settings import settings
 
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, Page, BrowserContext
+
 class InstagramService:
     def __init__(self, logging_service: LoggingService):
         self.logging_service = logging_service
         self.captcha_service = CaptchaService(logging_service)
-        self.browser: Optional[Browser] = None
-        self.context: Optional[BrowserContext] = None
-        self.page: Optional[Page] = None
+        self.browser: Optional["Browser"] = None
+        self.context: Optional["BrowserContext"] = None
+        self.page: Optional["Page"] = None
         self.is_logged_in = False
         self.username = None
         self.action_queue = asyncio.Queue()
@@ -31,6 +33,8 @@ class InstagramService:
             return True
             
         try:
+            from playwright.async_api import async_playwright
+            
             playwright = await async_playwright().start()
             self.browser = await playwright.chromium.launch(
                 headless=settings.browser_headless,
@@ -1,17 +1,89 @@
 import asyncio
+import ctypes
+import gc
+import importlib.util
 import json
-import torch
-from typing import Optional, Dict, Any, List
-from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
-from datetime import datetime
+import os
+import time
+import uuid
+from collections import OrderedDict
+from enum import Enum
+from typing import Optional, Dict, Any, List, Tuple
+from datetime import datetime, timedelta
 from backend.services.logging_service import LoggingService
 from backend.config.settings import settings
+from backend.error_handling import LLMException, LLMNotReadyException
+from backend.metrics import registry
+from backend.tracing import start_span
+from backend.services.inference_engine import InferenceEngine, VLLMAsyncEngine, FakeAsyncEngine
+from backend.services.model_cache import LoadTimer, ModelCache, build_model_from_mmap, stored_dtypes
+from backend.services.prompt_builder import (
+    PromptBuilder, aggregate_logs, estimate_tokens, render_activity_series, render_fields,
+    render_log_aggregates, render_recent_logs, render_top_errors
+)
 
-try:
-    from vllm import LLM, SamplingParams
-    VLLM_AVAILABLE = True
-except ImportError:
-    VLLM_AVAILABLE = False
+VLLM_AVAILABLE = importlib.util.find_spec("vllm") is not None
+GGUF_AVAILABLE = importlib.util.find_spec("llama_cpp") is not None
+
+LLM_BACKENDS = ("vllm", "transformers", "quantized", "gguf", "fake")
+
+LLM_REQUESTS = registry.counter("llm_requests", "generate_text calls by how they were served", ["result"])
+LLM_QUEUE_WAIT_SECONDS = registry.histogram(
+    "llm_queue_wait_seconds", "Time generation requests waited for the model to be ready"
+)
+LLM_GENERATION_SECONDS = registry.histogram("llm_generation_seconds", "Model generation time", ["backend"])
+LLM_TOKENS_PER_SECOND = registry.histogram(
+    "llm_tokens_per_second", "Completion tokens generated per second", ["backend"],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+)
+LLM_COMPLETION_TOKENS = registry.counter("llm_completion_tokens", "Completion tokens generated", ["backend"])
+
+def _available_memory_bytes() -> Optional[int]:
+    """Return the memory available to new allocations, or None if unknown"""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def _process_rss_bytes() -> Optional[int]:
+    """Return the resident set size of this process, or None if unknown"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+def _release_freed_memory():
+    """Ask glibc to hand freed heap pages back to the OS after an unload"""
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+def _tensor_bytes(value: Any) -> int:
+    """Sum the storage size of a tensor or a (nested) tuple of tensors"""
+    if isinstance(value, (tuple, list)):
+        return sum(_tensor_bytes(v) for v in value)
+    if hasattr(value, "numel") and hasattr(value, "element_size"):
+        return value.numel() * value.element_size()
+    return 0
+
+class ModelState(Enum):
+    UNLOADED = "unloaded"
+    LOADING = "loading"
+    WARMING = "warming"
+    READY = "ready"
+    FAILED = "failed"
 
 class LLMService:
     def __init__(self, logging_service: LoggingService, model_name: Optional[str] = None):
@@ -20,24 +92,106 @@ class LLMService:
         self.fallback_model = settings.llm_fallback_model
         self.tokenizer = None
         self.model = None
-        self.vllm_model = None
+        self.engine: Optional[InferenceEngine] = None
+        self.gguf_model = None
         self.pipeline = None
-        self.is_loaded = False
+        self.model_cache = ModelCache(settings.llm_model_cache_dir, settings.llm_offline)
+        self.weights_mmapped = False
+        self.backend: Optional[str] = None
+        self.cpu_low_memory = False
+        self.state = ModelState.UNLOADED
+        self.state_changed_at = datetime.now()
+        self.load_error: Optional[str] = None
+        self.ready_event = asyncio.Event()
+        self.load_task: Optional[asyncio.Task] = None
         self.use_vllm = VLLM_AVAILABLE
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.device = "cpu"
         self.fallback_mode = False
-        
+        self.active_requests = 0
+        self.last_used = time.monotonic()
+        self.idle_task: Optional[asyncio.Task] = None
+        self.lifecycle_stats = {
+            "load_count": 0,
+            "unload_count": 0,
+            "last_load_seconds": None,
+            "last_unload_seconds": None,
+            "total_load_seconds": 0.0,
+            "last_loaded_at": None,
+            "last_load_phases": None,
+            "last_unloaded_at": None
+        }
+        self.inflight: Dict[tuple, asyncio.Future] = {}
+        self.inflight_waiters: Dict[tuple, int] = {}
+        self.result_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.coalescing_stats = {"generations": 0, "coalesced": 0, "cache_hits": 0}
+        self.token_usage: Dict[str, Dict[str, int]] = {}
+    
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the model has finished loading (successfully or in fallback mode)"""
+        return self.state in (ModelState.READY, ModelState.FAILED)
+    
+    def _set_state(self, state: ModelState):
+        """Move the model to a new lifecycle state"""
+        self.state = state
+        self.state_changed_at = datetime.now()
+        if self.is_loaded:
+            self.ready_event.set()
+        else:
+            self.ready_event.clear()
+    
+    def start_loading(self) -> Optional[asyncio.Task]:
+        """Start loading the model in the background if it is not already loading"""
+        if self.state == ModelState.UNLOADED and (self.load_task is None or self.load_task.done()):
+            self.load_task = asyncio.create_task(self.initialize())
+        if settings.llm_idle_unload_minutes > 0 and (self.idle_task is None or self.idle_task.done()):
+            self.idle_task = asyncio.create_task(self._idle_unload_loop())
+        return self.load_task
+    
     async def initialize(self):
         """Initialize the LLM model with fallback support"""
+        self._set_state(ModelState.LOADING)
+        self.load_error = None
+        self.fallback_mode = False
+        started = time.perf_counter()
         try:
             await self.logging_service.log_system_message(f"Loading LLM model: {self.model_name}")
             
-            if self.use_vllm and self.device == "cuda":
+            if settings.llm_inference_mode == "process":
+                await self._load_worker()
+                self._record_load(time.perf_counter() - started)
+                self._set_state(ModelState.READY)
+                return
+            
+            if settings.llm_backend.lower() == "fake":
+                self.device = "cpu"
+            else:
+                self.device = await asyncio.get_event_loop().run_in_executor(None, self._detect_device)
+            
+            self.backend = await asyncio.get_event_loop().run_in_executor(
+                None, self._select_backend, self.model_name
+            )
+            await self.logging_service.log_system_message(
+                f"Selected LLM backend: {self.backend} ({self.device})"
+                + (", 16-bit weights because the float32 estimate exceeds available memory" if self.cpu_low_memory else "")
+            )
+            
+            success = False
+            if self.backend == "vllm":
                 success = await self._try_load_vllm()
-                if success:
-                    return
+            elif self.backend == "fake":
+                success = await self._try_load_fake()
+            elif self.backend == "gguf":
+                success = await self._try_load_gguf()
+                if not success:
+                    self.backend = await asyncio.get_event_loop().run_in_executor(
+                        None, self._select_cpu_backend, self.model_name
+                    )
             
-            success = await self._try_load_transformers(self.model_name)
+            if not success:
+                if self.backend == "vllm":
+                    self.backend = "transformers"
+                success = await self._try_load_transformers(self.model_name)
             if not success:
                 await self.logging_service.log_system_message(f"Primary model failed, trying fallback: {self.fallback_model}")
                 success = await self._try_load_transformers(self.fallback_model)
@@ -46,89 +200,474 @@ class LLMService:
                     
             if not success:
                 await self.logging_service.log_system_message("All models failed, using dummy responses", "warning")
-                self.is_loaded = True
                 self.fallback_mode = True
+                self.load_error = self.load_error or "All models failed to load"
+                self._set_state(ModelState.FAILED)
+                return
+            
+            await self._warmup()
+            self._record_load(time.perf_counter() - started)
+            self._set_state(ModelState.READY)
                 
         except Exception as e:
             await self.logging_service.log_system_message(f"Failed to initialize LLM: {str(e)}", "error")
-            self.is_loaded = True
+            self.load_error = str(e)
             self.fallback_mode = True
+            self._set_state(ModelState.FAILED)
+    
+    def _record_load(self, elapsed: float):
+        """Track how long a successful model load took"""
+        self.last_used = time.monotonic()
+        self.lifecycle_stats["load_count"] += 1
+        self.lifecycle_stats["last_load_seconds"] = round(elapsed, 3)
+        self.lifecycle_stats["total_load_seconds"] = round(self.lifecycle_stats["total_load_seconds"] + elapsed, 3)
+        self.lifecycle_stats["last_loaded_at"] = datetime.now().isoformat()
+    
+    async def unload(self, reason: str = "manual") -> bool:
+        """Release the loaded model; the next request reloads it transparently"""
+        if self.state != ModelState.READY or self.active_requests > 0:
+            return False
+        
+        started = time.perf_counter()
+        self._set_state(ModelState.UNLOADED)
+        self.pipeline = None
+        self.model = None
+        self.tokenizer = None
+        self.gguf_model = None
+        self.weights_mmapped = False
+        self.result_cache.clear()
+        # Detach before awaiting: a request arriving meanwhile sees UNLOADED and may load a new engine
+        engine, self.engine = self.engine, None
+        if engine is not None:
+            await engine.shutdown()
+        
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._release_memory)
+        
+        elapsed = time.perf_counter() - started
+        self.lifecycle_stats["unload_count"] += 1
+        self.lifecycle_stats["last_unload_seconds"] = round(elapsed, 3)
+        self.lifecycle_stats["last_unloaded_at"] = datetime.now().isoformat()
+        await self.logging_service.log_system_message(
+            f"LLM model unloaded ({reason}) in {elapsed:.2f}s"
+        )
+        return True
+    
+    def _release_memory(self):
+        """Collect dropped model objects and return their memory to the OS"""
+        gc.collect()
+        if self.device == "cuda":
+            import torch
+            torch.cuda.empty_cache()
+        _release_freed_memory()
+    
+    async def shutdown(self):
+        """Stop background tasks and the inference engine on application exit"""
+        if self.idle_task is not None:
+            self.idle_task.cancel()
+        if self.load_task is not None and not self.load_task.done():
+            self.load_task.cancel()
+        engine, self.engine = self.engine, None
+        if engine is not None:
+            await engine.shutdown()
+    
+    async def _idle_unload_loop(self):
+        """Unload the model after llm_idle_unload_minutes without requests"""
+        idle_limit = settings.llm_idle_unload_minutes * 60
+        while True:
+            await asyncio.sleep(min(60, idle_limit))
+            idle_for = time.monotonic() - self.last_used
+            if self.state == ModelState.READY and self.active_requests == 0 and idle_for >= idle_limit:
+                await self.unload(f"idle for {idle_for / 60:.0f} minutes")
+    
+    def _detect_device(self) -> str:
+        """Import torch and detect the inference device"""
+        try:
+            import torch
+            return "cuda" if torch.cuda.is_available() else "cpu"
+        except ImportError:
+            return "cpu"
+    
+    def _select_backend(self, model_name: str) -> str:
+        """Pick an inference backend from settings, device and available RAM"""
+        requested = settings.llm_backend.lower()
+        if requested in LLM_BACKENDS:
+            return requested
+        
+        if self.device == "cuda":
+            return "vllm" if self.use_vllm else "transformers"
+        
+        if GGUF_AVAILABLE and settings.llm_gguf_model_path and os.path.exists(settings.llm_gguf_model_path):
+            return "gguf"
+        
+        return self._select_cpu_backend(model_name)
+    
+    def _select_cpu_backend(self, model_name: str) -> str:
+        """Pick a transformers load whose peak memory fits in available RAM.
+
+        Dynamic int8 quantization converts a fully loaded float32 model, so its
+        peak is the float32 size even though the result is smaller. When float32
+        does not fit, load 16-bit weights instead, which halves the peak.
+        """
+        self.cpu_low_memory = False
+        estimated_bytes = self._estimate_fp32_bytes(model_name)
+        available = _available_memory_bytes()
+        if not estimated_bytes or not available:
+            return "quantized"
+        if available < estimated_bytes * settings.llm_cpu_fp32_headroom:
+            self.cpu_low_memory = True
+        return "transformers"
+    
+    def _estimate_fp32_bytes(self, model_name: str) -> Optional[int]:
+        """Estimate the float32 weight size of a model from its config"""
+        try:
+            from transformers import AutoConfig
+            config = AutoConfig.from_pretrained(self.model_cache.config_path(model_name), local_files_only=True)
+            hidden = config.hidden_size
+            layers = config.num_hidden_layers
+            intermediate = getattr(config, "intermediate_size", None) or 4 * hidden
+            vocab = config.vocab_size
+            params = 2 * vocab * hidden + layers * (4 * hidden * hidden + 3 * hidden * intermediate)
+            return params * 4
+        except Exception:
+            return None
+    
+    async def _warmup(self):
+        """Run a short generation to prime kernels and caches before serving"""
+        if not settings.llm_warmup_enabled:
+            return
+        
+        self._set_state(ModelState.WARMING)
+        started = time.perf_counter()
+        try:
+            await self._generate(settings.llm_warmup_prompt, 8, settings.llm_temperature)
+            elapsed = time.perf_counter() - started
+            await self.logging_service.log_system_message(f"LLM warmup completed in {elapsed:.2f}s")
+        except Exception as e:
+            await self.logging_service.log_system_message(f"LLM warmup failed: {str(e)}", "warning")
     
     async def _try_load_vllm(self) -> bool:
-        """Try to load model with vLLM"""
+        """Try to start the vLLM async engine"""
         try:
-            self.vllm_model = LLM(
-                model=self.model_name,
-                tensor_parallel_size=1,
-                gpu_memory_utilization=0.8,
-                quantization="awq" if "awq" in self.model_name.lower() else None
+            loop = asyncio.get_event_loop()
+            self.engine = await loop.run_in_executor(
+                None, VLLMAsyncEngine.create, self.model_name, settings.llm_context_length,
+                settings.llm_max_batch_size
             )
-            self.is_loaded = True
             await self.logging_service.log_system_message(f"vLLM model loaded successfully: {self.model_name}")
             return True
         except Exception as e:
+            self.load_error = str(e)
             await self.logging_service.log_system_message(f"vLLM loading failed: {str(e)}", "warning")
             return False
     
+    async def _load_worker(self):
+        """Start the out-of-process inference worker, which loads the model itself"""
+        from backend.services.llm_worker import WorkerEngine
+        
+        self.backend = "worker"
+        self.device = "worker"
+        engine = WorkerEngine(
+            self.logging_service,
+            socket_path=settings.llm_worker_socket,
+            start_timeout=settings.llm_worker_start_timeout,
+            ready_timeout=settings.llm_ready_timeout,
+            restart_delay=settings.llm_worker_restart_delay
+        )
+        await engine.start()
+        self.engine = engine
+        self.fallback_mode = engine.worker_info.get("fallback_mode", False)
+        await self.logging_service.log_system_message(
+            f"Inference worker ready: {engine.worker_info.get('backend')} on {engine.worker_info.get('device')}"
+        )
+    
+    async def _try_load_fake(self) -> bool:
+        """Use the CPU fake engine, which exercises batching and cancellation without a model"""
+        self.engine = FakeAsyncEngine(max_batch_size=settings.llm_max_batch_size)
+        await self.logging_service.log_system_message("Fake inference engine loaded")
+        return True
+    
+    async def _try_load_gguf(self) -> bool:
+        """Try to load a GGUF model with llama.cpp for quantized CPU inference"""
+        try:
+            from llama_cpp import Llama
+            
+            loop = asyncio.get_event_loop()
+            self.gguf_model = await loop.run_in_executor(None, lambda: Llama(
+                model_path=settings.llm_gguf_model_path,
+                n_ctx=settings.llm_context_length,
+                n_threads=settings.llm_cpu_threads or None,
+                use_mmap=True,
+                verbose=False
+            ))
+            await self.logging_service.log_system_message(f"GGUF model loaded successfully: {settings.llm_gguf_model_path}")
+            return True
+        except Exception as e:
+            self.load_error = str(e)
+            await self.logging_service.log_system_message(f"GGUF loading failed: {str(e)}", "warning")
+            return False
+    
     async def _try_load_transformers(self, model_name: str) -> bool:
         """Try to load model with transformers"""
         try:
-            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+            loop = asyncio.get_event_loop()
+            timer = await loop.run_in_executor(None, self._load_transformers_sync, model_name)
+            self.lifecycle_stats["last_load_phases"] = timer.phases
+            await self.logging_service.log_system_message(
+                f"Transformers model loaded successfully: {model_name} ({timer.summary()})"
+            )
+            if self.device == "cpu" and settings.llm_mmap_weights and not self.weights_mmapped:
+                await self.logging_service.log_system_message(
+                    f"Weights of {model_name} were copied into private memory, not mmapped: the checkpoint is not "
+                    f"safetensors in the CPU dtype in use (LLM_CPU_DTYPE={settings.llm_cpu_dtype})", "warning"
+                )
+            return True
+        except Exception as e:
+            self.load_error = str(e)
+            await self.logging_service.log_system_message(f"Transformers loading failed for {model_name}: {str(e)}", "warning")
+            return False
+    
+    def _load_transformers_sync(self, model_name: str) -> LoadTimer:
+        """Load tokenizer, model and pipeline from the pinned local snapshot; runs in an executor thread"""
+        import torch
+        from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
+        
+        if settings.llm_cpu_threads and self.device == "cpu":
+            torch.set_num_threads(settings.llm_cpu_threads)
+        
+        timer = LoadTimer()
+        with timer.phase("resolve"):
+            path = self.model_cache.resolve(model_name)
+        
+        with timer.phase("tokenizer"):
+            self.tokenizer = AutoTokenizer.from_pretrained(path, local_files_only=True)
             if self.tokenizer.pad_token is None:
                 self.tokenizer.pad_token = self.tokenizer.eos_token
-                
-            self.model = AutoModelForCausalLM.from_pretrained(
-                model_name,
-                torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
-                device_map="auto" if self.device == "cuda" else None,
-                load_in_8bit=True if self.device == "cuda" else False
-            )
-            
+        
+        with timer.phase("weights"):
+            dtype = self._weights_dtype(path)
+            self.weights_mmapped = self.device == "cpu" and settings.llm_mmap_weights and dtype is not None
+            if self.weights_mmapped:
+                self.model = build_model_from_mmap(path, dtype)
+            else:
+                self.model = AutoModelForCausalLM.from_pretrained(
+                    path,
+                    local_files_only=True,
+                    torch_dtype=torch.float16 if self.device == "cuda" else getattr(torch, self._cpu_dtype(path)),
+                    device_map="auto" if self.device == "cuda" else None,
+                    load_in_8bit=True if self.device == "cuda" else False,
+                    low_cpu_mem_usage=True
+                )
+        
+        if self.backend == "quantized" and self.device == "cpu":
+            with timer.phase("quantize"):
+                # In place: a copy would hold the float32 model and its int8 twin at once
+                self.model = torch.ao.quantization.quantize_dynamic(
+                    self.model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+                )
+        
+        with timer.phase("pipeline"):
             self.pipeline = pipeline(
                 "text-generation",
                 model=self.model,
                 tokenizer=self.tokenizer,
                 device=0 if self.device == "cuda" else -1,
-                torch_dtype=torch.float16 if self.device == "cuda" else torch.float32
+                torch_dtype=torch.float16 if self.device == "cuda" else self.model.dtype
             )
-            
-            self.is_loaded = True
-            await self.logging_service.log_system_message(f"Transformers model loaded successfully: {model_name}")
-            return True
-        except Exception as e:
-            await self.logging_service.log_system_message(f"Transformers loading failed for {model_name}: {str(e)}", "warning")
-            return False
+        return timer
     
-    async def generate_text(self, prompt: str, max_length: int = 150, temperature: float = 0.7) -> str:
-        """Generate text using the LLM"""
-        if not self.is_loaded:
-            return "LLM not loaded"
+    def _cpu_dtype(self, path: str) -> str:
+        """CPU weight dtype from settings; "auto" keeps the checkpoint's own floating dtype"""
+        if self.backend == "quantized":
+            return "float32"  # dynamic int8 quantization only accepts float32 Linear weights
+        if settings.llm_cpu_dtype != "auto":
+            dtype = settings.llm_cpu_dtype
+        else:
+            floating = {dtype for dtype in stored_dtypes(path) if dtype.startswith(("float", "bfloat"))}
+            dtype = floating.pop() if len(floating) == 1 else "float32"
+        if self.cpu_low_memory and dtype == "float32":
+            return "bfloat16"  # the backend selector found the float32 peak would not fit
+        return dtype
+    
+    def _weights_dtype(self, path: str) -> Optional[str]:
+        """The dtype to map safetensors weights as, or None when they would need converting"""
+        try:
+            floating = {dtype for dtype in stored_dtypes(path) if dtype.startswith(("float", "bfloat"))}
+        except (OSError, ValueError, KeyError):
+            return None
+        target = self._cpu_dtype(path)
+        return target if floating == {target} else None
+    
+    async def wait_until_ready(self, timeout: Optional[float] = None):
+        """Wait for the model according to the not-ready policy, raising LLMNotReadyException"""
+        if self.is_loaded:
+            return
         
-        if self.fallback_mode and not self.model:
-            return self._get_dummy_response(prompt)
+        self.start_loading()
         
+        if settings.llm_not_ready_policy == "reject":
+            raise LLMNotReadyException(
+                f"LLM model is {self.state.value}",
+                {"state": self.state.value}
+            )
+        
+        timeout = settings.llm_ready_timeout if timeout is None else timeout
         try:
-            if self.vllm_model:
-                return await self._generate_vllm(prompt, max_length, temperature)
-            elif self.pipeline:
-                return await self._generate_transformers(prompt, max_length, temperature)
+            await asyncio.wait_for(self.ready_event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            raise LLMNotReadyException(
+                f"LLM model not ready after {timeout:.0f}s (state: {self.state.value})",
+                {"state": self.state.value, "timeout": timeout}
+            )
+    
+    async def generate_text(self, prompt: str, max_length: int = 150, temperature: float = 0.7) -> str:
+        """Generate text using the LLM, sharing work between identical concurrent requests"""
+        with start_span("llm.generate_text", {"llm.prompt_chars": len(prompt), "llm.max_length": max_length}) as span:
+            key = (prompt, max_length, temperature)
+            
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                if cached[0] > time.monotonic():
+                    self.coalescing_stats["cache_hits"] += 1
+                    LLM_REQUESTS.labels("cache_hit").inc()
+                    span.set_attribute("llm.result", "cache_hit")
+                    self.last_used = time.monotonic()
+                    return cached[1]
+                del self.result_cache[key]
+            
+            future = self.inflight.get(key)
+            if future is None:
+                future = asyncio.ensure_future(self._generate_text_uncached(prompt, max_length, temperature))
+                self.inflight[key] = future
+                future.add_done_callback(lambda f: self._finish_inflight(key, f))
+                self.coalescing_stats["generations"] += 1
+                LLM_REQUESTS.labels("generated").inc()
+                span.set_attribute("llm.result", "generated")
             else:
-                return self._get_dummy_response(prompt)
-                
-        except Exception as e:
-            await self.logging_service.log_system_message(f"Text generation error: {str(e)}", "error")
-            return self._get_dummy_response(prompt)
+                self.coalescing_stats["coalesced"] += 1
+                LLM_REQUESTS.labels("coalesced").inc()
+                span.set_attribute("llm.result", "coalesced")
+            
+            self.inflight_waiters[key] = self.inflight_waiters.get(key, 0) + 1
+            try:
+                text, _ = await asyncio.shield(future)
+                return text
+            except asyncio.CancelledError:
+                if self.inflight_waiters[key] == 1 and not future.done():
+                    future.cancel()
+                raise
+            finally:
+                remaining = self.inflight_waiters[key] - 1
+                if remaining:
+                    self.inflight_waiters[key] = remaining
+                else:
+                    del self.inflight_waiters[key]
     
-    async def _generate_vllm(self, prompt: str, max_length: int, temperature: float) -> str:
-        """Generate text using vLLM"""
-        sampling_params = SamplingParams(
-            temperature=temperature,
+    def _finish_inflight(self, key: tuple, future: asyncio.Future):
+        """Drop a finished generation from the in-flight table and cache its result"""
+        self.inflight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        
+        text, generated = future.result()
+        if generated and settings.llm_result_cache_ttl > 0 and self.state == ModelState.READY:
+            self.result_cache[key] = (time.monotonic() + settings.llm_result_cache_ttl, text)
+            while len(self.result_cache) > settings.llm_result_cache_size:
+                self.result_cache.popitem(last=False)
+    
+    async def _generate_text_uncached(self, prompt: str, max_length: int, temperature: float) -> Tuple[str, bool]:
+        """Wait for the model and run a single generation; the flag is False for fallback text, which is never cached"""
+        self.active_requests += 1
+        self.last_used = time.monotonic()
+        try:
+            with start_span("llm.wait_until_ready", {"llm.state": self.state.value}):
+                started = time.perf_counter()
+                await self.wait_until_ready()
+                LLM_QUEUE_WAIT_SECONDS.observe(time.perf_counter() - started)
+            
+            if self.state == ModelState.FAILED:
+                return self._get_dummy_response(prompt), False
+            
+            try:
+                with start_span("llm.generate", {"llm.backend": self.backend or "unknown"}):
+                    started = time.perf_counter()
+                    text = await self._generate(prompt, max_length, temperature)
+                    self._record_generation(text, time.perf_counter() - started)
+                return text, True
+            except Exception as e:
+                await self.logging_service.log_system_message(f"Text generation error: {str(e)}", "error")
+                return self._get_dummy_response(prompt), False
+        finally:
+            self.active_requests -= 1
+            self.last_used = time.monotonic()
+    
+    def _record_generation(self, text: str, elapsed: float):
+        """Feed generation time and throughput into the metrics registry"""
+        backend = self.backend or "unknown"
+        tokens = self.count_tokens(text)
+        LLM_GENERATION_SECONDS.labels(backend).observe(elapsed)
+        LLM_COMPLETION_TOKENS.labels(backend).inc(tokens)
+        if elapsed > 0:
+            LLM_TOKENS_PER_SECOND.labels(backend).observe(tokens / elapsed)
+    
+    async def generate_with_usage(self, prompt: str, max_length: int = 150, temperature: float = 0.7,
+                                  endpoint: str = "generate") -> Dict[str, Any]:
+        """Generate text and report prompt/completion token counts for the call"""
+        text = await self.generate_text(prompt, max_length, temperature)
+        usage = {
+            "prompt_tokens": self.count_tokens(prompt),
+            "completion_tokens": self.count_tokens(text)
+        }
+        
+        totals = self.token_usage.setdefault(endpoint, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+        totals["calls"] += 1
+        totals["prompt_tokens"] += usage["prompt_tokens"]
+        totals["completion_tokens"] += usage["completion_tokens"]
+        
+        return {"text": text, "usage": usage}
+    
+    def count_tokens(self, text: str) -> int:
+        """Count tokens with the loaded tokenizer, falling back to an estimate"""
+        try:
+            if self.tokenizer is not None:
+                return len(self.tokenizer.encode(text, add_special_tokens=False))
+            if self.gguf_model is not None:
+                return len(self.gguf_model.tokenize(text.encode("utf-8"), add_bos=False))
+        except Exception:
+            pass
+        return estimate_tokens(text)
+    
+    def _prompt_builder(self, budget: int, max_length: int) -> PromptBuilder:
+        """Create a prompt builder whose budget also leaves room for the completion"""
+        budget = min(budget, settings.llm_context_length - max_length)
+        return PromptBuilder(budget, self.count_tokens)
+    
+    async def _generate(self, prompt: str, max_length: int, temperature: float) -> str:
+        """Dispatch generation to the loaded backend"""
+        if self.engine:
+            return await self._generate_engine(prompt, max_length, temperature)
+        elif self.gguf_model:
+            return await self._generate_gguf(prompt, max_length, temperature)
+        elif self.pipeline:
+            return await self._generate_transformers(prompt, max_length, temperature)
+        else:
+            raise LLMException("No model is loaded")
+    
+    async def _generate_engine(self, prompt: str, max_length: int, temperature: float) -> str:
+        """Generate through the async engine; cancelling the caller aborts the request"""
+        result = await self.engine.generate(uuid.uuid4().hex, prompt, max_length, temperature, top_p=0.9)
+        return result.text.strip()
+    
+    async def _generate_gguf(self, prompt: str, max_length: int, temperature: float) -> str:
+        """Generate text using llama.cpp"""
+        loop = asyncio.get_event_loop()
+        output = await loop.run_in_executor(None, lambda: self.gguf_model(
+            prompt,
             max_tokens=max_length,
+            temperature=temperature,
             top_p=0.9
-        )
-        
-        outputs = self.vllm_model.generate([prompt], sampling_params)
-        return outputs[0].outputs[0].text.strip()
+        ))
+        return output["choices"][0]["text"].strip()
     
     async def _generate_transformers(self, prompt: str, max_length: int, temperature: float) -> str:
         """Generate text using transformers pipeline"""
@@ -143,21 +682,17 @@ class LLMService:
         return response
     
     def _generate_sync(self, prompt: str, max_length: int, temperature: float) -> str:
-        """Synchronous text generation"""
-        try:
-            outputs = self.pipeline(
-                prompt,
-                max_length=max_length,
-                temperature=temperature,
-                do_sample=True,
-                pad_token_id=self.tokenizer.eos_token_id,
-                return_full_text=False
-            )
-            
-            return outputs[0]['generated_text'].strip()
-            
-        except Exception as e:
-            return f"Generation error: {str(e)}"
+        """Synchronous text generation; errors propagate so the caller falls back without caching"""
+        outputs = self.pipeline(
+            prompt,
+            max_new_tokens=max_length,
+            temperature=temperature,
+            do_sample=True,
+            pad_token_id=self.tokenizer.eos_token_id,
+            return_full_text=False
+        )
+        
+        return outputs[0]['generated_text'].strip()
     
     def _get_dummy_response(self, prompt: str) -> str:
         """Generate dummy responses for fallback mode"""
@@ -176,27 +711,35 @@ class LLMService:
         """Legacy method for backward compatibility"""
         return await self.generate_text(prompt, max_length, temperature)
     
-    async def analyze_logs(self, logs: List[Dict[str, Any]]) -> str:
+    async def analyze_logs(self, logs: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Analyze recent logs and provide insights"""
         if not logs:
-            return "No recent activity to analyze."
+            return {"analysis": "No recent activity to analyze.", "usage": None}
         
-        log_summary = self._create_log_summary(logs)
-        prompt = f"""
-Analyze the following Instagram automation activity and provide strategic insights:
-
-{log_summary}
-
-Based on this data, provide:
+        max_length = 200
+        aggregates = aggregate_logs(logs)
+        activity_series = await self._activity_series()
+        prompt = self._prompt_builder(settings.llm_prompt_budget_logs, max_length).build(
+            header="Analyze the following Instagram automation activity and provide strategic insights:",
+            sections=[
+                render_log_aggregates(aggregates),
+                render_top_errors(aggregates),
+                render_activity_series(activity_series, "Last 24h by hour"),
+                render_recent_logs(logs)
+            ],
+            footer="""Based on this data, provide:
 1. Performance assessment
 2. Optimization recommendations
 3. Risk analysis
 4. Next action suggestions
 
 Analysis:"""
+        )
         
-        response = await self.generate_response(prompt, max_length=200)
-        return response
+        result = await self.generate_with_usage(prompt.text, max_length=max_length, endpoint="analyze_logs")
+        result["usage"]["prompt_budget"] = prompt.budget
+        result["usage"]["dropped_sections"] = prompt.dropped_sections
+        return {"analysis": result["text"], "usage": result["usage"]}
     
     async def suggest_targets(self, hashtag: str, current_targets: List[Dict[str, Any]]) -> str:
         """Suggest targeting strategy for hashtag"""
@@ -236,27 +779,34 @@ Message:"""
         response = await self.generate_response(prompt, max_length=100)
         return response.strip()
     
-    async def analyze_campaign_performance(self, campaign_data: Dict[str, Any]) -> str:
+    async def analyze_campaign_performance(self, campaign_data: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze campaign performance and suggest improvements"""
-        prompt = f"""
-Campaign Performance Analysis:
-
-Name: {campaign_data.get('name', 'Unknown')}
-Progress: {campaign_data.get('progress', 0)}%
-Target: {campaign_data.get('target', 0)}
-Current: {campaign_data.get('current', 0)}
-Status: {campaign_data.get('status', 'unknown')}
-
-Provide:
+        max_length = 200
+        core = {
+            "name": campaign_data.get('name', 'Unknown'),
+            "progress": f"{campaign_data.get('progress', 0)}%",
+            "target": campaign_data.get('target', 0),
+            "current": campaign_data.get('current', 0),
+            "status": campaign_data.get('status', 'unknown')
+        }
+        extra = {k: v for k, v in campaign_data.items() if k not in core}
+        
+        prompt = self._prompt_builder(settings.llm_prompt_budget_campaign, max_length).build(
+            header="Campaign Performance Analysis:",
+            sections=[render_fields(core), render_fields(extra)],
+            footer="""Provide:
 1. Performance evaluation
 2. Bottleneck identification
 3. Optimization strategies
 4. Timeline adjustments
 
 Analysis:"""
+        )
         
-        response = await self.generate_response(prompt, max_length=200)
-        return response
+        result = await self.generate_with_usage(prompt.text, max_length=max_length, endpoint="analyze_campaign")
+        result["usage"]["prompt_budget"] = prompt.budget
+        result["usage"]["dropped_sections"] = prompt.dropped_sections
+        return {"analysis": result["text"], "usage": result["usage"]}
     
     async def generate_command_suggestion(self, user_input: str, context: Dict[str, Any]) -> str:
         """Generate command suggestions based on user input"""
@@ -280,19 +830,14 @@ Suggestion:"""
         response = await self.generate_response(prompt, max_length=120)
         return response
     
-    def _create_log_summary(self, logs: List[Dict[str, Any]]) -> str:
-        """Create a summary of recent logs"""
-        if not logs:
-            return "No recent activity"
-        
-        summary_lines = []
-        for log in logs[-10:]:  # Last 10 logs
-            action = log.get('action', 'unknown')
-            target = log.get('target', '')
-            outcome = log.get('outcome', 'unknown')
-            summary_lines.append(f"- {action} {target}: {outcome}")
-        
-        return "\n".join(summary_lines)
+    async def _activity_series(self, hours: int = 24) -> List[Dict[str, Any]]:
+        """Hourly counts for the trailing window, from the log counters rather than raw rows"""
+        db_manager = getattr(self.logging_service, "db_manager", None)
+        if db_manager is None:
+            return []
+        since = datetime.now() - timedelta(hours=hours)
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, lambda: db_manager.get_log_series(since=since))
     
     def _calculate_success_rate(self, targets: List[Dict[str, Any]]) -> int:
         """Calculate success rate from targets"""
@@ -305,27 +850,71 @@ Suggestion:"""
     async def get_model_status(self) -> Dict[str, Any]:
         """Get current model status"""
         return {
+            "state": self.state.value,
+            "state_changed_at": self.state_changed_at.isoformat(),
+            "load_error": self.load_error,
             "is_loaded": self.is_loaded,
             "model_name": self.model_name,
             "fallback_model": self.fallback_model,
             "fallback_mode": self.fallback_mode,
-            "use_vllm": self.use_vllm and self.vllm_model is not None,
+            "not_ready_policy": settings.llm_not_ready_policy,
+            "active_requests": self.active_requests,
+            "idle_seconds": round(time.monotonic() - self.last_used, 1),
+            "idle_unload_minutes": settings.llm_idle_unload_minutes,
+            "lifecycle": dict(self.lifecycle_stats),
+            "coalescing": {
+                **self.coalescing_stats,
+                "in_flight": len(self.inflight),
+                "cached_results": len(self.result_cache)
+            },
+            "token_usage": {k: dict(v) for k, v in self.token_usage.items()},
+            "backend": self.backend,
+            "use_vllm": self.use_vllm and isinstance(self.engine, VLLMAsyncEngine),
+            "engine": self.engine.get_stats() if self.engine else None,
             "device": self.device,
-            "cuda_available": torch.cuda.is_available(),
+            "cuda_available": self.device == "cuda",
             "vllm_available": VLLM_AVAILABLE,
+            "gguf_available": GGUF_AVAILABLE,
             "memory_usage": self._get_memory_usage()
         }
     
     def _get_memory_usage(self) -> Dict[str, Any]:
         """Get memory usage information"""
-        if torch.cuda.is_available():
-            return {
+        usage = {
+            "backend": self.backend,
+            "weights_mmapped": self.weights_mmapped,
+            "model_bytes": self._get_model_bytes(),
+            "parameter_count": self._get_parameter_count(),
+            "process_rss_bytes": _process_rss_bytes(),
+            "available_ram_bytes": _available_memory_bytes()
+        }
+        if self.device == "cuda":
+            import torch
+            usage.update({
                 "gpu_memory_allocated": torch.cuda.memory_allocated(),
                 "gpu_memory_cached": torch.cuda.memory_reserved(),
                 "gpu_memory_total": torch.cuda.get_device_properties(0).total_memory
-            }
+            })
         else:
-            return {"cpu_only": True}
+            usage["cpu_only"] = True
+        return usage
+    
+    def _get_model_bytes(self) -> int:
+        """Get the size of the loaded model weights, including quantized packed params"""
+        if self.gguf_model is not None:
+            try:
+                return os.path.getsize(settings.llm_gguf_model_path)
+            except OSError:
+                return 0
+        if self.model is None:
+            return 0
+        return sum(_tensor_bytes(value) for value in self.model.state_dict().values())
+    
+    def _get_parameter_count(self) -> int:
+        """Get the number of parameters registered on the loaded model"""
+        if self.model is None:
+            return 0
+        return sum(p.numel() for p in self.model.parameters())
 
 class StanleyAI:
     def __init__(self, llm_service: LLMService):
@@ -0,0 +1,372 @@
+import argparse
+import asyncio
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.error_handling import LLMException
+from backend.services.inference_engine import GenerationResult, InferenceEngine
+
+# Every frame is a fixed header followed by a payload:
+#   type (u8) | request id (u32) | payload length (u32)
+HEADER = struct.Struct("!BII")
+GENERATE_FIELDS = struct.Struct("!Iff")  # max_tokens, temperature, top_p; prompt follows as UTF-8
+RESULT_FIELDS = struct.Struct("!IIB")  # prompt_tokens, completion_tokens, finish reason; text follows as UTF-8
+LOG_FIELDS = struct.Struct("!B")  # level; message follows as UTF-8
+
+MSG_GENERATE = 1
+MSG_RESULT = 2
+MSG_ERROR = 3
+MSG_CANCEL = 4
+MSG_LOG = 5
+MSG_READY = 6
+MSG_SHUTDOWN = 7
+
+MAX_PAYLOAD = 16 * 1024 * 1024
+FINISH_REASONS = ("stop", "length", "aborted")
+LOG_OUTCOMES = ("success", "warning", "error")  # LogEntry.outcome values, indexed by the LOG frame's level byte
+LEVEL_OUTCOMES = {"info": "success", "debug": "success", "critical": "error"}
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+class WorkerUnavailableError(LLMException):
+    """Raised when the inference worker is down or died mid-request"""
+
+def encode_frame(msg_type: int, request_id: int = 0, payload: bytes = b"") -> bytes:
+    return HEADER.pack(msg_type, request_id, len(payload)) + payload
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[int, int, bytes]:
+    """Read one frame; raises IncompleteReadError when the peer closes the socket"""
+    msg_type, request_id, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if length > MAX_PAYLOAD:
+        raise ValueError(f"Frame payload too large: {length} bytes")
+    payload = await reader.readexactly(length) if length else b""
+    return msg_type, request_id, payload
+
+def default_socket_path() -> str:
+    return os.path.join(tempfile.gettempdir(), f"social-commander-llm-{os.getpid()}.sock")
+
+class WorkerEngine(InferenceEngine):
+    """Runs LLMService in a supervised child process and multiplexes requests over a Unix socket.
+
+    Requests carry a numeric id so many can be in flight on the one connection.
+    If the worker exits, pending requests fail and it is restarted with backoff;
+    new requests wait up to ready_timeout for it to come back.
+    """
+
+    name = "worker"
+
+    def __init__(self, logging_service, socket_path: str = "", start_timeout: float = 600.0,
+                 ready_timeout: float = 30.0, restart_delay: float = 1.0, max_restart_delay: float = 30.0):
+        self.logging_service = logging_service
+        self.socket_path = socket_path or default_socket_path()
+        self.start_timeout = start_timeout
+        self.ready_timeout = ready_timeout
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.ready = asyncio.Event()
+        self.worker_info: Dict[str, Any] = {}
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.request_ids: Dict[str, int] = {}
+        self.next_id = 0
+        self.restarts = 0
+        self.started_at: Optional[float] = None
+        self.last_exit_code: Optional[int] = None
+        self.completed = 0
+        self.aborted = 0
+        self._closing = False
+        self._supervisor: Optional[asyncio.Task] = None
+        self._reader_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Spawn the worker and wait until its model has loaded"""
+        self._closing = False
+        await self._spawn()
+        self._supervisor = asyncio.create_task(self._supervise())
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout=self.start_timeout)
+        except asyncio.TimeoutError:
+            await self.shutdown()
+            raise WorkerUnavailableError(f"Inference worker not ready after {self.start_timeout:.0f}s")
+
+    async def _spawn(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        env = dict(os.environ, LLM_INFERENCE_MODE="inprocess", LLM_PRELOAD="true")
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "backend.services.llm_worker", "--socket", self.socket_path,
+            cwd=str(PROJECT_ROOT), env=env
+        )
+        self.started_at = time.monotonic()
+        await self.logging_service.log_system_message(f"Started inference worker (pid {self.process.pid})")
+
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                reader, self.writer = await asyncio.open_unix_connection(self.socket_path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if self.process.returncode is not None or time.monotonic() > deadline:
+                    raise WorkerUnavailableError("Inference worker did not open its socket")
+                await asyncio.sleep(0.05)
+        self._reader_task = asyncio.create_task(self._read_loop(reader))
+
+    async def _read_loop(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                msg_type, request_id, payload = await read_frame(reader)
+                try:
+                    await self._handle_frame(msg_type, request_id, payload)
+                except Exception as e:
+                    # One bad frame must not stop the loop that delivers every other result
+                    await self.logging_service.log_system_message(
+                        f"Inference worker frame {msg_type} could not be handled: {str(e)}", "error"
+                    )
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            await self.logging_service.log_system_message(f"Inference worker connection error: {str(e)}", "error")
+        finally:
+            self.ready.clear()
+            self._fail_pending("Inference worker connection closed")
+
+    async def _handle_frame(self, msg_type: int, request_id: int, payload: bytes):
+        if msg_type == MSG_RESULT:
+            future = self.pending.pop(request_id, None)
+            if future is not None and not future.done():
+                prompt_tokens, completion_tokens, finish = RESULT_FIELDS.unpack_from(payload)
+                future.set_result((payload[RESULT_FIELDS.size:].decode("utf-8"),
+                                   prompt_tokens, completion_tokens, FINISH_REASONS[finish]))
+        elif msg_type == MSG_ERROR:
+            future = self.pending.pop(request_id, None)
+            if future is not None and not future.done():
+                future.set_exception(LLMException(payload.decode("utf-8")))
+        elif msg_type == MSG_LOG:
+            (level,) = LOG_FIELDS.unpack_from(payload)
+            message = payload[LOG_FIELDS.size:].decode("utf-8")
+            outcome = LOG_OUTCOMES[level] if level < len(LOG_OUTCOMES) else "error"
+            await self.logging_service.log_system_message(f"[worker] {message}", outcome)
+        elif msg_type == MSG_READY:
+            self.worker_info = json.loads(payload)
+            self.ready.set()
+
+    def _fail_pending(self, reason: str):
+        pending, self.pending = self.pending, {}
+        self.request_ids.clear()
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(WorkerUnavailableError(reason))
+
+    async def _supervise(self):
+        """Restart the worker whenever it exits, backing off while it keeps crashing"""
+        delay = self.restart_delay
+        while True:
+            self.last_exit_code = await self.process.wait()
+            if self._closing:
+                return
+            uptime = time.monotonic() - self.started_at
+            self.ready.clear()
+            self._fail_pending(f"Inference worker exited with code {self.last_exit_code}")
+            if uptime > 60:
+                delay = self.restart_delay
+            await self.logging_service.log_system_message(
+                f"Inference worker exited with code {self.last_exit_code} after {uptime:.0f}s, restarting in {delay:.0f}s",
+                "error"
+            )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_restart_delay)
+            self.restarts += 1
+            try:
+                await self._spawn()
+            except Exception as e:
+                await self.logging_service.log_system_message(f"Inference worker restart failed: {str(e)}", "error")
+
+    async def _generate(self, request_id, prompt, max_tokens, temperature, top_p):
+        if not self.ready.is_set():
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout=self.ready_timeout)
+            except asyncio.TimeoutError:
+                raise WorkerUnavailableError("Inference worker is not available")
+
+        self.next_id = (self.next_id + 1) & 0xFFFFFFFF
+        wire_id = self.next_id
+        future = asyncio.get_running_loop().create_future()
+        self.pending[wire_id] = future
+        self.request_ids[request_id] = wire_id
+        payload = GENERATE_FIELDS.pack(max_tokens, temperature, top_p) + prompt.encode("utf-8")
+        try:
+            self.writer.write(encode_frame(MSG_GENERATE, wire_id, payload))
+            await self.writer.drain()
+            text, prompt_tokens, completion_tokens, finish_reason = await future
+        except asyncio.CancelledError:
+            raise  # abort() forgets the request and tells the worker to stop it
+        except Exception:
+            self._forget(request_id)
+            raise
+
+        self._forget(request_id)
+        self.completed += 1
+        return GenerationResult(request_id, text, prompt_tokens, completion_tokens, finish_reason)
+
+    def _forget(self, request_id: str) -> Optional[int]:
+        wire_id = self.request_ids.pop(request_id, None)
+        if wire_id is not None:
+            self.pending.pop(wire_id, None)
+        return wire_id
+
+    async def abort(self, request_id: str):
+        wire_id = self._forget(request_id)
+        if wire_id is None:
+            return
+        self.aborted += 1
+        if self.ready.is_set():
+            self.writer.write(encode_frame(MSG_CANCEL, wire_id))
+
+    async def shutdown(self):
+        """Ask the worker to exit, killing it if it does not stop in time"""
+        self._closing = True
+        self.ready.clear()
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            self._supervisor = None
+        if self.process is None or self.process.returncode is not None:
+            return
+        try:
+            self.writer.write(encode_frame(MSG_SHUTDOWN))
+            await self.writer.drain()
+            await asyncio.wait_for(self.process.wait(), timeout=10)
+        except (asyncio.TimeoutError, ConnectionError):
+            self.process.kill()
+            await self.process.wait()
+        self._fail_pending("Inference worker shut down")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "engine": self.name,
+            "pid": self.process.pid if self.process else None,
+            "ready": self.ready.is_set(),
+            "socket": self.socket_path,
+            "in_flight": len(self.pending),
+            "completed": self.completed,
+            "aborted": self.aborted,
+            "restarts": self.restarts,
+            "last_exit_code": self.last_exit_code,
+            "uptime_seconds": round(time.monotonic() - self.started_at) if self.started_at and self.ready.is_set() else None,
+            "worker": self.worker_info
+        }
+
+class _WorkerLogger:
+    """Stands in for LoggingService inside the worker, forwarding messages to the backend"""
+
+    def __init__(self):
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.buffered: List[bytes] = []
+
+    async def log_system_message(self, message: str, outcome: str = "success"):
+        outcome = LEVEL_OUTCOMES.get(outcome, outcome)
+        level = LOG_OUTCOMES.index(outcome) if outcome in LOG_OUTCOMES else 0
+        frame = encode_frame(MSG_LOG, 0, LOG_FIELDS.pack(level) + message.encode("utf-8"))
+        if self.writer is None:
+            self.buffered.append(frame)
+        else:
+            self.writer.write(frame)
+
+    def attach(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        for frame in self.buffered:
+            writer.write(frame)
+        self.buffered.clear()
+
+class InferenceWorker:
+    """Worker-process side: serves generate requests from one backend connection"""
+
+    def __init__(self, socket_path: str):
+        from backend.services.llm_service import LLMService
+
+        self.socket_path = socket_path
+        self.logger = _WorkerLogger()
+        self.llm = LLMService(self.logger)
+        self.tasks: Dict[int, asyncio.Task] = {}
+        self.done = asyncio.Event()
+
+    async def run(self):
+        server = await asyncio.start_unix_server(self._serve, path=self.socket_path)
+        self.llm.start_loading()
+        try:
+            await self.done.wait()
+        finally:
+            server.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.logger.attach(writer)
+        ready_task = asyncio.create_task(self._announce_ready(writer))
+        try:
+            while True:
+                msg_type, request_id, payload = await read_frame(reader)
+                if msg_type == MSG_GENERATE:
+                    self.tasks[request_id] = asyncio.create_task(self._generate(writer, request_id, payload))
+                elif msg_type == MSG_CANCEL:
+                    task = self.tasks.pop(request_id, None)
+                    if task is not None:
+                        task.cancel()
+                elif msg_type == MSG_SHUTDOWN:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            # The backend went away or asked us to stop; never outlive it
+            ready_task.cancel()
+            for task in self.tasks.values():
+                task.cancel()
+            await self.llm.shutdown()
+            self.done.set()
+
+    async def _announce_ready(self, writer: asyncio.StreamWriter):
+        await self.llm.ready_event.wait()
+        info = {
+            "pid": os.getpid(),
+            "model": self.llm.model_name,
+            "backend": self.llm.backend,
+            "device": self.llm.device,
+            "state": self.llm.state.value,
+            "fallback_mode": self.llm.fallback_mode
+        }
+        writer.write(encode_frame(MSG_READY, 0, json.dumps(info).encode("utf-8")))
+
+    async def _generate(self, writer: asyncio.StreamWriter, request_id: int, payload: bytes):
+        try:
+            max_tokens, temperature, _ = GENERATE_FIELDS.unpack_from(payload)
+            prompt = payload[GENERATE_FIELDS.size:].decode("utf-8")
+            # Uncached: the backend coalesces and caches, and fallback text must come back as an error, not a result
+            text, generated = await self.llm._generate_text_uncached(prompt, max_tokens, round(temperature, 4))
+            if not generated:
+                raise LLMException("Worker model failed; see the worker log for the cause")
+            fields = RESULT_FIELDS.pack(self.llm.count_tokens(prompt), self.llm.count_tokens(text), 0)
+            writer.write(encode_frame(MSG_RESULT, request_id, fields + text.encode("utf-8")))
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            writer.write(encode_frame(MSG_ERROR, request_id, str(e).encode("utf-8")))
+        finally:
+            self.tasks.pop(request_id, None)
+
+async def serve(socket_path: str):
+    await InferenceWorker(socket_path).run()
+
+def main():
+    parser = argparse.ArgumentParser(description="Social Commander out-of-process LLM worker")
+    parser.add_argument("--socket", required=True, help="Unix socket path to listen on")
+    args = parser.parse_args()
+    asyncio.run(serve(args.socket))
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,20 @@
 import asyncio
 import json
-from typing import List, Set, Optional
+import time
+from typing import Any, Dict, List, Set, Optional
 from datetime import datetime
 from fastapi import WebSocket
 from backend.database.sqlite_db import DatabaseManager
-from backend.models import LogEntry
+from backend.models import LogEntry, LogSearchHit
+from backend.metrics import registry
+
+LOG_ENTRIES = registry.counter("log_entries", "Log entries written", ["type", "outcome"])
+WS_CLIENTS = registry.gauge("log_ws_clients", "Connected log stream WebSocket clients")
+WS_SEND_SECONDS = registry.histogram(
+    "log_ws_send_seconds", "Time to send one log entry to one WebSocket client",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+)
+WS_DROPPED = registry.counter("log_ws_dropped", "Log stream clients dropped after a failed send")
 
 class LoggingService:
     def __init__(self, db_manager: DatabaseManager):
@@ -16,6 +26,7 @@ class LoggingService:
         """Connect a new WebSocket client"""
         await websocket.accept()
         self.active_connections.add(websocket)
+        WS_CLIENTS.set(len(self.active_connections))
         
         recent_logs = self.db_manager.get_logs(limit=50)
         for log in reversed(recent_logs):
@@ -24,6 +35,7 @@ class LoggingService:
     def disconnect(self, websocket: WebSocket):
         """Disconnect a WebSocket client"""
         self.active_connections.discard(websocket)
+        WS_CLIENTS.set(len(self.active_connections))
     
     async def log_action(self, log_entry: LogEntry):
         """Log an action and broadcast to all connected clients"""
@@ -31,18 +43,24 @@ class LoggingService:
             log_entry.timestamp = datetime.now().strftime("%H:%M:%S")
         
         self.db_manager.add_log_entry(log_entry)
+        LOG_ENTRIES.labels(log_entry.type, log_entry.outcome).inc()
         
         if self.active_connections:
             message = json.dumps(log_entry.dict())
             disconnected = set()
             
-            for connection in self.active_connections:
+            for connection in list(self.active_connections):
+                started = time.perf_counter()
                 try:
                     await connection.send_text(message)
                 except Exception:
                     disconnected.add(connection)
+                WS_SEND_SECONDS.observe(time.perf_counter() - started)
             
-            self.active_connections -= disconnected
+            if disconnected:
+                self.active_connections -= disconnected
+                WS_DROPPED.inc(len(disconnected))
+                WS_CLIENTS.set(len(self.active_connections))
     
     async def log_system_message(self, message: str, outcome: str = "success"):
         """Log a system message"""
@@ -88,3 +106,14 @@ class LoggingService:
     def get_logs(self, limit: int = 100, log_type: Optional[str] = None) -> List[LogEntry]:
         """Get logs from database"""
         return self.db_manager.get_logs(limit=limit, log_type=log_type)
+    
+    def search_logs(self, query: str, mode: str = "all", log_type: Optional[str] = None,
+                    since: Optional[datetime] = None, until: Optional[datetime] = None,
+                    limit: int = 100) -> List[LogSearchHit]:
+        """Full-text search over logs in the database"""
+        return self.db_manager.search_logs(query, mode=mode, log_type=log_type, since=since, until=until, limit=limit)
+    
+    def get_log_series(self, since: datetime, until: Optional[datetime] = None, bucket_hours: int = 1,
+                       log_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Time-bucketed log counts from the database's hourly counters"""
+        return self.db_manager.get_log_series(since, until=until, bucket_hours=bucket_hours, log_type=log_type)
@@ -0,0 +1,210 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from backend.metrics import registry
+
+LOAD_PHASE_SECONDS = registry.histogram(
+    "llm_load_phase_seconds", "Model load time by phase", ["phase"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+)
+
+MANIFEST_NAME = "social_commander_models.json"
+
+# Files needed to build a tokenizer and model; safetensors first, pickled .bin only if a repo has nothing else
+SNAPSHOT_PATTERNS = ["*.json", "*.safetensors", "*.model", "*.txt", "*.tiktoken", "tokenizer*"]
+LEGACY_WEIGHT_PATTERNS = ["*.bin"]
+
+_SAFETENSORS_DTYPES = {
+    "F64": "float64", "F32": "float32", "F16": "float16", "BF16": "bfloat16",
+    "I64": "int64", "I32": "int32", "I16": "int16", "I8": "int8", "U8": "uint8", "BOOL": "bool"
+}
+
+class LoadTimer:
+    """Times the named phases of one model load"""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.phases[name] = round(self.phases.get(name, 0.0) + elapsed, 3)
+            LOAD_PHASE_SECONDS.labels(name).observe(elapsed)
+
+    def summary(self) -> str:
+        return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases.items())
+
+class ModelCache:
+    """Pins model names to local snapshot directories so boots never go back to the hub.
+
+    The first resolve of a name downloads (or finds) a snapshot and records its
+    path and revision in a manifest next to the cache; later resolves, including
+    from other processes, read the manifest and touch only local files.
+    """
+
+    def __init__(self, cache_dir: str = "", offline: bool = False):
+        if not cache_dir:
+            hf_home = os.environ.get("HF_HOME", os.path.join(os.path.expanduser("~"), ".cache", "huggingface"))
+            cache_dir = os.environ.get("HF_HUB_CACHE", os.path.join(hf_home, "hub"))
+        self.cache_dir = cache_dir
+        self.offline = offline
+        self.manifest_path = os.path.join(cache_dir, MANIFEST_NAME)
+        self._lock = threading.Lock()
+
+    def _read_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self, manifest: Dict[str, Dict[str, Any]]):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def get_entry(self, model_name: str) -> Optional[Dict[str, Any]]:
+        entry = self._read_manifest().get(model_name)
+        if entry and os.path.isdir(entry["path"]):
+            return entry
+        return None
+
+    def resolve(self, model_name: str) -> str:
+        """Return a local directory for the model, downloading and pinning it on first use"""
+        if os.path.isdir(model_name):
+            return model_name
+
+        with self._lock:
+            entry = self.get_entry(model_name)
+            if entry is not None:
+                return entry["path"]
+
+            from huggingface_hub import snapshot_download
+
+            path = snapshot_download(
+                model_name, cache_dir=self.cache_dir, allow_patterns=SNAPSHOT_PATTERNS,
+                local_files_only=self.offline
+            )
+            if not safetensors_files(path):
+                path = snapshot_download(
+                    model_name, cache_dir=self.cache_dir, allow_patterns=SNAPSHOT_PATTERNS + LEGACY_WEIGHT_PATTERNS,
+                    local_files_only=self.offline
+                )
+
+            manifest = self._read_manifest()
+            manifest[model_name] = {
+                "path": path,
+                "revision": os.path.basename(os.path.normpath(path)),
+                "format": "safetensors" if safetensors_files(path) else "pytorch",
+                "pinned_at": datetime.now().isoformat()
+            }
+            self._write_manifest(manifest)
+            return path
+
+    def config_path(self, model_name: str) -> str:
+        """Path to the model's config.json, fetching only that file if the model is not pinned yet"""
+        if os.path.isdir(model_name):
+            return os.path.join(model_name, "config.json")
+        entry = self.get_entry(model_name)
+        if entry is not None:
+            return os.path.join(entry["path"], "config.json")
+
+        from huggingface_hub import hf_hub_download
+
+        return hf_hub_download(model_name, "config.json", cache_dir=self.cache_dir, local_files_only=self.offline)
+
+    def unpin(self, model_name: str) -> bool:
+        """Forget a pinned snapshot so the next resolve picks up a new revision"""
+        with self._lock:
+            manifest = self._read_manifest()
+            if manifest.pop(model_name, None) is None:
+                return False
+            self._write_manifest(manifest)
+            return True
+
+def safetensors_files(path: str) -> List[str]:
+    """Weight shards of a snapshot, in a stable order"""
+    index_path = os.path.join(path, "model.safetensors.index.json")
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            shards = sorted(set(json.load(f)["weight_map"].values()))
+        return [os.path.join(path, shard) for shard in shards]
+    return sorted(
+        os.path.join(path, name) for name in os.listdir(path) if name.endswith(".safetensors")
+    )
+
+def read_safetensors_header(filename: str) -> Dict[str, Any]:
+    with open(filename, "rb") as f:
+        (length,) = struct.unpack("<Q", f.read(8))
+        return json.loads(f.read(length))
+
+def stored_dtypes(path: str) -> set:
+    """Torch dtype names used by a snapshot's safetensors weights"""
+    dtypes = set()
+    for filename in safetensors_files(path):
+        for name, info in read_safetensors_header(filename).items():
+            if name != "__metadata__":
+                dtypes.add(_SAFETENSORS_DTYPES.get(info["dtype"], info["dtype"]))
+    return dtypes
+
+def load_safetensors_mmap(path: str) -> Dict[str, Any]:
+    """Map a snapshot's safetensors shards into tensors without reading them into private memory.
+
+    Each shard is mapped copy-on-write, so the tensors are backed by the page
+    cache: a restart or a second worker loading the same files reuses the
+    resident pages instead of allocating its own copy.
+    """
+    import torch
+
+    tensors = {}
+    for filename in safetensors_files(path):
+        with open(filename, "rb") as f:
+            (header_length,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_length))
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        data_start = 8 + header_length
+        for name, info in header.items():
+            if name == "__metadata__":
+                continue
+            dtype = getattr(torch, _SAFETENSORS_DTYPES[info["dtype"]])
+            begin, end = info["data_offsets"]
+            if end == begin:
+                tensors[name] = torch.empty(info["shape"], dtype=dtype)
+                continue
+            itemsize = torch.empty((), dtype=dtype).element_size()
+            tensors[name] = torch.frombuffer(
+                mapped, dtype=dtype, count=(end - begin) // itemsize, offset=data_start + begin
+            ).view(info["shape"])
+    return tensors
+
+def build_model_from_mmap(path: str, dtype_name: str):
+    """Build a causal LM whose weights are the mmapped safetensors tensors"""
+    import torch
+    from transformers import AutoConfig, AutoModelForCausalLM
+    from transformers.modeling_utils import no_init_weights
+
+    config = AutoConfig.from_pretrained(path, local_files_only=True)
+    with no_init_weights():
+        model = AutoModelForCausalLM.from_config(config, torch_dtype=getattr(torch, dtype_name))
+
+    state = load_safetensors_mmap(path)
+    result = model.load_state_dict(state, strict=False, assign=True)
+    model.tie_weights()
+    loaded = {tensor.data_ptr() for tensor in state.values()}
+    current = model.state_dict()
+    missing = [key for key in result.missing_keys if current[key].data_ptr() not in loaded]
+    if missing:
+        raise ValueError(f"Weights missing from snapshot: {', '.join(missing[:5])}")
+    return model.eval()
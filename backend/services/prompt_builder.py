@@ -0,0 +1,152 @@
+import json
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, Any, List, Optional
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate used when no tokenizer is loaded"""
+    return max(1, len(text) // 4) if text else 0
+
+@dataclass
+class BuiltPrompt:
+    text: str
+    tokens: int
+    budget: int
+    dropped_sections: int = 0
+    truncated: bool = False
+
+class PromptBuilder:
+    """Assembles a prompt from sections while keeping it within a token budget"""
+
+    def __init__(self, budget: int, count_tokens: Optional[Callable[[str], int]] = None):
+        self.budget = budget
+        self.count_tokens = count_tokens or estimate_tokens
+
+    def build(self, header: str, sections: List[str], footer: str) -> BuiltPrompt:
+        """Keep header and footer, then add sections in priority order until the budget is spent"""
+        fixed_tokens = self.count_tokens(header) + self.count_tokens(footer)
+        remaining = self.budget - fixed_tokens
+
+        parts = [header]
+        dropped = 0
+        truncated = False
+        for section in sections:
+            if not section:
+                continue
+            if remaining <= 0:
+                dropped += 1
+                continue
+
+            section_tokens = self.count_tokens(section)
+            if section_tokens > remaining:
+                section = self._truncate_lines(section, remaining)
+                truncated = True
+                if not section:
+                    dropped += 1
+                    continue
+                section_tokens = self.count_tokens(section)
+
+            parts.append(section)
+            remaining -= section_tokens
+        parts.append(footer)
+
+        text = "\n\n".join(parts)
+        return BuiltPrompt(
+            text=text,
+            tokens=self.count_tokens(text),
+            budget=self.budget,
+            dropped_sections=dropped,
+            truncated=truncated
+        )
+
+    def _truncate_lines(self, section: str, max_tokens: int) -> str:
+        """Keep whole leading lines of a section that fit in max_tokens"""
+        kept = []
+        used = 0
+        for line in section.split("\n"):
+            line_tokens = self.count_tokens(line) + 1
+            if used + line_tokens > max_tokens:
+                break
+            kept.append(line)
+            used += line_tokens
+        return "\n".join(kept)
+
+def aggregate_logs(logs: List[Dict[str, Any]], top_errors: int = 5) -> Dict[str, Any]:
+    """Pre-aggregate raw log dicts into counts so prompts do not grow with history"""
+    by_type = Counter()
+    by_outcome = Counter()
+    by_action = Counter()
+    errors = Counter()
+
+    for log in logs:
+        log_type = log.get('type', 'unknown')
+        outcome = log.get('outcome', 'unknown')
+        by_type[log_type] += 1
+        by_outcome[outcome] += 1
+        by_action[(log.get('action', 'unknown'), outcome)] += 1
+        if outcome == 'error':
+            errors[str(log.get('details', ''))[:120]] += 1
+
+    return {
+        "total": len(logs),
+        "by_type": dict(by_type.most_common()),
+        "by_outcome": dict(by_outcome.most_common()),
+        "by_action": [
+            {"action": action, "outcome": outcome, "count": count}
+            for (action, outcome), count in by_action.most_common()
+        ],
+        "top_errors": errors.most_common(top_errors),
+        "first_timestamp": logs[0].get('timestamp') if logs else None,
+        "last_timestamp": logs[-1].get('timestamp') if logs else None
+    }
+
+def render_log_aggregates(aggregates: Dict[str, Any]) -> str:
+    """Render log aggregates as compact prompt lines"""
+    lines = [f"Total actions: {aggregates['total']} ({aggregates['first_timestamp']} - {aggregates['last_timestamp']})"]
+    lines.append("By type: " + ", ".join(f"{k}={v}" for k, v in aggregates["by_type"].items()))
+    lines.append("By outcome: " + ", ".join(f"{k}={v}" for k, v in aggregates["by_outcome"].items()))
+    for row in aggregates["by_action"]:
+        lines.append(f"- {row['action']} {row['outcome']}: {row['count']}")
+    return "\n".join(lines)
+
+def render_top_errors(aggregates: Dict[str, Any]) -> str:
+    """Render the most frequent error messages"""
+    if not aggregates["top_errors"]:
+        return ""
+    lines = ["Top errors:"]
+    for details, count in aggregates["top_errors"]:
+        lines.append(f"- ({count}x) {details}")
+    return "\n".join(lines)
+
+def render_activity_series(series: List[Dict[str, Any]], title: str = "Activity by hour") -> str:
+    """Render time-bucketed log counts, one line per bucket with non-success outcomes called out"""
+    if not series:
+        return ""
+    lines = [f"{title}:"]
+    for point in series:
+        issues = ", ".join(f"{k}={v}" for k, v in point["by_outcome"].items() if k != "success")
+        lines.append(f"- {point['start'][:16]} total={point['total']}" + (f" ({issues})" if issues else ""))
+    return "\n".join(lines)
+
+def render_recent_logs(logs: List[Dict[str, Any]], limit: int = 10) -> str:
+    """Render the most recent log lines, newest last"""
+    if not logs:
+        return ""
+    lines = ["Recent activity:"]
+    for log in logs[-limit:]:
+        action = log.get('action', 'unknown')
+        target = log.get('target') or ''
+        outcome = log.get('outcome', 'unknown')
+        lines.append(f"- {action} {target}: {outcome}")
+    return "\n".join(lines)
+
+def render_fields(data: Dict[str, Any], max_value_chars: int = 200) -> str:
+    """Render a dict as one 'Key: value' line per field with long values clipped"""
+    lines = []
+    for key, value in data.items():
+        if not isinstance(value, str):
+            value = json.dumps(value, default=str, separators=(",", ":"))
+        if len(value) > max_value_chars:
+            value = value[:max_value_chars] + "..."
+        lines.append(f"{key.replace('_', ' ').capitalize()}: {value}")
+    return "\n".join(lines)
@@ -1,10 +1,24 @@
 import asyncio
+import time
 from typing import Dict, Any, Optional, Callable
 from datetime import datetime, timedelta
 from enum import Enum
 from dataclasses import dataclass
 from backend.services.logging_service import LoggingService
 from backend.config.settings import settings
+from backend.metrics import registry
+from backend.tracing import SpanContext, current_context, start_span
+
+QUEUE_DEPTH = registry.gauge("queue_depth", "Tasks waiting in the action queue")
+QUEUE_RUNNING = registry.gauge("queue_running_tasks", "Tasks currently being executed")
+QUEUE_LATENESS_SECONDS = registry.histogram(
+    "queue_task_lateness_seconds", "Delay between a task's scheduled time and its execution", ["task_type"],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 900, 1800, 3600, 7200)
+)
+QUEUE_HANDLER_SECONDS = registry.histogram(
+    "queue_handler_seconds", "Time spent in task handlers", ["task_type"]
+)
+QUEUE_TASKS = registry.counter("queue_tasks", "Executed tasks by outcome", ["task_type", "outcome"])
 
 class TaskType(Enum):
     FOLLOW = "follow"
@@ -24,12 +38,14 @@ class QueuedTask:
     priority: int = 1
     retries: int = 0
     max_retries: int = 3
+    trace_parent: Optional[SpanContext] = None
 
 class QueueService:
     def __init__(self, logging_service: LoggingService):
         self.logging_service = logging_service
         self.task_queue = asyncio.PriorityQueue()
         self.running_tasks = {}
+        self.completed_count = 0
         self.is_processing = False
         self.task_handlers: Dict[TaskType, Callable] = {}
         
@@ -61,6 +77,9 @@ class QueueService:
         self.failure_count = 0
         self.last_failure_time = None
         self.profile_mirror_task = None
+        
+        QUEUE_DEPTH.set_function(self.task_queue.qsize)
+        QUEUE_RUNNING.set_function(lambda: len(self.running_tasks))
     
     def register_handler(self, task_type: TaskType, handler: Callable):
         """Register a handler function for a task type"""
@@ -69,6 +88,9 @@ class QueueService:
     async def add_task(self, task: QueuedTask) -> bool:
         """Add a task to the queue"""
         try:
+            if task.trace_parent is None:
+                task.trace_parent = current_context()
+            
             if not self._check_rate_limits(task.task_type):
                 await self.logging_service.log_system_message(
                     f"Rate limit exceeded for {task.task_type.value}, task queued for later", 
@@ -152,7 +174,21 @@ class QueueService:
         await self.logging_service.log_system_message("Queue processing stopped")
     
     async def _execute_task(self, task: QueuedTask):
-        """Execute a single task"""
+        """Execute a single task inside a span joined to the trace that queued it"""
+        with start_span(
+            f"queue.{task.task_type.value}",
+            {"task.id": task.id, "task.target": task.target, "task.retries": task.retries},
+            parent=task.trace_parent
+        ):
+            await self._run_task(task)
+    
+    async def _run_task(self, task: QueuedTask):
+        """Run a task's handler, rescheduling it on failure"""
+        task_type = task.task_type.value
+        QUEUE_LATENESS_SECONDS.labels(task_type).observe(
+            max(0.0, (datetime.now() - task.scheduled_time).total_seconds())
+        )
+        self.running_tasks[task.id] = task
         try:
             await self.logging_service.log_system_message(
                 f"Executing task {task.id} ({task.task_type.value}) for {task.target}"
@@ -165,9 +201,15 @@ class QueueService:
                 )
                 return
             
-            success = await handler(task.target, task.data)
+            started = time.perf_counter()
+            try:
+                success = await handler(task.target, task.data)
+            finally:
+                QUEUE_HANDLER_SECONDS.labels(task_type).observe(time.perf_counter() - started)
+            QUEUE_TASKS.labels(task_type, "success" if success else "failure").inc()
             
             if success:
+                self.completed_count += 1
                 await self.logging_service.log_system_message(
                     f"Task {task.id} completed successfully"
                 )
@@ -188,9 +230,12 @@ class QueueService:
                     )
             
         except Exception as e:
+            QUEUE_TASKS.labels(task_type, "error").inc()
             await self.logging_service.log_system_message(
                 f"Error executing task {task.id}: {str(e)}", "error"
             )
+        finally:
+            self.running_tasks.pop(task.id, None)
     
     def _check_rate_limits(self, task_type: TaskType) -> bool:
         """Check if task type is within rate limits"""
@@ -291,5 +336,6 @@ class QueueService:
             "daily_limits": self.daily_limits.copy(),
             "hourly_limits": self.hourly_limits.copy(),
             "failure_count": self.failure_count,
+            "completed_count": self.completed_count,
             "last_action_type": self.last_action_type.value if self.last_action_type else None
         }
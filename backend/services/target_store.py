@@ -0,0 +1,278 @@
+import math
+import sys
+from array import array
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+UNFOLLOWED = 0
+AWAITING_FOLLOWBACK = 1
+NOT_FOLLOWED_BACK = 2
+FOLLOWED_BACK = 3
+MESSAGED = 4
+
+TARGET_STATUSES = {
+    "unfollowed": UNFOLLOWED,
+    "awaiting_followback": AWAITING_FOLLOWBACK,
+    "not_followed_back": NOT_FOLLOWED_BACK,
+    "followed_back": FOLLOWED_BACK,
+    "messaged": MESSAGED
+}
+
+_UNSET = math.nan
+
+@dataclass(slots=True)
+class CampaignTarget:
+    username: str
+    followed_at: Optional[datetime] = None
+    followed_back: Optional[bool] = None
+    dm_sent: Optional[bool] = None
+    dm_sent_at: Optional[datetime] = None
+    engagement_score: float = 0.0
+    tags_matched: List[str] = None
+
+    def __post_init__(self):
+        if self.tags_matched is None:
+            self.tags_matched = []
+
+    def to_row(self, campaign_id: str) -> Dict[str, Any]:
+        """Serialise for DatabaseManager.save_campaign_state"""
+        return {
+            "campaign_id": campaign_id,
+            "username": self.username,
+            "followed_at": self.followed_at.isoformat() if self.followed_at else None,
+            "followed_back": self.followed_back,
+            "dm_sent": self.dm_sent,
+            "dm_sent_at": self.dm_sent_at.isoformat() if self.dm_sent_at else None,
+            "engagement_score": self.engagement_score,
+            "tags_matched": self.tags_matched
+        }
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "CampaignTarget":
+        return cls(
+            username=row["username"],
+            followed_at=datetime.fromisoformat(row["followed_at"]) if row["followed_at"] else None,
+            followed_back=row["followed_back"],
+            dm_sent=row["dm_sent"],
+            dm_sent_at=datetime.fromisoformat(row["dm_sent_at"]) if row["dm_sent_at"] else None,
+            engagement_score=row["engagement_score"],
+            tags_matched=row["tags_matched"]
+        )
+
+def _to_tristate(value: Optional[bool]) -> int:
+    return -1 if value is None else int(bool(value))
+
+def _from_tristate(value: int) -> Optional[bool]:
+    return None if value < 0 else bool(value)
+
+def _to_epoch(value: Optional[datetime]) -> float:
+    return _UNSET if value is None else value.timestamp()
+
+def _from_epoch(value: float) -> Optional[datetime]:
+    return None if math.isnan(value) else datetime.fromtimestamp(value)
+
+class CampaignTargetStore:
+    """Array-backed targets of one campaign with a username index, status indexes and running counters"""
+
+    __slots__ = (
+        "_usernames", "_index", "_followed_at", "_followed_back", "_dm_sent", "_dm_sent_at",
+        "_engagement", "_tags", "_status", "_by_status", "_dirty",
+        "followed_count", "followed_back_count", "dm_sent_count", "engagement_total", "version"
+    )
+
+    def __init__(self, targets: Optional[Iterable[CampaignTarget]] = None):
+        self._usernames: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._followed_at = array('d')
+        self._followed_back = array('b')
+        self._dm_sent = array('b')
+        self._dm_sent_at = array('d')
+        self._engagement = array('d')
+        self._tags: List[tuple] = []
+        self._status = array('B')
+        # dicts used as insertion-ordered sets of row indexes
+        self._by_status: List[Dict[int, None]] = [{} for _ in TARGET_STATUSES]
+        self._dirty: Dict[int, None] = {}
+        self.followed_count = 0
+        self.followed_back_count = 0
+        self.dm_sent_count = 0
+        self.engagement_total = 0.0
+        self.version = 0
+
+        for target in targets or ():
+            self.add(target, dirty=False)
+
+    def __len__(self) -> int:
+        return len(self._usernames)
+
+    def __contains__(self, username: str) -> bool:
+        return username in self._index
+
+    def __iter__(self) -> Iterator[CampaignTarget]:
+        for i in range(len(self._usernames)):
+            yield self._view(i)
+
+    def add(self, target: CampaignTarget, dirty: bool = True) -> bool:
+        """Append a target; returns False if the username is already tracked"""
+        if target.username in self._index:
+            return False
+
+        i = len(self._usernames)
+        self._usernames.append(target.username)
+        self._index[target.username] = i
+        self._followed_at.append(_to_epoch(target.followed_at))
+        self._followed_back.append(_to_tristate(target.followed_back))
+        self._dm_sent.append(_to_tristate(target.dm_sent))
+        self._dm_sent_at.append(_to_epoch(target.dm_sent_at))
+        self._engagement.append(target.engagement_score)
+        self._tags.append(tuple(sys.intern(tag) for tag in target.tags_matched))
+        self._status.append(UNFOLLOWED)
+        self._by_status[UNFOLLOWED][i] = None
+
+        self.engagement_total += target.engagement_score
+        self._count(i, 1)
+        self._reindex(i)
+        if dirty:
+            self._dirty[i] = None
+        self.version += 1
+        return True
+
+    def get(self, username: str) -> Optional[CampaignTarget]:
+        """Look up a target by username"""
+        i = self._index.get(username)
+        return None if i is None else self._view(i)
+
+    def update(self, username: str, **fields) -> bool:
+        """Set target fields, keeping indexes and counters in step; returns False if unknown"""
+        i = self._index.get(username)
+        if i is None:
+            return False
+
+        self._count(i, -1)
+        for name, value in fields.items():
+            if name == "followed_at":
+                self._followed_at[i] = _to_epoch(value)
+            elif name == "followed_back":
+                self._followed_back[i] = _to_tristate(value)
+            elif name == "dm_sent":
+                self._dm_sent[i] = _to_tristate(value)
+            elif name == "dm_sent_at":
+                self._dm_sent_at[i] = _to_epoch(value)
+            elif name == "engagement_score":
+                self.engagement_total += value - self._engagement[i]
+                self._engagement[i] = value
+            elif name == "tags_matched":
+                self._tags[i] = tuple(sys.intern(tag) for tag in value)
+            else:
+                raise AttributeError(f"CampaignTarget has no field '{name}'")
+        self._count(i, 1)
+        self._reindex(i)
+
+        self._dirty[i] = None
+        self.version += 1
+        return True
+
+    def with_status(self, status: str, limit: Optional[int] = None) -> List[CampaignTarget]:
+        """Targets in a status, in insertion order"""
+        indexes = self._by_status[TARGET_STATUSES[status]]
+        result = []
+        for i in indexes:
+            if limit is not None and len(result) >= limit:
+                break
+            result.append(self._view(i))
+        return result
+
+    def count(self, status: str) -> int:
+        return len(self._by_status[TARGET_STATUSES[status]])
+
+    def followback_rate(self) -> float:
+        """Share of followed targets that followed back"""
+        if not self.followed_count:
+            return 0.0
+        return self.followed_back_count / self.followed_count
+
+    def page(self, offset: int = 0, limit: int = 50, status: Optional[str] = None) -> List[CampaignTarget]:
+        """A slice of targets, optionally restricted to one status"""
+        if status is None:
+            end = min(offset + limit, len(self._usernames))
+            return [self._view(i) for i in range(offset, end)]
+
+        indexes = self._by_status[TARGET_STATUSES[status]]
+        result = []
+        for position, i in enumerate(indexes):
+            if position < offset:
+                continue
+            if len(result) >= limit:
+                break
+            result.append(self._view(i))
+        return result
+
+    def follow_time_buckets(self) -> List[Dict[str, Any]]:
+        """Follow and followback counts grouped by hour of day and weekday"""
+        buckets: Dict[tuple, List[int]] = {}
+        for i, followed_at in enumerate(self._followed_at):
+            if math.isnan(followed_at):
+                continue
+            when = datetime.fromtimestamp(followed_at)
+            bucket = buckets.setdefault((when.weekday(), when.hour), [0, 0])
+            bucket[0] += 1
+            if self._followed_back[i] == 1:
+                bucket[1] += 1
+
+        return [
+            {"day": day, "hour": hour, "followed": counts[0], "followed_back": counts[1]}
+            for (day, hour), counts in sorted(buckets.items())
+        ]
+
+    def pop_dirty(self) -> List[CampaignTarget]:
+        """Return targets changed since the last call and clear their dirty flags"""
+        dirty = [self._view(i) for i in self._dirty]
+        self._dirty.clear()
+        return dirty
+
+    def mark_dirty(self, usernames: Iterable[str]):
+        """Re-flag targets whose flush failed"""
+        for username in usernames:
+            i = self._index.get(username)
+            if i is not None:
+                self._dirty[i] = None
+
+    def _view(self, i: int) -> CampaignTarget:
+        return CampaignTarget(
+            username=self._usernames[i],
+            followed_at=_from_epoch(self._followed_at[i]),
+            followed_back=_from_tristate(self._followed_back[i]),
+            dm_sent=_from_tristate(self._dm_sent[i]),
+            dm_sent_at=_from_epoch(self._dm_sent_at[i]),
+            engagement_score=self._engagement[i],
+            tags_matched=list(self._tags[i])
+        )
+
+    def _count(self, i: int, delta: int):
+        """Add or remove one row's contribution to the running counters"""
+        if not math.isnan(self._followed_at[i]):
+            self.followed_count += delta
+        if self._followed_back[i] == 1:
+            self.followed_back_count += delta
+        if self._dm_sent[i] == 1:
+            self.dm_sent_count += delta
+
+    def _reindex(self, i: int):
+        """Move a row to the status index matching its current fields"""
+        if math.isnan(self._followed_at[i]):
+            status = UNFOLLOWED
+        elif self._dm_sent[i] == 1:
+            status = MESSAGED
+        elif self._followed_back[i] == 1:
+            status = FOLLOWED_BACK
+        elif self._followed_back[i] == 0:
+            status = NOT_FOLLOWED_BACK
+        else:
+            status = AWAITING_FOLLOWBACK
+
+        current = self._status[i]
+        if current != status:
+            del self._by_status[current][i]
+            self._by_status[status][i] = None
+            self._status[i] = status
@@ -0,0 +1,333 @@
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+from typing import Dict, Any, Iterator, List, Optional
+from backend.config.settings import settings
+
+SERVICE_NAME = "social-commander-backend"
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+
+@dataclass(frozen=True)
+class SpanContext:
+    """Identifies a span so work started elsewhere (e.g. a queued task) can join its trace"""
+    trace_id: str
+    span_id: str
+    sampled: bool = True
+
+    def to_traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    @classmethod
+    def from_traceparent(cls, header: Optional[str]) -> Optional["SpanContext"]:
+        """Parse a W3C traceparent header, returning None if it is missing or malformed"""
+        if not header:
+            return None
+        parts = header.strip().split("-")
+        if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+            return None
+        try:
+            int(parts[1], 16)
+            int(parts[2], 16)
+            flags = int(parts[3], 16)
+        except ValueError:
+            return None
+        return cls(parts[1], parts[2], bool(flags & 1))
+
+class Span:
+    """A timed operation within a trace"""
+
+    __slots__ = ("name", "context", "parent_id", "kind", "start_ns", "end_ns", "attributes", "status", "error")
+
+    recording = True
+
+    def __init__(self, name: str, context: SpanContext, parent_id: Optional[str], kind: int, attributes: Optional[Dict[str, Any]]):
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = dict(attributes) if attributes else {}
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_error(self, exc: BaseException):
+        self.status = "error"
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start_ns / 1e9,
+            "duration_ms": round(self.duration_ms, 3) if self.end_ns is not None else None,
+            "attributes": self.attributes,
+            "status": self.status,
+            "error": self.error
+        }
+
+class _NonRecordingSpan:
+    """Stands in for spans that were not sampled so their children are skipped too"""
+
+    __slots__ = ("context",)
+
+    recording = False
+    attributes: Dict[str, Any] = {}
+
+    def __init__(self, context: Optional[SpanContext]):
+        self.context = context
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def record_error(self, exc: BaseException):
+        pass
+
+_NOOP_SPAN = _NonRecordingSpan(None)
+
+_current_span: ContextVar[Optional[Any]] = ContextVar("current_span", default=None)
+
+class InMemoryExporter:
+    """Keeps the most recent traces for the /debug/traces route"""
+
+    def __init__(self, max_traces: int = 200, max_spans_per_trace: int = 500):
+        self.max_traces = max_traces
+        self.max_spans_per_trace = max_spans_per_trace
+        self.traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        with self._lock:
+            spans = self.traces.get(span.context.trace_id)
+            if spans is None:
+                spans = self.traces[span.context.trace_id] = []
+                while len(self.traces) > self.max_traces:
+                    self.traces.popitem(last=False)
+            if len(spans) < self.max_spans_per_trace:
+                spans.append(span)
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Summaries of the newest traces first"""
+        with self._lock:
+            items = list(self.traces.items())[-limit:]
+        summaries = []
+        for trace_id, spans in reversed(items):
+            root = next((s for s in spans if s.parent_id is None), None) or min(spans, key=lambda s: s.start_ns)
+            start = min(s.start_ns for s in spans)
+            end = max(s.end_ns for s in spans)
+            summaries.append({
+                "trace_id": trace_id,
+                "root": root.name,
+                "start": start / 1e9,
+                "duration_ms": round((end - start) / 1e6, 3),
+                "span_count": len(spans),
+                "errors": sum(1 for s in spans if s.status == "error")
+            })
+        return summaries
+
+    def get(self, trace_id: str) -> Optional[List[Dict[str, Any]]]:
+        """All spans of one trace ordered by start time"""
+        with self._lock:
+            spans = list(self.traces.get(trace_id, ()))
+        if not spans:
+            return None
+        return [span.to_dict() for span in sorted(spans, key=lambda s: s.start_ns)]
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def span_to_otlp(span: Span) -> Dict[str, Any]:
+    """Encode a span in the OTLP/JSON span shape"""
+    encoded = {
+        "traceId": span.context.trace_id,
+        "spanId": span.context.span_id,
+        "name": span.name,
+        "kind": span.kind,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+        "status": {"code": 2, "message": span.error} if span.status == "error" else {"code": 1}
+    }
+    if span.parent_id:
+        encoded["parentSpanId"] = span.parent_id
+    return encoded
+
+_SHUTDOWN = object()
+
+class OTLPFileExporter:
+    """Appends batches of spans as OTLP/JSON lines from a background thread"""
+
+    def __init__(self, path: str, batch_size: int = 64, flush_interval: float = 2.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="otlp-file-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span):
+        self._queue.put(span)
+
+    def shutdown(self):
+        self._queue.put(_SHUTDOWN)
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        batch: List[Span] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is _SHUTDOWN:
+                self._write(batch)
+                return
+            if item is not None:
+                batch.append(item)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._write(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _write(self, batch: List[Span]):
+        if not batch:
+            return
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+                "scopeSpans": [{
+                    "scope": {"name": "backend.tracing"},
+                    "spans": [span_to_otlp(span) for span in batch]
+                }]
+            }]
+        }
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(payload, separators=(",", ":")) + "\n")
+        except OSError:
+            pass
+
+class Tracer:
+    """Creates spans, applies head sampling and hands finished spans to exporters"""
+
+    def __init__(self, sample_rate: float = 0.0):
+        self.sample_rate = sample_rate
+        self.exporters: List[Any] = []
+
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+
+    def get_exporter(self, exporter_type: type):
+        return next((e for e in self.exporters if isinstance(e, exporter_type)), None)
+
+    @contextmanager
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None, parent: Optional[SpanContext] = None,
+                   kind: int = SPAN_KIND_INTERNAL, child_only: bool = False) -> Iterator[Any]:
+        """Run a block inside a span; child_only spans are skipped when there is no active trace"""
+        if self.sample_rate <= 0 or not self.exporters:
+            yield _NOOP_SPAN
+            return
+
+        if parent is None:
+            current = _current_span.get()
+            if current is not None:
+                parent = current.context
+        if parent is None and child_only:
+            yield _NOOP_SPAN
+            return
+
+        if parent is not None:
+            sampled = parent.sampled
+            trace_id = parent.trace_id
+        else:
+            sampled = random.random() < self.sample_rate
+            trace_id = os.urandom(16).hex()
+
+        context = SpanContext(trace_id, os.urandom(8).hex(), sampled)
+        if sampled:
+            span = Span(name, context, parent.span_id if parent else None, kind, attributes)
+        else:
+            span = _NonRecordingSpan(context)
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.record_error(exc)
+            raise
+        finally:
+            _current_span.reset(token)
+            if sampled:
+                span.end_ns = time.time_ns()
+                for exporter in self.exporters:
+                    exporter.export(span)
+
+    def shutdown(self):
+        for exporter in self.exporters:
+            if hasattr(exporter, "shutdown"):
+                exporter.shutdown()
+
+tracer = Tracer(settings.trace_sample_rate)
+
+def configure_tracing() -> Tracer:
+    """Install the exporters named in settings.trace_exporters"""
+    tracer.sample_rate = settings.trace_sample_rate
+    tracer.exporters = []
+    for name in (n.strip() for n in settings.trace_exporters.split(",")):
+        if name == "memory":
+            tracer.add_exporter(InMemoryExporter(settings.trace_buffer_size))
+        elif name == "otlp_file":
+            tracer.add_exporter(OTLPFileExporter(settings.trace_file_path))
+    return tracer
+
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None, parent: Optional[SpanContext] = None,
+               kind: int = SPAN_KIND_INTERNAL, child_only: bool = False):
+    return tracer.start_span(name, attributes, parent, kind, child_only)
+
+def current_context() -> Optional[SpanContext]:
+    """Context of the active span, for carrying a trace across task boundaries"""
+    span = _current_span.get()
+    return span.context if span is not None else None
+
+def traced(name: str, child_only: bool = False):
+    """Decorator running a sync function inside a span"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if tracer.sample_rate <= 0 or not tracer.exporters:
+                return func(*args, **kwargs)
+            with tracer.start_span(name, child_only=child_only):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
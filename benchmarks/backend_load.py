@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""End-to-end load benchmark for the backend running in simulate mode.
+
+Starts uvicorn on a temporary database with SIMULATE=true, then runs three
+phases against it and writes the results as JSON:
+
+  rest       concurrent REST clients cycling through read endpoints
+  websocket  N log-stream subscribers connecting and receiving the backlog
+  log_burst  synthetic log bursts fanned out to the connected subscribers
+
+Each phase reports p50/p95/p99 latency, throughput, errors, server RSS and
+the change in the server's own metrics. No network access is needed.
+
+    python benchmarks/backend_load.py --clients 20 --ws-subscribers 50 --output load.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+import aiohttp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_ENDPOINTS = ["/health", "/status/", "/status/metrics", "/logs/?limit=50", "/campaigns/list"]
+
+# Server metrics whose deltas are reported per phase, grouped by subsystem
+SUBSYSTEM_METRICS = {
+    "database": ["db_query_seconds"],
+    "logging": ["log_entries", "log_ws_send_seconds", "log_ws_dropped"],
+    "queue": ["queue_handler_seconds", "queue_tasks"],
+    "llm": ["llm_requests", "llm_generation_seconds"],
+    "event_loop": ["event_loop_lag_seconds", "event_loop_stalls"]
+}
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+def latency_summary(latencies_ms: List[float]) -> Dict[str, Any]:
+    return {
+        "count": len(latencies_ms),
+        "p50_ms": _round(percentile(latencies_ms, 0.50)),
+        "p95_ms": _round(percentile(latencies_ms, 0.95)),
+        "p99_ms": _round(percentile(latencies_ms, 0.99)),
+        "max_ms": _round(max(latencies_ms) if latencies_ms else None)
+    }
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 3)
+
+def read_rss_bytes(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+class RSSSampler:
+    """Tracks the server's peak RSS while a phase runs"""
+
+    def __init__(self, pid: int, interval: float = 0.1):
+        self.pid = pid
+        self.interval = interval
+        self.start_bytes = read_rss_bytes(pid)
+        self.peak_bytes = self.start_bytes or 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self):
+        while True:
+            rss = read_rss_bytes(self.pid)
+            if rss:
+                self.peak_bytes = max(self.peak_bytes, rss)
+            await asyncio.sleep(self.interval)
+
+    def summary(self) -> Dict[str, Any]:
+        end = read_rss_bytes(self.pid)
+        return {"start_bytes": self.start_bytes, "end_bytes": end, "peak_bytes": self.peak_bytes}
+
+def _metric_totals(metrics: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """Flatten /status/metrics into {metric: {label_key: count_or_value}}"""
+    totals = {}
+    for name, metric in metrics.items():
+        values = {}
+        for entry in metric["values"]:
+            key = ",".join(f"{k}={v}" for k, v in entry["labels"].items()) or "_"
+            if metric["type"] == "histogram":
+                values[key] = {"count": entry["count"], "sum": entry["sum"]}
+            else:
+                values[key] = {"value": entry["value"]}
+        totals[name] = values
+    return totals
+
+def metric_deltas(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-subsystem change in server counters and histograms between two snapshots"""
+    before, after = _metric_totals(before), _metric_totals(after)
+    result = {}
+    for subsystem, names in SUBSYSTEM_METRICS.items():
+        section = {}
+        for name in names:
+            for key, value in after.get(name, {}).items():
+                previous = before.get(name, {}).get(key, {})
+                if "count" in value:
+                    count = value["count"] - previous.get("count", 0)
+                    if count:
+                        total = value["sum"] - previous.get("sum", 0.0)
+                        section[f"{name}{{{key}}}"] = {"count": count, "mean_ms": round(total / count * 1000, 3)}
+                elif value["value"] != previous.get("value", 0.0):
+                    section[f"{name}{{{key}}}"] = value["value"] - previous.get("value", 0.0)
+        if section:
+            result[subsystem] = section
+    return result
+
+class BackendProcess:
+    """uvicorn running the backend in simulate mode on a throwaway database"""
+
+    def __init__(self, port: int, extra_env: Dict[str, str]):
+        self.port = port
+        self.base_url = f"http://127.0.0.1:{port}"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = dict(
+            os.environ,
+            SIMULATE="true",
+            DEBUG_ROUTES_ENABLED="true",
+            LLM_PRELOAD="false",
+            LLM_NOT_READY_POLICY="reject",
+            HF_HUB_OFFLINE="1",
+            TRANSFORMERS_OFFLINE="1",
+            DATABASE_URL=os.path.join(self.tmp.name, "bench.db"),
+            **extra_env
+        )
+        self.process: Optional[subprocess.Popen] = None
+        self.startup_seconds: Optional[float] = None
+
+    async def start(self, session: aiohttp.ClientSession, timeout: float = 60.0):
+        started = time.monotonic()
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1",
+             "--port", str(self.port), "--log-level", "warning"],
+            cwd=ROOT, env=self.env
+        )
+        while time.monotonic() - started < timeout:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Backend exited with code {self.process.returncode}")
+            try:
+                async with session.get(f"{self.base_url}/health") as response:
+                    if response.status == 200:
+                        self.startup_seconds = time.monotonic() - started
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.05)
+        raise RuntimeError(f"Backend not healthy after {timeout:.0f}s")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.tmp.cleanup()
+
+async def fetch_metrics(session: aiohttp.ClientSession, base_url: str) -> Dict[str, Any]:
+    async with session.get(f"{base_url}/status/metrics") as response:
+        return (await response.json())["metrics"]
+
+async def run_phase(name: str, backend: BackendProcess, session: aiohttp.ClientSession, body) -> Dict[str, Any]:
+    """Run one phase, wrapping it with RSS sampling and metric snapshots"""
+    print(f"▶ {name}", file=sys.stderr)
+    before = await fetch_metrics(session, backend.base_url)
+    async with RSSSampler(backend.process.pid) as rss:
+        started = time.perf_counter()
+        result = await body()
+        elapsed = time.perf_counter() - started
+    after = await fetch_metrics(session, backend.base_url)
+    result.update({
+        "elapsed_s": round(elapsed, 3),
+        "server_rss": rss.summary(),
+        "server_metrics": metric_deltas(before, after)
+    })
+    return result
+
+async def rest_phase(session: aiohttp.ClientSession, base_url: str, clients: int,
+                     requests_per_client: int, endpoints: List[str]) -> Dict[str, Any]:
+    latencies: Dict[str, List[float]] = {endpoint: [] for endpoint in endpoints}
+    errors = 0
+
+    async def client(offset: int):
+        nonlocal errors
+        for i in range(requests_per_client):
+            endpoint = endpoints[(offset + i) % len(endpoints)]
+            started = time.perf_counter()
+            try:
+                async with session.get(base_url + endpoint) as response:
+                    await response.read()
+                    if response.status >= 400:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+                continue
+            latencies[endpoint].append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    elapsed = time.perf_counter() - started
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "clients": clients,
+        "requests": len(all_latencies) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(all_latencies) / elapsed, 1) if elapsed else None,
+        "latency": latency_summary(all_latencies),
+        "by_endpoint": {endpoint: latency_summary(values) for endpoint, values in latencies.items()}
+    }
+
+class LogSubscriber:
+    """A /logs/stream client recording delivery latency of tagged synthetic logs"""
+
+    def __init__(self, session: aiohttp.ClientSession, url: str, tag: str):
+        self.session = session
+        self.url = url
+        self.tag = tag
+        self.ws = None
+        self.connect_ms: Optional[float] = None
+        self.received = 0
+        self.delivery_ms: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def connect(self):
+        started = time.perf_counter()
+        self.ws = await self.session.ws_connect(self.url)
+        self.connect_ms = (time.perf_counter() - started) * 1000
+        self._task = asyncio.create_task(self._read())
+
+    async def _read(self):
+        async for message in self.ws:
+            if message.type != aiohttp.WSMsgType.TEXT:
+                break
+            received_at = time.time()
+            self.received += 1
+            details = json.loads(message.data).get("details", "")
+            parts = details.split(" ")
+            if len(parts) == 3 and parts[0] == self.tag:
+                self.delivery_ms.append((received_at - float(parts[2])) * 1000)
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+async def websocket_phase(subscribers: List[LogSubscriber]) -> Dict[str, Any]:
+    results = await asyncio.gather(*(s.connect() for s in subscribers), return_exceptions=True)
+    connected = [s for s, result in zip(subscribers, results) if not isinstance(result, Exception)]
+    await asyncio.sleep(0.5)
+    return {
+        "subscribers": len(subscribers),
+        "connected": len(connected),
+        "errors": len(subscribers) - len(connected),
+        "connect_latency": latency_summary([s.connect_ms for s in connected]),
+        "backlog_messages": sum(s.received for s in connected)
+    }
+
+async def log_burst_phase(session: aiohttp.ClientSession, base_url: str, subscribers: List[LogSubscriber],
+                          bursts: int, burst_size: int, tag: str, settle: float) -> Dict[str, Any]:
+    burst_ms = []
+    errors = 0
+    for _ in range(bursts):
+        started = time.perf_counter()
+        async with session.post(f"{base_url}/debug/simulate/logs", json={"count": burst_size, "tag": tag}) as response:
+            await response.read()
+            if response.status != 200:
+                errors += 1
+        burst_ms.append((time.perf_counter() - started) * 1000)
+
+    expected = bursts * burst_size
+    deadline = time.monotonic() + settle
+    while time.monotonic() < deadline and any(len(s.delivery_ms) < expected for s in subscribers if s.ws):
+        await asyncio.sleep(0.05)
+
+    delivery = [value for s in subscribers for value in s.delivery_ms]
+    total_write_s = sum(burst_ms) / 1000
+    return {
+        "bursts": bursts,
+        "burst_size": burst_size,
+        "errors": errors,
+        "logs_written": expected,
+        "write_throughput_logs_per_s": round(expected / total_write_s, 1) if total_write_s else None,
+        "burst_latency": latency_summary(burst_ms),
+        "delivered": len(delivery),
+        "expected_deliveries": expected * len([s for s in subscribers if s.ws]),
+        "delivery_latency": latency_summary(delivery)
+    }
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def main(args) -> Dict[str, Any]:
+    backend = BackendProcess(args.port, {"LOOP_LAG_THRESHOLD_MS": str(args.loop_lag_threshold_ms)})
+    timeout = aiohttp.ClientTimeout(total=60)
+    connector = aiohttp.TCPConnector(limit=args.clients + args.ws_subscribers + 10)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        try:
+            await backend.start(session)
+            phases = {}
+            phases["rest"] = await run_phase("rest", backend, session, lambda: rest_phase(
+                session, backend.base_url, args.clients, args.requests, args.endpoints
+            ))
+
+            tag = f"bench{os.getpid()}"
+            subscribers = [
+                LogSubscriber(session, backend.base_url.replace("http", "ws") + "/logs/stream", tag)
+                for _ in range(args.ws_subscribers)
+            ]
+            phases["websocket"] = await run_phase("websocket", backend, session, lambda: websocket_phase(subscribers))
+            phases["log_burst"] = await run_phase("log_burst", backend, session, lambda: log_burst_phase(
+                session, backend.base_url, subscribers, args.log_bursts, args.burst_size, tag, args.settle
+            ))
+            await asyncio.gather(*(s.close() for s in subscribers))
+        finally:
+            backend.stop()
+
+    return {
+        "benchmark": "backend_load",
+        "timestamp": datetime.now().isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "startup_seconds": _round(backend.startup_seconds),
+        "phases": phases
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--clients", type=int, default=20, help="concurrent REST clients")
+    parser.add_argument("--requests", type=int, default=100, help="requests per REST client")
+    parser.add_argument("--endpoints", nargs="+", default=DEFAULT_ENDPOINTS)
+    parser.add_argument("--ws-subscribers", type=int, default=25)
+    parser.add_argument("--log-bursts", type=int, default=10)
+    parser.add_argument("--burst-size", type=int, default=200)
+    parser.add_argument("--settle", type=float, default=10.0, help="seconds to wait for burst delivery")
+    parser.add_argument("--loop-lag-threshold-ms", type=int, default=100)
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(main(args))
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(payload)
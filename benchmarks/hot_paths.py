@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the storage, logging and serialisation hot paths.
+
+Covers DatabaseManager.add_log_entry/get_logs against synthetic log tables
+of 10k, 1M or 10M rows, LoggingService.log_action fan-out to fake WebSocket
+clients, LogEntry serialisation, and ProfileMirrorService history parsing
+over a year of 30-second mirror samples.
+
+    python benchmarks/hot_paths.py --sizes 10k 1m --output results.json
+    python benchmarks/hot_paths.py --save-baseline benchmarks/baseline.json
+    python benchmarks/hot_paths.py --baseline benchmarks/baseline.json --max-regression 20
+
+With --baseline the run exits non-zero when any benchmark's median is more
+than --max-regression percent slower than the stored value. Baselines are
+machine-specific; record them on the machine that runs the gate. Generated
+datasets are cached in --data-dir so large sizes are only built once.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Any, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.database.sqlite_db import DatabaseManager, LOGS_COLUMNS, SCHEMA_VERSION
+from backend.models import LogEntry
+from backend.services.logging_service import LoggingService
+from backend.services.profile_mirror_service import ProfileMirrorService
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+
+LOG_TYPES = [("follow", "follow"), ("dm", "send_dm"), ("scan", "scan_hashtag"), ("engage", "like_post"),
+             ("story", "view_story"), ("system", "system")]
+OUTCOMES = ["success"] * 8 + ["warning", "error"]
+
+def run_benchmark(name: str, func: Callable[[], Any], number: int, repeat: int) -> Dict[str, Any]:
+    """Time `number` calls of func, `repeat` times, and report per-call statistics"""
+    func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - started) / number)
+    result = {
+        "name": name,
+        "number": number,
+        "repeat": repeat,
+        "median_us": round(statistics.median(timings) * 1e6, 3),
+        "min_us": round(min(timings) * 1e6, 3),
+        "max_us": round(max(timings) * 1e6, 3)
+    }
+    print(f"  {name:<48} {result['median_us']:>14.1f} us  (min {result['min_us']:.1f})", file=sys.stderr)
+    return result
+
+def _synthetic_rows(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    step = timedelta(days=365) / max(count, 1)
+    for i in range(count):
+        log_type, action = rng.choice(LOG_TYPES)
+        created = start + step * i
+        yield (
+            int(created.timestamp() * 1000), log_type, action, rng.choice(OUTCOMES),
+            f"user_{rng.randint(1, 200_000)}", f"Synthetic {action} #{i}",
+            round(rng.random(), 3), round(rng.random(), 3)
+        )
+
+def build_log_database(path: str, rows: int) -> DatabaseManager:
+    """Create (or reuse) a database with `rows` synthetic log entries"""
+    if os.path.exists(path):
+        with sqlite3.connect(path) as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version == SCHEMA_VERSION and conn.execute("SELECT COUNT(*) FROM logs").fetchone()[0] == rows:
+                return DatabaseManager(path)
+        os.remove(path)
+
+    print(f"  building {rows:,} log rows in {path}", file=sys.stderr)
+    manager = DatabaseManager(path)
+    rows_iter = _synthetic_rows(rows)
+    with sqlite3.connect(path) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        while True:
+            chunk = [
+                (ts_ms, manager._code(conn, "log_types", log_type), manager._code(conn, "log_actions", action),
+                 manager._code(conn, "log_outcomes", outcome), *rest)
+                for _, (ts_ms, log_type, action, outcome, *rest) in zip(range(100_000), rows_iter)
+            ]
+            if not chunk:
+                break
+            conn.executemany(f"""
+                INSERT INTO logs ({LOGS_COLUMNS})
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, chunk)
+            conn.commit()
+    return manager
+
+def build_mirror_history(directory: str, days: int, interval_seconds: int = 30) -> str:
+    """Write `days` of mirror samples ending now, as ProfileMirrorService would have"""
+    path = os.path.join(directory, "mirror_history.jsonl")
+    samples = days * 86400 // interval_seconds
+    if os.path.exists(path):
+        with open(path) as f:
+            if sum(1 for _ in f) == samples:
+                return path
+
+    print(f"  building {samples:,} mirror samples in {path}", file=sys.stderr)
+    rng = random.Random(7)
+    now = datetime.now()
+    followers, following, posts = 1200, 800, 150
+    with open(path, "w") as f:
+        for i in range(samples):
+            followers += rng.choice((-1, 0, 0, 0, 1, 1))
+            following += rng.choice((-1, 0, 0, 1))
+            if rng.random() < 0.0005:
+                posts += 1
+            f.write(json.dumps({
+                "timestamp": (now - timedelta(seconds=(samples - i) * interval_seconds)).isoformat(),
+                "username": "bench_user",
+                "followers": followers,
+                "following": following,
+                "posts": posts,
+                "screenshot_path": "/tmp/simulated_mirror.jpg",
+                "sync_type": "regular"
+            }) + "\n")
+    return path
+
+class FakeWebSocket:
+    """Accepts sends without I/O so fan-out cost is measured on its own"""
+
+    async def send_text(self, message: str):
+        pass
+
+def _log_entry(i: int) -> LogEntry:
+    return LogEntry(
+        timestamp="12:00:00", action="follow", target=f"user_{i}", details=f"Followed user_{i} from #travel",
+        type="follow", outcome="success", probability=0.42, followbackChance=0.31
+    )
+
+def bench_database(size_name: str, rows: int, data_dir: str, repeat: int) -> List[Dict[str, Any]]:
+    db = build_log_database(os.path.join(data_dir, f"logs_{size_name}.db"), rows)
+    results = [
+        run_benchmark(f"db.get_logs(limit=100)[{size_name}]", lambda: db.get_logs(limit=100), 20, repeat),
+        run_benchmark(f"db.get_logs(limit=100, type=dm)[{size_name}]", lambda: db.get_logs(limit=100, log_type="dm"), 20, repeat),
+        run_benchmark(f"db.get_logs(limit=1000)[{size_name}]", lambda: db.get_logs(limit=1000), 5, repeat)
+    ]
+
+    entries = [_log_entry(i) for i in range(200)]
+    counter = iter(range(10**12))
+    results.append(run_benchmark(
+        f"db.add_log_entry[{size_name}]", lambda: db.add_log_entry(entries[next(counter) % 200]), 200, repeat
+    ))
+    # drop the benchmark's own inserts so the cached dataset keeps its size
+    with sqlite3.connect(db.db_path) as conn:
+        conn.execute("DELETE FROM logs WHERE id > ?", (rows,))
+    return results
+
+def bench_logging(data_dir: str, repeat: int) -> List[Dict[str, Any]]:
+    db = build_log_database(os.path.join(data_dir, "logs_fanout.db"), 0)
+    service = LoggingService(db)
+    loop = asyncio.new_event_loop()
+    results = []
+    try:
+        for clients in (0, 10, 100):
+            service.active_connections = {FakeWebSocket() for _ in range(clients)}
+            entry = _log_entry(0)
+            results.append(run_benchmark(
+                f"logging.log_action[{clients} clients]",
+                lambda: loop.run_until_complete(service.log_action(entry)), 200, repeat
+            ))
+    finally:
+        loop.close()
+    return results
+
+def bench_serialisation(repeat: int) -> List[Dict[str, Any]]:
+    entry = _log_entry(0)
+    payload = json.dumps(entry.dict())
+    return [
+        run_benchmark("LogEntry(...)", lambda: _log_entry(0), 5000, repeat),
+        run_benchmark("json.dumps(LogEntry.dict())", lambda: json.dumps(entry.dict()), 5000, repeat),
+        run_benchmark("LogEntry(**json.loads(...))", lambda: LogEntry(**json.loads(payload)), 5000, repeat)
+    ]
+
+def bench_mirror(data_dir: str, days: int, repeat: int) -> List[Dict[str, Any]]:
+    mirror_dir = os.path.join(data_dir, f"mirror_{days}d")
+    os.makedirs(mirror_dir, exist_ok=True)
+    build_mirror_history(mirror_dir, days)
+
+    db = build_log_database(os.path.join(data_dir, "logs_mirror.db"), 0)
+    service = ProfileMirrorService(LoggingService(db), None)
+    service.mirror_data_path = mirror_dir
+    return [
+        run_benchmark(f"mirror._calculate_daily_metrics[{days}d]",
+                      lambda: asyncio.run(service._calculate_daily_metrics()), 1, repeat),
+        run_benchmark(f"mirror._analyze_growth_trends[{days}d]",
+                      lambda: asyncio.run(service._analyze_growth_trends()), 1, repeat)
+    ]
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], max_regression: float) -> List[Dict[str, Any]]:
+    """Benchmarks whose median regressed by more than max_regression percent"""
+    baseline_by_name = {r["name"]: r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        previous = baseline_by_name.get(result["name"])
+        if not previous or not previous["median_us"]:
+            continue
+        change = (result["median_us"] - previous["median_us"]) / previous["median_us"] * 100
+        result["change_pct"] = round(change, 1)
+        if change > max_regression:
+            regressions.append({
+                "name": result["name"],
+                "baseline_us": previous["median_us"],
+                "current_us": result["median_us"],
+                "change_pct": round(change, 1)
+            })
+    return regressions
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=["10k"], choices=sorted(SIZES))
+    parser.add_argument("--mirror-days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="+", choices=["db", "logging", "serialisation", "mirror"],
+                        default=["db", "logging", "serialisation", "mirror"])
+    parser.add_argument("--data-dir", help="directory for cached datasets (default: a temporary directory)")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--save-baseline", help="write results as the new baseline")
+    parser.add_argument("--baseline", help="compare against this baseline")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="allowed slowdown in percent")
+    args = parser.parse_args(argv)
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="hot_paths_")
+    os.makedirs(data_dir, exist_ok=True)
+
+    results: List[Dict[str, Any]] = []
+    try:
+        if "db" in args.only:
+            for size_name in args.sizes:
+                results += bench_database(size_name, SIZES[size_name], data_dir, args.repeat)
+        if "logging" in args.only:
+            results += bench_logging(data_dir, args.repeat)
+        if "serialisation" in args.only:
+            results += bench_serialisation(args.repeat)
+        if "mirror" in args.only:
+            results += bench_mirror(data_dir, args.mirror_days, args.repeat)
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    report = {
+        "benchmark": "hot_paths",
+        "timestamp": datetime.now().isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sqlite": sqlite3.sqlite_version,
+        "results": results
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        report["regressions"] = regressions
+        for regression in regressions:
+            print(f"REGRESSION {regression['name']}: {regression['baseline_us']:.1f} -> "
+                  f"{regression['current_us']:.1f} us (+{regression['change_pct']}%)", file=sys.stderr)
+        if regressions:
+            exit_code = 1
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    if not args.output and not args.save_baseline:
+        print(json.dumps(report, indent=2))
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""Offline comparison of the LLMService inference backends on a tiny random model.
+
+Builds a small randomly initialised Llama-style causal LM and a BPE tokenizer
+trained on local text, so nothing is downloaded. Each backend is then loaded
+through LLMService in its own process and driven with the prompts StanleyAI
+and analyze_logs actually build, at several concurrency levels:
+
+  transformers  float32 pipeline in an executor thread
+  quantized     int8 dynamic quantisation on CPU
+  worker        transformers in the out-of-process inference worker
+  fake          the continuous-batching engine (scheduling overhead only)
+  vllm          AsyncLLMEngine (needs a CUDA GPU)
+
+For each backend it reports load time, peak RSS, prefill time (a one-token
+generation per prompt shape) and, per concurrency level, tokens/sec and
+p50/p95 request latency, as JSON for comparing commits:
+
+    python benchmarks/llm_backends.py --concurrency 1 4 8 --output llm.json
+
+Absolute numbers from a random model only mean something relative to each
+other; compare runs made on the same machine with the same --layers/--hidden.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BACKENDS = {
+    "transformers": {"LLM_BACKEND": "transformers"},
+    "quantized": {"LLM_BACKEND": "quantized"},
+    "worker": {"LLM_BACKEND": "transformers", "LLM_INFERENCE_MODE": "process"},
+    "fake": {"LLM_BACKEND": "fake"},
+    "vllm": {"LLM_BACKEND": "vllm"}
+}
+
+LOG_TYPES = [("follow", "follow"), ("dm", "send_dm"), ("scan", "scan_hashtag"), ("engage", "like_post"),
+             ("story", "view_story"), ("system", "system")]
+OUTCOMES = ["success"] * 8 + ["warning", "error"]
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 3)
+
+def peak_rss_bytes(pid: str = "self") -> Optional[int]:
+    """High-water mark of a process's resident set size"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+def synthetic_logs(index: int, count: int = 60) -> List[Dict[str, Any]]:
+    """Log dicts shaped like DatabaseManager.get_logs rows"""
+    rng = random.Random(index)
+    start = datetime(2024, 1, 1) + timedelta(hours=index)
+    logs = []
+    for i in range(count):
+        log_type, action = rng.choice(LOG_TYPES)
+        outcome = rng.choice(OUTCOMES)
+        logs.append({
+            "timestamp": (start + timedelta(seconds=37 * i)).strftime("%H:%M:%S"),
+            "action": action,
+            "target": f"user_{rng.randint(1, 200_000)}",
+            "details": "Rate limited by Instagram" if outcome == "error" else f"{action} completed",
+            "type": log_type,
+            "outcome": outcome
+        })
+    return logs
+
+def synthetic_intel(index: int) -> Dict[str, Any]:
+    rng = random.Random(index)
+    return {
+        "follows_today": rng.randint(0, 100),
+        "dms_sent": rng.randint(0, 8),
+        "follow_back_rate": round(rng.random(), 3),
+        "top_hashtags": [f"#tag{rng.randint(1, 500)}" for _ in range(5)],
+        "campaign": f"campaign_{index}"
+    }
+
+def synthetic_profile(index: int) -> Dict[str, Any]:
+    rng = random.Random(index)
+    return {
+        "username": f"target_{index}",
+        "followers": rng.randint(100, 50_000),
+        "following": rng.randint(50, 5_000),
+        "bio": "Photographer and coffee lover. Travelling the world one city at a time.",
+        "recent_posts": [f"post about {rng.choice(['travel', 'food', 'fitness', 'art'])}" for _ in range(3)]
+    }
+
+def tokenizer_corpus() -> List[str]:
+    from backend.services.llm_service import StanleyAI
+
+    corpus = [StanleyAI(None).personality_prompt]
+    for index in range(200):
+        corpus.append(json.dumps(synthetic_intel(index), indent=2))
+        corpus.append(json.dumps(synthetic_profile(index), indent=2))
+        corpus.extend(f"- {log['action']} {log['target']}: {log['outcome']} {log['details']}"
+                      for log in synthetic_logs(index, 10))
+    return corpus
+
+def build_tiny_model(model_dir: str, layers: int, hidden: int, seed: int) -> Dict[str, Any]:
+    """Save a random Llama-style model and a locally trained tokenizer, reusing a matching build"""
+    spec = {"layers": layers, "hidden": hidden, "seed": seed}
+    spec_path = os.path.join(model_dir, "benchmark_spec.json")
+    if os.path.exists(spec_path):
+        with open(spec_path) as f:
+            built = json.load(f)
+        if {key: built.get(key) for key in spec} == spec:
+            return built
+        shutil.rmtree(model_dir)
+
+    import torch
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers, trainers
+    from transformers import LlamaConfig, LlamaForCausalLM, PreTrainedTokenizerFast
+
+    os.makedirs(model_dir, exist_ok=True)
+    tokenizer = Tokenizer(models.BPE(unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+    tokenizer.train_from_iterator(tokenizer_corpus(), trainers.BpeTrainer(
+        vocab_size=2048, special_tokens=["<unk>", "<s>", "</s>"],
+        initial_alphabet=pre_tokenizers.ByteLevel.alphabet()
+    ))
+    fast = PreTrainedTokenizerFast(tokenizer_object=tokenizer, unk_token="<unk>", bos_token="<s>", eos_token="</s>")
+    fast.save_pretrained(model_dir)
+
+    torch.manual_seed(seed)
+    heads = max(1, hidden // 32)
+    config = LlamaConfig(
+        vocab_size=len(fast), hidden_size=hidden, intermediate_size=hidden * 8 // 3,
+        num_hidden_layers=layers, num_attention_heads=heads, num_key_value_heads=heads,
+        max_position_embeddings=4096, bos_token_id=fast.bos_token_id, eos_token_id=fast.eos_token_id
+    )
+    model = LlamaForCausalLM(config)
+    model.save_pretrained(model_dir, safe_serialization=True)
+
+    built = {**spec, "vocab_size": len(fast), "parameters": sum(p.numel() for p in model.parameters())}
+    with open(spec_path, "w") as f:
+        json.dump(built, f, indent=2)
+    return built
+
+class _BenchLog:
+    """Stands in for LoggingService; prints backend messages to stderr with --verbose"""
+
+    def __init__(self, verbose: bool):
+        self.verbose = verbose
+
+    async def log_system_message(self, message: str, log_type: str = "info"):
+        if self.verbose or log_type == "error":
+            print(f"    [{log_type}] {message}", file=sys.stderr)
+
+def prompt_shapes(service, stanley) -> Dict[str, Callable[[int], Awaitable[Any]]]:
+    """Request factories that build prompts the way the API does; the index keeps prompts distinct"""
+    return {
+        "stanley_insight": lambda i: stanley.get_insight(synthetic_intel(i)),
+        "stanley_dm_strategy": lambda i: stanley.generate_dm_strategy(synthetic_profile(i)),
+        "analyze_logs": lambda i: service.analyze_logs(synthetic_logs(i))
+    }
+
+async def run_backend(backend: str, concurrency: List[int], requests: int, verbose: bool) -> Dict[str, Any]:
+    """Load one backend in this process and measure it; driven by the parent via --child"""
+    from backend.services.llm_service import LLMService, ModelState, StanleyAI
+
+    class RecordingLLMService(LLMService):
+        """Remembers each generation's prompt and completion so shapes and tokens can be measured"""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.calls: List[Dict[str, Any]] = []
+
+        async def generate_text(self, prompt: str, max_length: int = 150, temperature: float = 0.7) -> str:
+            text = await super().generate_text(prompt, max_length, temperature)
+            self.calls.append({"prompt": prompt, "max_length": max_length, "text": text})
+            return text
+
+    service = RecordingLLMService(_BenchLog(verbose))
+    started = time.perf_counter()
+    await service.initialize()
+    result: Dict[str, Any] = {
+        "backend": backend,
+        "load_seconds": _round(time.perf_counter() - started),
+        "load_phases": service.lifecycle_stats["last_load_phases"],
+        "weights_mmapped": service.weights_mmapped
+    }
+    if service.state != ModelState.READY or service.fallback_mode:
+        result["error"] = service.load_error or "backend fell back to dummy responses"
+        await service.shutdown()
+        return result
+
+    shapes = prompt_shapes(service, StanleyAI(service))
+    next_index = 0
+
+    prefill = {}
+    for name, make_request in shapes.items():
+        await make_request(next_index)
+        shape_call = service.calls[-1]
+        prompt = shape_call["prompt"]
+        timings = []
+        for _ in range(5):
+            call_started = time.perf_counter()
+            await service.generate_text(prompt + f" {next_index}", max_length=1)
+            timings.append((time.perf_counter() - call_started) * 1000)
+            next_index += 1
+        prefill[name] = {
+            "prompt_tokens": service.count_tokens(prompt),
+            "max_length": shape_call["max_length"],
+            "median_ms": _round(sorted(timings)[len(timings) // 2])
+        }
+    result["prefill_ms"] = prefill
+
+    levels = []
+    for level in concurrency:
+        semaphore = asyncio.Semaphore(level)
+        latencies: Dict[str, List[float]] = {name: [] for name in shapes}
+        service.calls.clear()
+
+        async def timed_request(name: str, index: int):
+            async with semaphore:
+                call_started = time.perf_counter()
+                await shapes[name](index)
+                latencies[name].append((time.perf_counter() - call_started) * 1000)
+
+        jobs = []
+        for _ in range(requests):
+            for name in shapes:
+                jobs.append(timed_request(name, next_index))
+                next_index += 1
+        level_started = time.perf_counter()
+        await asyncio.gather(*jobs)
+        wall = time.perf_counter() - level_started
+
+        completion_tokens = sum(service.count_tokens(call["text"]) for call in service.calls)
+        all_latencies = [ms for values in latencies.values() for ms in values]
+        levels.append({
+            "concurrency": level,
+            "requests": len(all_latencies),
+            "wall_seconds": _round(wall),
+            "completion_tokens": completion_tokens,
+            "tokens_per_second": _round(completion_tokens / wall) if wall else None,
+            "p50_ms": _round(percentile(all_latencies, 0.50)),
+            "p95_ms": _round(percentile(all_latencies, 0.95)),
+            "by_shape": {
+                name: {"p50_ms": _round(percentile(values, 0.50)), "p95_ms": _round(percentile(values, 0.95))}
+                for name, values in latencies.items()
+            }
+        })
+        print(f"    c={level:<3} {levels[-1]['tokens_per_second']:>10} tok/s  p95 {levels[-1]['p95_ms']} ms",
+              file=sys.stderr)
+    result["levels"] = levels
+
+    result["peak_rss_bytes"] = peak_rss_bytes()
+    if backend == "worker" and service.engine is not None and service.engine.process is not None:
+        result["worker_peak_rss_bytes"] = peak_rss_bytes(str(service.engine.process.pid))
+    if service.engine is not None:
+        result["engine"] = service.engine.get_stats()
+    await service.shutdown()
+    return result
+
+def run_child(backend: str, model_dir: str, args) -> Dict[str, Any]:
+    """Benchmark one backend in a fresh interpreter so imports and peak RSS are its own"""
+    env = dict(
+        os.environ,
+        LLM_MODEL_NAME=model_dir,
+        LLM_FALLBACK_MODEL=model_dir,
+        LLM_RESULT_CACHE_TTL="0",
+        LLM_OFFLINE="true",
+        LLM_CPU_THREADS=str(args.threads),
+        HF_HUB_OFFLINE="1",
+        TRANSFORMERS_OFFLINE="1",
+        LOOP_LAG_THRESHOLD_MS="0",
+        **BACKENDS[backend]
+    )
+    command = [sys.executable, os.path.abspath(__file__), "--child", backend,
+               "--concurrency", *map(str, args.concurrency), "--requests", str(args.requests)]
+    if args.verbose:
+        command.append("--verbose")
+    completed = subprocess.run(command, cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True)
+    try:
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        return {"backend": backend, "error": f"benchmark process exited with code {completed.returncode}"}
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS),
+                        default=["transformers", "quantized", "worker", "fake"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 8])
+    parser.add_argument("--requests", type=int, default=8, help="requests per prompt shape per concurrency level")
+    parser.add_argument("--layers", type=int, default=4)
+    parser.add_argument("--hidden", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--threads", type=int, default=0, help="torch CPU threads (0 lets torch decide)")
+    parser.add_argument("--model-dir", help="where to build and cache the tiny model (default: a temporary directory)")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--verbose", action="store_true", help="show LLMService log messages")
+    parser.add_argument("--child", choices=list(BACKENDS), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        result = asyncio.run(run_backend(args.child, args.concurrency, args.requests, args.verbose))
+        print(json.dumps(result))
+        return 0
+
+    model_dir = args.model_dir or tempfile.mkdtemp(prefix="llm_bench_model_")
+    try:
+        print(f"Building tiny model in {model_dir}", file=sys.stderr)
+        model = build_tiny_model(model_dir, args.layers, args.hidden, args.seed)
+        results = []
+        for backend in args.backends:
+            print(f"  {backend}", file=sys.stderr)
+            result = run_child(backend, model_dir, args)
+            if "error" in result:
+                print(f"    skipped: {result['error']}", file=sys.stderr)
+            results.append(result)
+    finally:
+        if not args.model_dir:
+            shutil.rmtree(model_dir, ignore_errors=True)
+
+    report = {
+        "benchmark": "llm_backends",
+        "timestamp": datetime.now().isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "model": model,
+        "concurrency": args.concurrency,
+        "requests_per_shape": args.requests,
+        "backends": results
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,10 +3,25 @@
 import asyncio
 import aiohttp
 import json
-from datetime import datetime
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
 
 API_BASE = "http://localhost:8000"
 
+IMPORT_TIME_BUDGET_MS = 1500
+HEALTH_READY_BUDGET_SECONDS = 5.0
+COLD_START_PORT = 8765
+CAMPAIGN_TEST_PORT = 8766
+CAMPAIGN_TEST_TARGETS = 12
+INSIGHT_STREAM_PORT = 8767
+# Modules that must only be imported on first real use, never by "import backend.main"
+DEFERRED_MODULES = ("torch", "transformers", "vllm", "llama_cpp", "playwright", "aiohttp")
+
 async def test_endpoint(session, method, endpoint, data=None, expected_status=200):
     """Test a single API endpoint"""
     url = f"{API_BASE}{endpoint}"
@@ -45,6 +60,7 @@ async def test_backend_endpoints():
             ("GET", "/health", 200),
             ("GET", "/status/", 200),
             ("GET", "/status/metrics", 200),
+            ("GET", "/status/metrics/prometheus", 200),
             
             ("GET", "/auth/status", 200),
             ("POST", "/auth/login", {"username": "test", "password": "test"}, 422),  # Expected to fail without real creds
@@ -113,18 +129,635 @@ async def test_websocket_connection():
         print(f"❌ WebSocket test failed: {str(e)}")
         return False
 
+def parse_importtime(stderr: str) -> list:
+    """Parse -X importtime output into (depth, module, cumulative_us) rows"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((depth, name.strip(), int(cumulative)))
+    return rows
+
+def test_import_time():
+    """Check that importing backend.main stays within budget and defers heavy dependencies"""
+    print("\n⏱️  Testing Import Time")
+    print("-" * 30)
+    
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend.main"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if result.returncode != 0:
+        print(f"❌ import backend.main failed: {result.stderr.strip().splitlines()[-1]}")
+        return False
+    
+    rows = parse_importtime(result.stderr)
+    top_level = [(name, us) for depth, name, us in rows if depth == 0]
+    total_ms = sum(us for _, us in top_level) / 1000
+    slowest = sorted(top_level, key=lambda item: item[1], reverse=True)[:5]
+    print("   Slowest: " + ", ".join(f"{name}={us / 1000:.0f}ms" for name, us in slowest))
+    
+    success = True
+    imported = {name.split(".")[0] for _, name, _ in rows}
+    eager = [name for name in DEFERRED_MODULES if name in imported]
+    if eager:
+        print(f"❌ Heavy modules imported eagerly: {', '.join(eager)}")
+        success = False
+    else:
+        print("✅ Heavy modules deferred")
+    
+    if total_ms > IMPORT_TIME_BUDGET_MS:
+        print(f"❌ Import took {total_ms:.0f}ms (budget {IMPORT_TIME_BUDGET_MS}ms)")
+        success = False
+    else:
+        print(f"✅ Import took {total_ms:.0f}ms (budget {IMPORT_TIME_BUDGET_MS}ms)")
+    
+    return success
+
+async def test_cold_start():
+    """Start a fresh simulated backend and time how long /health takes to answer"""
+    print("\n🧊 Testing Cold Start")
+    print("-" * 30)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            SIMULATE="true",
+            LLM_PRELOAD="false",
+            DATABASE_URL=os.path.join(tmp, "cold_start.db")
+        )
+        started = time.monotonic()
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(COLD_START_PORT)],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        try:
+            async with aiohttp.ClientSession() as session:
+                while time.monotonic() - started < HEALTH_READY_BUDGET_SECONDS:
+                    try:
+                        async with session.get(f"http://localhost:{COLD_START_PORT}/health") as response:
+                            if response.status == 200:
+                                elapsed = time.monotonic() - started
+                                print(f"✅ /health ready after {elapsed:.2f}s (budget {HEALTH_READY_BUDGET_SECONDS:g}s)")
+                                return True
+                    except aiohttp.ClientError:
+                        pass
+                    if process.poll() is not None:
+                        print(f"❌ Backend exited with code {process.returncode}")
+                        return False
+                    await asyncio.sleep(0.05)
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+    
+    print(f"❌ /health not ready within {HEALTH_READY_BUDGET_SECONDS:g}s")
+    return False
+
+@asynccontextmanager
+async def simulated_backend(port: int, database_url: str, **env):
+    """Run a simulated backend on a private port and database, yielding its base URL once /health answers"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=dict(os.environ, SIMULATE="true", LLM_PRELOAD="false", DATABASE_URL=database_url, **env),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://localhost:{port}"
+    try:
+        async with aiohttp.ClientSession() as session:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    async with session.get(f"{base_url}/health") as response:
+                        if response.status == 200:
+                            break
+                except aiohttp.ClientError:
+                    pass
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f"Backend on port {port} did not start")
+                await asyncio.sleep(0.05)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+def seed_campaign(database_url: str, campaign_id: str, followed: int):
+    """Persist a paused campaign with CAMPAIGN_TEST_TARGETS targets, the first `followed` of them followed"""
+    from backend.database.sqlite_db import DatabaseManager
+    
+    now = datetime.now().isoformat()
+    DatabaseManager(database_url).save_campaign_state(
+        [{
+            "id": campaign_id,
+            "name": "Seeded",
+            "persona": "stanley",
+            "target_hashtags": ["film"],
+            "status": "paused",
+            "phase": "following",
+            "created_at": now,
+            "settings": {"max_targets": 50, "follow_delay_hours": 48, "dm_only_followers": True, "auto_unfollow": False},
+            "metrics": {"targets_scanned": CAMPAIGN_TEST_TARGETS, "follows_sent": followed,
+                        "followbacks_received": 0, "dms_sent": 0, "engagement_rate": 0.0},
+            "targets_count": CAMPAIGN_TEST_TARGETS,
+            "followback_rate": 0.0
+        }],
+        [
+            {
+                "campaign_id": campaign_id,
+                "username": f"target_{i:02d}",
+                "followed_at": now if i < followed else None,
+                "followed_back": None,
+                "dm_sent": False,
+                "dm_sent_at": None,
+                "engagement_score": 0.5,
+                "tags_matched": ["film"]
+            }
+            for i in range(CAMPAIGN_TEST_TARGETS)
+        ]
+    )
+
+def check(condition: bool, message: str) -> bool:
+    print(f"{'✅' if condition else '❌'} {message}")
+    return condition
+
+async def get_with_etag(session, url: str, etag: str = None):
+    """GET a URL, optionally revalidating; returns (status, etag, json body or None)"""
+    headers = {"If-None-Match": etag} if etag else {}
+    async with session.get(url, headers=headers) as response:
+        body = await response.json() if response.status == 200 else None
+        return response.status, response.headers.get("ETag"), body
+
+async def test_campaign_routes():
+    """List, get and page a persisted campaign, revalidating each response with its ETag"""
+    print("\n📋 Testing Campaign Routes")
+    print("-" * 30)
+    
+    campaign_id = "campaign_seeded"
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = os.path.join(tmp, "campaigns.db")
+        seed_campaign(database_url, campaign_id, followed=5)
+        
+        try:
+            async with simulated_backend(CAMPAIGN_TEST_PORT, database_url) as base_url:
+                async with aiohttp.ClientSession() as session:
+                    results = []
+                    
+                    status, etag, body = await get_with_etag(session, f"{base_url}/campaigns/list")
+                    results.append(check(status == 200 and etag is not None, f"GET /campaigns/list - Status: {status}"))
+                    results.append(check(
+                        body is not None and [c["id"] for c in body["campaigns"]] == [campaign_id],
+                        "Seeded campaign restored from the database"
+                    ))
+                    status, _, _ = await get_with_etag(session, f"{base_url}/campaigns/list", etag)
+                    results.append(check(status == 304, f"GET /campaigns/list with If-None-Match - Status: {status}"))
+                    
+                    campaign_url = f"{base_url}/campaigns/{campaign_id}"
+                    status, etag, body = await get_with_etag(session, campaign_url)
+                    results.append(check(
+                        status == 200 and body["targets_count"] == CAMPAIGN_TEST_TARGETS,
+                        f"GET /campaigns/{{id}} - Status: {status}"
+                    ))
+                    status, _, _ = await get_with_etag(session, campaign_url, etag)
+                    results.append(check(status == 304, f"GET /campaigns/{{id}} with If-None-Match - Status: {status}"))
+                    status, _, _ = await get_with_etag(session, f"{base_url}/campaigns/campaign_missing")
+                    results.append(check(status == 404, f"GET unknown campaign - Status: {status}"))
+                    
+                    usernames = []
+                    for offset in range(0, CAMPAIGN_TEST_TARGETS, 5):
+                        status, page_etag, page = await get_with_etag(session, f"{campaign_url}/targets?offset={offset}&limit=5")
+                        if status != 200 or page["total"] != CAMPAIGN_TEST_TARGETS:
+                            results.append(check(False, f"GET targets page at offset {offset} - Status: {status}"))
+                            break
+                        usernames.extend(t["username"] for t in page["targets"])
+                    results.append(check(
+                        usernames == [f"target_{i:02d}" for i in range(CAMPAIGN_TEST_TARGETS)],
+                        f"Targets paged in order across {len(usernames)} rows"
+                    ))
+                    status, _, _ = await get_with_etag(session, f"{campaign_url}/targets?offset=10&limit=5", page_etag)
+                    results.append(check(status == 304, f"GET targets page with If-None-Match - Status: {status}"))
+                    status, _, _ = await get_with_etag(session, f"{campaign_url}/targets?offset=0&limit=5", page_etag)
+                    results.append(check(status == 200, f"Other page ignores that page's ETag - Status: {status}"))
+                    
+                    status, _, page = await get_with_etag(session, f"{campaign_url}/targets?status=unfollowed&limit=500")
+                    results.append(check(
+                        status == 200 and page["total"] == CAMPAIGN_TEST_TARGETS - 5 and len(page["targets"]) == CAMPAIGN_TEST_TARGETS - 5,
+                        f"Targets filtered by status - Status: {status}"
+                    ))
+                    status, _, _ = await get_with_etag(session, f"{campaign_url}/targets?status=bogus")
+                    results.append(check(status == 400, f"Unknown target status rejected - Status: {status}"))
+                    
+                    return all(results)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return False
+
+async def test_campaign_insight_stream():
+    """Insight sections stream in completion order and a slow section becomes an error record"""
+    print("\n🧠 Testing Campaign Insight Stream")
+    print("-" * 30)
+    
+    from types import SimpleNamespace
+    from backend.config.settings import settings
+    from backend.services.campaign_service import Campaign, CampaignPhase, CampaignService, CampaignStatus
+    
+    async def log_system_message(message, level="info"):
+        pass
+    
+    def after(seconds, value):
+        async def section(*args):
+            await asyncio.sleep(seconds)
+            return value
+        return section
+    
+    service = CampaignService(
+        SimpleNamespace(log_system_message=log_system_message),
+        None,
+        None,
+        SimpleNamespace(register_handler=lambda task_type, handler: None)
+    )
+    service.campaigns["campaign_stream"] = Campaign(
+        id="campaign_stream", name="Stream", persona="stanley", target_hashtags=["film"],
+        status=CampaignStatus.PAUSED, phase=CampaignPhase.SCANNING, created_at=datetime.now(),
+        targets=[], settings={}, metrics={}
+    )
+    service.stanley_ai = SimpleNamespace(get_insight=after(0.3, "insight"), get_recommendation=after(0.1, "recommendation"))
+    service._get_suggested_hashtags = after(0.2, ["#film"])
+    service._get_optimal_timing = after(5.0, {})
+    
+    section_timeout = settings.campaign_insight_section_timeout
+    settings.campaign_insight_section_timeout = 0.5
+    started = time.monotonic()
+    try:
+        records = [record async for record in service.iter_campaign_insights("campaign_stream")]
+    finally:
+        settings.campaign_insight_section_timeout = section_timeout
+    elapsed = time.monotonic() - started
+    
+    order = [record["section"] for record in records]
+    results = [
+        check(order == ["engagement_analysis", "recommendation", "suggested_hashtags", "insight", "optimal_timing"],
+              f"Sections yielded in completion order: {', '.join(order)}"),
+        check(records[-1]["value"] is None and "timed out" in (records[-1]["error"] or ""),
+              f"Timed-out section yields an error record: {records[-1]['error']}"),
+        check(all(record["error"] is None for record in records[:-1]), "Completed sections carry no error"),
+        check(elapsed < 1.0, f"Stream finished after {elapsed:.2f}s instead of waiting 5s for the slow section")
+    ]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = os.path.join(tmp, "insights.db")
+        seed_campaign(database_url, "campaign_seeded", followed=5)
+        
+        try:
+            async with simulated_backend(INSIGHT_STREAM_PORT, database_url,
+                                         LLM_BACKEND="fake", CAMPAIGN_INSIGHT_SECTION_TIMEOUT="0.2") as base_url:
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(f"{base_url}/campaigns/campaign_seeded/insights/stream") as response:
+                        status = response.status
+                        lines = [json.loads(line) async for line in response.content if line.strip()]
+                    sections = [line["section"] for line in lines]
+                    results.append(check(
+                        status == 200 and sections[:1] == ["engagement_analysis"] and len(set(sections)) == 5,
+                        f"GET /campaigns/{{id}}/insights/stream - Status: {status}, {len(lines)} sections"
+                    ))
+                    results.append(check(
+                        all((line["value"] is None) != (line["error"] is None) for line in lines),
+                        "Every streamed section has either a value or an error"
+                    ))
+                    async with session.get(f"{base_url}/campaigns/campaign_missing/insights/stream") as response:
+                        results.append(check(response.status == 404, f"Stream for unknown campaign - Status: {response.status}"))
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return False
+    
+    return all(results)
+
+async def test_inference_engine_batching():
+    """The fake engine caps its batch at max_batch_size and frees the slot of a cancelled request"""
+    print("\n🧮 Testing Inference Engine Batching")
+    print("-" * 30)
+    
+    from backend.services.inference_engine import FakeAsyncEngine
+    
+    engine = FakeAsyncEngine(max_batch_size=4, step_seconds=0.005)
+    try:
+        tasks = [
+            asyncio.create_task(engine.generate(f"req-{i}", f"prompt {i}", max_tokens=20, temperature=0.7))
+            for i in range(10)
+        ]
+        await asyncio.sleep(0.02)
+        tasks[0].cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        await engine.shutdown()
+    
+    completed = [result for result in results if not isinstance(result, BaseException)]
+    return all([
+        check(engine.max_observed_batch == 4, f"Batch capped at max_batch_size: max observed {engine.max_observed_batch}"),
+        check(isinstance(results[0], asyncio.CancelledError) and engine.aborted == 1,
+              f"Cancelled request aborted: aborted={engine.aborted}"),
+        check(len(completed) == 9 and all(result.completion_tokens == 20 for result in completed),
+              f"Remaining requests completed: {len(completed)}/9")
+    ])
+
+async def test_queue_completed_count():
+    """Status reports tasks the queue completed, and metric labels key on their string form"""
+    print("\n📥 Testing Queue Completed Count")
+    print("-" * 30)
+    
+    from types import SimpleNamespace
+    from backend.metrics import MetricsRegistry
+    from backend.services.queue_service import QueueService, QueuedTask, TaskType
+    
+    async def log_system_message(message, outcome="success"):
+        pass
+    
+    async def handler(target, data):
+        return target != "fails"
+    
+    queue = QueueService(SimpleNamespace(log_system_message=log_system_message))
+    queue.register_handler(TaskType.LIKE, handler)
+    for target in ("ok_1", "ok_2", "fails"):
+        await queue._run_task(QueuedTask(
+            id=target, task_type=TaskType.LIKE, target=target, data={},
+            scheduled_time=datetime.now(), max_retries=0
+        ))
+    
+    counter = MetricsRegistry().counter("test_labels", "Label normalisation", ["code"])
+    counter.labels(200).inc()
+    counter.labels("200").inc()
+    
+    return all([
+        check(queue.get_queue_status()["completed_count"] == 2,
+              f"Completed count: {queue.get_queue_status()['completed_count']}/2"),
+        check(counter.labels(200) is counter.labels("200") and counter.labels("200").value == 2,
+              "Non-string label values share the stringified child")
+    ])
+
+async def test_inference_worker():
+    """Start the out-of-process worker on the fake backend and generate through it"""
+    print("\n👷 Testing Inference Worker")
+    print("-" * 30)
+    
+    from types import SimpleNamespace
+    from backend.models.log_entry import LogEntry
+    from backend.services.llm_worker import WorkerEngine
+    
+    messages = []
+    
+    async def log_system_message(message, outcome="success"):
+        # Validate like LoggingService does, so an invalid outcome fails here as it would in production
+        LogEntry(timestamp=datetime.now().strftime("%H:%M:%S"), action="system", details=message,
+                 type="system", outcome=outcome)
+        messages.append((outcome, message))
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = os.environ.get("LLM_BACKEND")
+        os.environ["LLM_BACKEND"] = "fake"
+        engine = WorkerEngine(SimpleNamespace(log_system_message=log_system_message),
+                              socket_path=os.path.join(tmp, "worker.sock"), start_timeout=60)
+        try:
+            await engine.start()
+            result = await engine.generate("worker-test", "Hello worker", max_tokens=8, temperature=0.7)
+            stats = engine.get_stats()
+        except Exception as e:
+            print(f"❌ Worker failed: {str(e)}")
+            return False
+        finally:
+            await engine.shutdown()
+            if backend is None:
+                os.environ.pop("LLM_BACKEND", None)
+            else:
+                os.environ["LLM_BACKEND"] = backend
+    
+    return all([
+        check(stats["ready"] and stats["worker"].get("backend") == "fake",
+              f"Worker reached ready on the {stats['worker'].get('backend')} backend"),
+        check(any(message.startswith("[worker]") for _, message in messages),
+              f"Forwarded {sum(message.startswith('[worker]') for _, message in messages)} worker log messages"),
+        check(bool(result.text) and stats["completed"] == 1, f"Generated through the worker: {result.text[:40]!r}")
+    ])
+
+def test_log_storage():
+    """Log entries keep their own timestamps and the v2 migration reports table and index sizes apart"""
+    print("\n🗄️  Testing Log Storage")
+    print("-" * 30)
+    
+    import sqlite3
+    from backend.database.sqlite_db import DatabaseManager
+    from backend.models.log_entry import LogEntry
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = os.path.join(tmp, "logs.db")
+        with sqlite3.connect(database_url) as conn:
+            conn.execute("""
+                CREATE TABLE logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, action TEXT NOT NULL, target TEXT,
+                details TEXT NOT NULL, type TEXT NOT NULL, outcome TEXT NOT NULL, probability REAL,
+                followback_chance REAL, created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.executemany(
+                "INSERT INTO logs (timestamp, action, target, details, type, outcome) VALUES (?, ?, ?, ?, ?, ?)",
+                [("12:00:00", "follow", f"user_{i}", f"Followed user_{i}", "follow", "success") for i in range(500)]
+            )
+        
+        db_manager = DatabaseManager(database_url)
+        size = db_manager.migration_report["size_bytes"]
+        backdated = datetime(2024, 1, 2, 3, 4, 5)
+        db_manager.add_log_entry(LogEntry(timestamp=backdated.isoformat(), action="system",
+                                          details="Backdated entry", type="system", outcome="success"))
+        with sqlite3.connect(database_url) as conn:
+            ts_ms = conn.execute("SELECT ts_ms FROM logs WHERE details = 'Backdated entry'").fetchone()[0]
+        
+        # A live entry written before a backdated one: ids no longer follow time
+        now = datetime.now()
+        db_manager.add_log_entry(LogEntry(timestamp=now.isoformat(), action="system",
+                                          details="needle live", type="system", outcome="success"))
+        db_manager.add_log_entry(LogEntry(timestamp=(now - timedelta(days=2)).isoformat(), action="system",
+                                          details="needle old", type="system", outcome="success"))
+        recent = [hit.details for hit in db_manager.search_logs("needle", since=now - timedelta(days=3))]
+        older = [hit.details for hit in db_manager.search_logs("needle", until=now - timedelta(days=1))]
+        fts_enabled = db_manager.fts_enabled
+    
+    return all([
+        check(recent == ["needle live", "needle old"],
+              f"Search since 3 days ago finds live and backdated hits newest first (fts={fts_enabled}): {recent}"),
+        check(older == ["needle old"], f"Search until 1 day ago finds the backdated hit: {older}"),
+        check(size["after"]["indexes"] is None or (size["after"]["indexes"] > 0 and size["before"]["indexes"] == 0),
+              f"Index bytes reported separately: {size['before']['indexes']} -> {size['after']['indexes']}"),
+        check(size["after"]["tables"] is None or size["after"]["tables"] < size["before"]["tables"],
+              f"Log tables shrink: {size['before']['tables']} -> {size['after']['tables']} bytes"),
+        check(ts_ms == int(backdated.timestamp() * 1000), "Entry timestamp stored instead of the insert time")
+    ])
+
+async def test_llm_unload_reload():
+    """A request arriving while the model unloads reloads it without losing the new engine"""
+    print("\n♻️  Testing LLM Unload/Reload")
+    print("-" * 30)
+    
+    from types import SimpleNamespace
+    from backend.config.settings import settings
+    from backend.services.llm_service import LLMService, ModelState
+    
+    async def log_system_message(message, outcome="success"):
+        pass
+    
+    saved = (settings.llm_backend, settings.llm_warmup_enabled)
+    settings.llm_backend, settings.llm_warmup_enabled = "fake", False
+    llm = LLMService(SimpleNamespace(log_system_message=log_system_message))
+    try:
+        await llm.initialize()
+        old_engine = llm.engine
+        stop_engine = old_engine.shutdown
+        
+        async def slow_shutdown():
+            await asyncio.sleep(0.3)  # long enough for the request below to load a new engine
+            await stop_engine()
+        
+        old_engine.shutdown = slow_shutdown
+        unload = asyncio.create_task(llm.unload("test"))
+        await asyncio.sleep(0)
+        text = await llm.generate_text("Reload while unloading", max_length=8)
+        unloaded = await unload
+        state, engine = llm.state, llm.engine
+    finally:
+        await llm.shutdown()
+        settings.llm_backend, settings.llm_warmup_enabled = saved
+    
+    return all([
+        check(unloaded, "Unload completed"),
+        check(state == ModelState.READY and engine is not None and engine is not old_engine,
+              f"Service left {state.value} with {'a new' if engine is not None else 'no'} engine"),
+        check(bool(text) and not llm.fallback_mode, f"Request served by the reloaded model: {text[:40]!r}")
+    ])
+
+async def test_campaign_eviction():
+    """Finished campaigns drop their tasks, and evicting their targets neither dirties them nor changes the ETag"""
+    print("\n🧹 Testing Campaign Target Eviction")
+    print("-" * 30)
+    
+    from types import SimpleNamespace
+    from backend.database.sqlite_db import DatabaseManager
+    from backend.services.campaign_service import (
+        Campaign, CampaignPhase, CampaignService, CampaignStatus, CampaignTarget
+    )
+    
+    async def log_system_message(message, outcome="success"):
+        pass
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        service = CampaignService(
+            SimpleNamespace(log_system_message=log_system_message),
+            None,
+            None,
+            SimpleNamespace(register_handler=lambda task_type, handler: None),
+            DatabaseManager(os.path.join(tmp, "eviction.db"))
+        )
+        campaign = Campaign(
+            id="campaign_done", name="Done", persona="stanley", target_hashtags=["film"],
+            status=CampaignStatus.ACTIVE, phase=CampaignPhase.COMPLETED, created_at=datetime.now(),
+            targets=[], settings={}, metrics={}
+        )
+        for i in range(3):
+            campaign.targets.add(CampaignTarget(username=f"target_{i}", engagement_score=0.5, tags_matched=["film"]))
+        service.campaigns[campaign.id] = campaign
+        service.campaign_tasks[campaign.id] = asyncio.create_task(service._run_campaign(campaign.id))
+        await service.campaign_tasks[campaign.id]
+        
+        etag = service.get_campaign_etag(campaign.id)
+        written = await service.flush()
+        evicted = not campaign.targets_loaded
+        rewritten = await service.flush()
+        etag_after = service.get_campaign_etag(campaign.id)
+        page = await service.get_campaign_targets(campaign.id)
+    
+    return all([
+        check(campaign.status == CampaignStatus.COMPLETED and campaign.id not in service.campaign_tasks,
+              "Completed campaign removed its task"),
+        check(written == 4 and evicted, f"Flush wrote {written} rows and evicted the targets"),
+        check(rewritten == 0 and etag_after == etag,
+              f"Eviction needs no extra write ({rewritten} rows) and keeps the ETag"),
+        check(page["total"] == 3, f"Evicted targets hydrate again on demand: {page['total']}")
+    ])
+
+async def test_llm_result_cache():
+    """Real generations are cached for the TTL; fallback text after an error is not"""
+    print("\n🗃️  Testing LLM Result Cache")
+    print("-" * 30)
+    
+    from types import SimpleNamespace
+    from backend.config.settings import settings
+    from backend.services.llm_service import LLMService
+    
+    async def log_system_message(message, outcome="success"):
+        pass
+    
+    saved = (settings.llm_backend, settings.llm_warmup_enabled, settings.llm_result_cache_ttl)
+    settings.llm_backend, settings.llm_warmup_enabled, settings.llm_result_cache_ttl = "fake", False, 60.0
+    llm = LLMService(SimpleNamespace(log_system_message=log_system_message))
+    try:
+        await llm.initialize()
+        generate = llm.engine.generate
+        
+        async def failing_generate(*args, **kwargs):
+            raise RuntimeError("simulated engine failure")
+        
+        llm.engine.generate = failing_generate
+        fallback = await llm.generate_text("Cache me if you can", max_length=8)
+        llm.engine.generate = generate
+        recovered = await llm.generate_text("Cache me if you can", max_length=8)
+        repeated = await llm.generate_text("Cache me if you can", max_length=8)
+        stats = dict(llm.coalescing_stats)
+    finally:
+        await llm.shutdown()
+        settings.llm_backend, settings.llm_warmup_enabled, settings.llm_result_cache_ttl = saved
+    
+    return all([
+        check(recovered != fallback, f"Fallback text was not cached: {recovered[:40]!r}"),
+        check(repeated == recovered and stats["generations"] == 2 and stats["cache_hits"] == 1,
+              f"Real generation cached: {stats['generations']} generations, {stats['cache_hits']} cache hit")
+    ])
+
 async def main():
     """Run all backend tests"""
     print(f"🚀 Social Commander Backend Test Suite")
     print(f"⏰ Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print()
     
+    import_success = test_import_time()
+    
+    log_storage_success = test_log_storage()
+    
+    cold_start_success = await test_cold_start()
+    
+    engine_success = await test_inference_engine_batching()
+    
+    worker_success = await test_inference_worker()
+    
+    queue_success = await test_queue_completed_count()
+    
+    unload_success = await test_llm_unload_reload()
+    
+    result_cache_success = await test_llm_result_cache()
+    
+    campaign_success = await test_campaign_routes()
+    
+    insight_stream_success = await test_campaign_insight_stream()
+    
+    eviction_success = await test_campaign_eviction()
+    
     http_success = await test_backend_endpoints()
     
     ws_success = await test_websocket_connection()
     
     print("\n" + "=" * 50)
-    if http_success and ws_success:
+    if import_success and log_storage_success and cold_start_success and engine_success and worker_success and queue_success and unload_success and result_cache_success and campaign_success and insight_stream_success and eviction_success and http_success and ws_success:
         print("🎉 All backend tests passed! System is ready for deployment.")
         return True
     else: